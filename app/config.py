@@ -1,14 +1,36 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     app_name: str = "STL Backend API"
     database_url: str
+    async_database_url: Optional[str] = None  # Derived from database_url when not set
+    read_replica_url: Optional[str] = None  # Optional read replica for read-only endpoints
+    replica_max_lag_seconds: float = 5.0  # Read from primary when the replica lags more than this
+    replica_check_interval_seconds: float = 10.0
     debug: bool = False
+    slow_query_threshold_ms: float = 500.0  # Statements slower than this go to the slow-query log
+    slow_query_log_size: int = 100
+    slow_query_explain: bool = True  # Capture EXPLAIN plans for slow statements (PostgreSQL)
+    n_plus_one_threshold: int = 5  # Warn when one statement shape runs this often in a request
+    search_similarity_threshold: float = 0.3  # Minimum trigram similarity for fuzzy search hits
+    read_cache_ttl_seconds: float = 60.0  # In-process read cache (app/core/cache.py)
+    read_cache_max_entries: int = 2000
+    # Connection pool (applies to both the sync and the async engine)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800  # Seconds before a connection is replaced
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_pre_ping: bool = True
     version: str = "1.0.0"
     cors_origins: list[str] = ["*"]
     cors_credentials: bool = True
     cors_methods: list[str] = ["GET", "POST", "PUT", "DELETE"]
     cors_headers: list[str] = ["*", "Authorization", "Content-Type"]
+    cors_expose_headers: list[str] = [
+        "X-Next-Cursor", "X-DB-Queries", "Server-Timing", "X-Layout-Collisions", "X-Layout-Out-Of-Bounds", "ETag"
+    ]
 
     class Config:
         env_file = ".env.local"
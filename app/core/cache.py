@@ -0,0 +1,180 @@
+"""
+In-process read cache
+
+A bounded LRU cache for hot read endpoints (customer list, a customer's
+plants, plant lines, line tanks). Entries expire after
+settings.read_cache_ttl_seconds and the least recently used entry is
+evicted once settings.read_cache_max_entries is reached.
+
+Every entry carries tags (e.g. "customers", "plant:12"). Write handlers
+invalidate the tags they affect after committing. Invalidation records the
+current value of a monotonic write clock per tag instead of scanning the
+entries: an entry is served only if it was read after the last
+invalidation of each of its tags, so a read that races a write never
+caches stale rows. Other worker processes do not see this process's
+invalidations and converge through the TTL.
+
+Endpoints cache their response together with its ETag (app/utils/etag.py),
+so a hit answers If-None-Match without querying the database at all.
+
+Keys are tuples whose first item names the endpoint; hit and miss counters
+are kept per name for tuning (GET /health/read-cache).
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.utils.etag import etag_matches
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+MISSING = object()
+
+CUSTOMERS_TAG = "customers"
+PLANTS_TAG = "plants"
+
+
+def customer_tag(customer_id: Optional[int]) -> str:
+    """Tag of everything cached about one customer's plants"""
+    return f"customer:{customer_id}"
+
+
+def plant_tag(plant_id: Optional[int]) -> str:
+    """Tag of everything cached about one plant's lines, tank groups and tanks"""
+    return f"plant:{plant_id}"
+
+
+class _Entry(NamedTuple):
+    value: Any
+    tags: Tuple[str, ...]
+    read_at: int
+    expires: float
+
+
+class ReadCache:
+    """Thread-safe LRU cache with per-entry TTL and tag invalidation."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, ...], _Entry]" = OrderedDict()
+        self._clock = itertools.count(1)
+        self._now = 0
+        self._invalidated_at: Dict[str, int] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Clear the hit, miss and eviction counters"""
+        with self._lock:
+            self._counters: Dict[Hashable, Dict[str, int]] = {}
+            self.evictions = 0
+
+    def _count(self, key: Tuple[Hashable, ...], outcome: str) -> None:
+        counters = self._counters.setdefault(key[0], {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def _stale(self, entry: _Entry) -> bool:
+        return any(entry.read_at < self._invalidated_at.get(tag, 0) for tag in entry.tags)
+
+    def watermark(self) -> int:
+        """Current write clock; take it before reading and pass it to set()"""
+        return self._now
+
+    def get(self, key: Tuple[Hashable, ...]) -> Any:
+        """Cached value, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.expires < time.monotonic() or self._stale(entry)):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._count(key, "misses")
+                return MISSING
+            self._entries.move_to_end(key)
+            self._count(key, "hits")
+            return entry.value
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, tags: Iterable[str], read_at: int) -> None:
+        """Store a value read at watermark read_at (dropped if a tag was invalidated since)"""
+        entry = _Entry(value, tuple(tags), read_at, time.monotonic() + self.ttl)
+        with self._lock:
+            if self._stale(entry):
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tags: str) -> None:
+        """Invalidate every entry carrying one of the tags (call after committing a write)"""
+        with self._lock:
+            self._now = next(self._clock)
+            for tag in tags:
+                self._invalidated_at[tag] = self._now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, evictions and hit/miss counters (total and per key name)"""
+        with self._lock:
+            hits = sum(counters["hits"] for counters in self._counters.values())
+            misses = sum(counters["misses"] for counters in self._counters.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "evictions": self.evictions,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "by_name": {str(name): dict(counters) for name, counters in self._counters.items()},
+            }
+
+
+read_cache = ReadCache(settings.read_cache_max_entries, settings.read_cache_ttl_seconds)
+
+
+async def cached_read(
+    key: Tuple[Hashable, ...],
+    request: Request,
+    response: Response,
+    conditional: Callable[[], Awaitable[Optional[Response]]],
+    load: Callable[[], Awaitable[Tuple[Any, Optional[Iterable[str]]]]]
+) -> Any:
+    """
+    Serve a read endpoint from the read cache.
+
+    On a hit, the cached ETag answers If-None-Match (304) and the cached
+    body and X-Next-Cursor header are returned, without any query. On a
+    miss, conditional() sets the ETag or returns a 304 (see
+    app/utils/etag.py:conditional_get), then load() runs the query and
+    returns the body as schema objects (not ORM rows, which belong to the
+    request's session) and the tags to cache it under (None: do not cache).
+    """
+    cached = read_cache.get(key)
+    if cached is not MISSING:
+        value, etag, next_cursor = cached
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return value
+
+    read_at = read_cache.watermark()
+    not_modified = await conditional()
+    if not_modified:
+        return not_modified
+    value, tags = await load()
+    if tags is not None:
+        entry = (value, response.headers["ETag"], response.headers.get(NEXT_CURSOR_HEADER))
+        read_cache.set(key, entry, tags, read_at)
+    return value
@@ -1,10 +1,11 @@
 """
 Dependency injection functions for FastAPI
 """
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal, SessionLocal
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -25,3 +26,19 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency for FastAPI routes.
+    
+    Usage:
+        @app.get("/example")
+        async def example_route(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Customer))
+    
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
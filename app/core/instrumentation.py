@@ -0,0 +1,127 @@
+"""
+Per-request SQL instrumentation
+
+SQLAlchemy engine events count statements and database time for the
+request that issued them. SQLInstrumentationMiddleware reports the totals
+in Server-Timing and X-DB-Queries response headers and logs a warning when
+the same statement shape runs repeatedly in one request (an N+1 pattern).
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Literals and bind placeholders collapse to "?" so statements differing
+# only in their parameters share one shape
+_SHAPE_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL statement so repeated executions with different parameters compare equal"""
+    for pattern, replacement in _SHAPE_PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class RequestQueryStats:
+    """SQL statistics collected for one HTTP request."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record one executed statement"""
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int):
+        """Statement shapes executed at least `threshold` times"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+current_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the statement timing listeners to a (sync) engine"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware that adds per-request SQL statistics to HTTP responses.
+
+    Headers:
+        X-DB-Queries: number of statements executed
+        Server-Timing: db;dur=<ms>;desc="<n> queries", app;dur=<ms>
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(f"{scope['method']} {scope['path']}")
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                db_ms = stats.total_time * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={elapsed_ms:.1f}'.encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            for shape, n in stats.repeated_shapes(self.n_plus_one_threshold):
+                logger.warning(
+                    f"Possible N+1 query in {stats.route}: statement ran {n} times: {shape[:300]}"
+                )
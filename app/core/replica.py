@@ -0,0 +1,163 @@
+"""
+Read-replica routing
+
+RoutingSession sends SELECT statements of read-only sessions to the read
+replica and everything else to the primary. ReplicaMonitor decides whether
+the replica may be used at all: it is skipped while it is unreachable, while
+its replication lag exceeds the configured limit, and for a short window
+after this process has committed a write, so a client reading back its own
+change is not served stale data.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Replication lag in seconds; 0 when the replica has replayed everything it received
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaMonitor:
+    """Tracks whether the read replica is reachable and fresh enough to read from."""
+
+    def __init__(self, engine: Optional[AsyncEngine], max_lag: float, check_interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.healthy = engine is not None
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._checked_at = float("-inf")
+        self._last_write_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def record_write(self) -> None:
+        """Note that this process committed a write to the primary"""
+        self._last_write_at = time.monotonic()
+
+    def mark_down(self, error: Exception) -> None:
+        """Take the replica out of rotation until the next health check"""
+        self.healthy = False
+        self.last_error = str(error)
+        self._checked_at = time.monotonic()
+
+    async def is_usable(self) -> bool:
+        """Return True if read-only sessions may read from the replica"""
+        if self.engine is None:
+            return False
+        now = time.monotonic()
+        if now - self._last_write_at < self.max_lag:
+            return False
+        if now - self._checked_at >= self.check_interval:
+            async with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    await self._check()
+        return self.healthy
+
+    async def _check(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    lag = float(await conn.scalar(POSTGRES_LAG_QUERY) or 0)
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"Read replica unavailable, reading from primary: {e}")
+            self.mark_down(e)
+            return
+
+        self.lag = lag
+        self.last_error = None
+        self._checked_at = time.monotonic()
+        was_healthy = self.healthy
+        self.healthy = lag <= self.max_lag
+        if was_healthy and not self.healthy:
+            logger.warning(f"Read replica lagging {lag:.1f}s, reading from primary")
+
+    def status(self) -> dict:
+        """Current replica state for diagnostics"""
+        return {
+            "configured": self.engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self.last_error,
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session that routes reads of read-only sessions to the replica.
+
+    A session reads from the replica only when info["use_replica"] is set.
+    As soon as it flushes or executes anything other than a SELECT, every
+    later statement of the session goes to the primary, so a request always
+    reads its own writes. If a replica read fails because the replica cannot
+    be reached, the replica is marked down and the read is retried once on
+    the primary.
+    """
+
+    replica_bind = None
+    replica_monitor: Optional[ReplicaMonitor] = None
+
+    def _reads_from_replica(self, clause) -> bool:
+        return (
+            self.replica_bind is not None
+            and self.info.get("use_replica")
+            and not self.info.get("has_writes")
+            and not self._flushing
+            and clause is not None
+            and getattr(clause, "is_select", False)
+        )
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._reads_from_replica(clause):
+            return self.replica_bind
+        if self._flushing or (clause is not None and not getattr(clause, "is_select", False)):
+            self.info["has_writes"] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+    def _with_primary_fallback(self, method, statement, *args, **kwargs):
+        if not self._reads_from_replica(statement):
+            return method(self, statement, *args, **kwargs)
+        try:
+            return method(self, statement, *args, **kwargs)
+        except DBAPIError as e:
+            if not (isinstance(e, (OperationalError, InterfaceError)) or e.connection_invalidated):
+                raise
+            if self.replica_monitor is not None:
+                if self.replica_monitor.healthy:
+                    logger.warning(f"Read replica unavailable, reading from primary: {e.orig}")
+                self.replica_monitor.mark_down(e)
+            # The rest of the session reads from the primary as well
+            self.info["use_replica"] = False
+        return method(self, statement, *args, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        return self._with_primary_fallback(Session.execute, statement, *args, **kwargs)
+
+    def scalar(self, statement, *args, **kwargs):
+        return self._with_primary_fallback(Session.scalar, statement, *args, **kwargs)
+
+    def scalars(self, statement, *args, **kwargs):
+        return self._with_primary_fallback(Session.scalars, statement, *args, **kwargs)
+
+    def commit(self):
+        super().commit()
+        if self.info.get("has_writes") and self.replica_monitor is not None:
+            self.replica_monitor.record_write()
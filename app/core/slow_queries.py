@@ -0,0 +1,125 @@
+"""
+Slow-query log
+
+Statements that run longer than settings.slow_query_threshold_ms are kept
+in a bounded in-memory ring buffer together with their bound parameters,
+the route that issued them and, on PostgreSQL, an EXPLAIN plan. Plans are
+captured on a background thread through the sync engine so the request
+that ran the slow statement is not delayed further.
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.instrumentation import current_request_stats
+
+logger = logging.getLogger(__name__)
+
+MAX_PARAMETERS_LENGTH = 2000
+
+# Row-locking clauses and SELECT ... INTO; a SELECT with either is not a plain read
+LOCKING_OR_WRITING_SELECT_RE = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b|\bINTO\b", re.IGNORECASE
+)
+
+
+def explain_prefix(statement: str) -> str:
+    """
+    EXPLAIN prefix for a statement.
+
+    ANALYZE executes the statement again on the explain connection, so it is
+    only used for plain SELECTs. Locking reads (FOR UPDATE/SHARE) would take
+    row locks there and could block on, or deadlock with, the request that
+    logged them; they get a plain EXPLAIN like writes and CTEs do.
+    """
+    is_plain_read = (
+        statement.lstrip().upper().startswith("SELECT")
+        and not LOCKING_OR_WRITING_SELECT_RE.search(statement)
+    )
+    return "EXPLAIN (ANALYZE, BUFFERS) " if is_plain_read else "EXPLAIN "
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements with optional EXPLAIN capture."""
+
+    def __init__(self, threshold_ms: float, max_entries: int, explain: bool = True):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_engine: Optional[Engine] = None
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def entries(self) -> List[dict]:
+        """Recorded slow statements, newest first"""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._entries)]
+
+    def clear(self) -> None:
+        """Remove all recorded statements"""
+        with self._lock:
+            self._entries.clear()
+
+    def record(self, statement: str, parameters, duration: float, executemany: bool, dialect: str) -> None:
+        """Store a slow statement and schedule its EXPLAIN"""
+        stats = current_request_stats.get()
+        entry = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "route": stats.route if stats else None,
+            "statement": statement,
+            "parameters": repr(parameters)[:MAX_PARAMETERS_LENGTH],
+            "executemany": executemany,
+            "plan": None,
+            "plan_error": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(f"Slow query ({entry['duration_ms']} ms) in {entry['route']}: {statement[:300]}")
+
+        if self.explain and self.explain_engine is not None and not executemany and dialect == "postgresql":
+            self._executor.submit(self._explain, entry, statement, parameters)
+
+    def _explain(self, entry: dict, statement: str, parameters) -> None:
+        prefix = explain_prefix(statement)
+        try:
+            raw = self.explain_engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                cursor.execute(prefix + statement, parameters or None)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                cursor.close()
+            finally:
+                raw.rollback()
+                raw.close()
+        except Exception as e:
+            with self._lock:
+                entry["plan_error"] = str(e)
+            return
+        with self._lock:
+            entry["plan"] = plan
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("slow_query_start_time")
+        if not start_times:
+            return
+        duration = time.perf_counter() - start_times.pop()
+        if duration >= self.threshold and not statement.lstrip().upper().startswith("EXPLAIN"):
+            self.record(statement, parameters, duration, executemany, conn.dialect.name)
+
+    def attach(self, engine: Engine) -> None:
+        """Listen for statements executed on a (sync) engine"""
+        if not event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
@@ -2,22 +2,120 @@
 Database connection and session management
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from app.config import settings
+from app.core.instrumentation import instrument_engine
+from app.core.pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from app.core.replica import ReplicaMonitor, RoutingSession
+from app.core.slow_queries import SlowQueryLog
 
-# Create SQLAlchemy engine
+# Async drivers used when deriving the async URL from database_url
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Derive an async driver URL from a sync SQLAlchemy database URL.
+
+    postgresql:// and postgresql+psycopg2:// become postgresql+psycopg://
+    (psycopg 3 understands the same sslmode query parameters that Azure
+    PostgreSQL connection strings use), sqlite:// becomes sqlite+aiosqlite://.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def get_pool_options(database_url: str, poolclass) -> dict:
+    """
+    Build connection pool arguments from the pool settings.
+
+    In-memory SQLite databases keep SQLAlchemy's default single-connection
+    pool, since a queue pool would give every connection its own database.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {"pool_pre_ping": settings.db_pool_pre_ping}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": settings.db_pool_pre_ping,  # Verify connections before use
+    }
+
+
+# Create SQLAlchemy engine (sync, used by scripts and maintenance tools)
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,  # Verify connections before use
-    echo=settings.debug  # Log SQL queries in debug mode
+    echo=settings.debug,  # Log SQL queries in debug mode
+    **get_pool_options(settings.database_url, TimedQueuePool)
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async SQLAlchemy engine (used by the FastAPI routers)
+async_database_url = settings.async_database_url or get_async_database_url(settings.database_url)
+async_engine = create_async_engine(
+    async_database_url,
+    echo=settings.debug,
+    **get_pool_options(async_database_url, TimedAsyncAdaptedQueuePool)
+)
+
+# Create async engine for the optional read replica
+replica_async_engine = None
+if settings.read_replica_url:
+    replica_async_database_url = get_async_database_url(settings.read_replica_url)
+    replica_async_engine = create_async_engine(
+        replica_async_database_url,
+        echo=settings.debug,
+        **get_pool_options(replica_async_database_url, TimedAsyncAdaptedQueuePool)
+    )
+
+# Record slow statements; plans are captured through the sync engine
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    max_entries=settings.slow_query_log_size,
+    explain=settings.slow_query_explain
+)
+slow_query_log.explain_engine = engine
+
+# Count statements and database time per request (see app.core.instrumentation)
+for _engine in (engine, async_engine.sync_engine, replica_async_engine and replica_async_engine.sync_engine):
+    if _engine is not None:
+        instrument_engine(_engine)
+        slow_query_log.attach(_engine)
+
+replica_monitor = ReplicaMonitor(
+    replica_async_engine,
+    max_lag=settings.replica_max_lag_seconds,
+    check_interval=settings.replica_check_interval_seconds
+)
+RoutingSession.replica_bind = replica_async_engine.sync_engine if replica_async_engine else None
+RoutingSession.replica_monitor = replica_monitor
+
+# Create async session factory. Objects stay loaded after commit so that
+# handlers can return them without triggering implicit IO.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -25,7 +123,7 @@ Base = declarative_base()
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency that provides database session.
-    
+
     Yields:
         Session: SQLAlchemy database session
     """
@@ -36,6 +134,37 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides an async database session.
+
+    Queries are awaited, so the event loop keeps serving other requests
+    while this one waits for the database.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides an async session for read-only handlers.
+
+    SELECTs go to the read replica when one is configured, reachable and
+    not lagging; otherwise, and after any write in the session, the
+    session uses the primary. A read that fails on an unreachable replica
+    is retried on the primary and the replica is taken out of rotation.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with AsyncSessionLocal() as db:
+        db.info["use_replica"] = await replica_monitor.is_usable()
+        yield db
+
+
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
@@ -10,7 +10,11 @@ from fastapi.responses import FileResponse
 import os
 
 from app.config import settings
+from app.core.cache import read_cache
 from app.core.exceptions import add_exception_handlers
+from app.core.instrumentation import SQLInstrumentationMiddleware
+from app.core.pool_metrics import pool_status
+from app.database import async_engine, engine, replica_async_engine, replica_monitor, slow_query_log
 from app.routers import customers
 
 # Create FastAPI application
@@ -29,8 +33,12 @@ app.add_middleware(
     allow_credentials=settings.cors_credentials,
     allow_methods=settings.cors_methods,
     allow_headers=settings.cors_headers,
+    expose_headers=settings.cors_expose_headers,
 )
 
+# Add per-request SQL statistics (X-DB-Queries, Server-Timing) and N+1 warnings
+app.add_middleware(SQLInstrumentationMiddleware, n_plus_one_threshold=settings.n_plus_one_threshold)
+
 # Add exception handlers
 add_exception_handlers(app)
 
@@ -53,6 +61,10 @@ app.include_router(tank_groups.router)
 from app.routers import tanks
 app.include_router(tanks.router)
 
+# Import and add batch router
+from app.routers import batch
+app.include_router(batch.router)
+
 # app.include_router(devices.router, prefix=settings.api_v1_str, tags=["devices"])
 # app.include_router(functions.router, prefix=settings.api_v1_str, tags=["functions"])
 
@@ -81,6 +93,35 @@ def health_check():
     }
 
 
+@app.get("/health/db-pool")
+def db_pool_status():
+    """Connection pool metrics: checked-out, idle and overflow connections, checkout wait times and replica state"""
+    status = {
+        "async_engine": pool_status(async_engine.pool),
+        "sync_engine": pool_status(engine.pool),
+        "replica": replica_monitor.status(),
+    }
+    if replica_async_engine is not None:
+        status["replica"]["pool"] = pool_status(replica_async_engine.pool)
+    return status
+
+
+@app.get("/health/read-cache")
+def read_cache_status():
+    """In-process read cache: size, evictions and hit/miss counters per endpoint"""
+    return read_cache.stats()
+
+
+if settings.debug:
+    @app.get("/debug/slow-queries")
+    def slow_queries():
+        """Slow statements with parameters, route and EXPLAIN plan (debug mode only)"""
+        return {
+            "threshold_ms": settings.slow_query_threshold_ms,
+            "queries": slow_query_log.entries(),
+        }
+
+
 @app.get("/ping")
 def ping():
     """Simple ping endpoint for connectivity testing"""
@@ -1,6 +1,7 @@
 # SQLAlchemy Database Models
 from .customer import Customer
 from .plant import Plant  
+from .plant_active_revision import PlantActiveRevision
 from .line import Line
 
-__all__ = ["Customer", "Plant", "Line"]
+__all__ = ["Customer", "Plant", "PlantActiveRevision", "Line"]
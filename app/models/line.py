@@ -11,7 +11,7 @@ class Line(Base):
     __tablename__ = "line"
     
     id = Column(Integer, primary_key=True, index=True)
-    plant_id = Column(Integer, ForeignKey("plant.id"), nullable=False)
+    plant_id = Column(Integer, ForeignKey("plant.id", ondelete="CASCADE"), nullable=False)
     number = Column(Integer, nullable=False)
     min_x = Column(Integer, nullable=True)
     max_x = Column(Integer, nullable=True)
@@ -5,7 +5,7 @@ SQLAlchemy model for plant table representing customer facilities/plants.
 Each plant belongs to one customer, but a customer can have multiple plants.
 Supports revision control system for configuration management.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -23,6 +23,15 @@ class Plant(Base):
     - Supports revision hierarchy (self-referencing)
     """
     __tablename__ = "plant"
+    __table_args__ = (
+        # Only one active revision per plant (customer + name)
+        Index(
+            "uq_plant_one_active_revision", "customer_id", "name",
+            unique=True,
+            postgresql_where=text("is_active_revision"),
+            sqlite_where=text("is_active_revision")
+        ),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -50,9 +59,10 @@ class Plant(Base):
     
     # Relationships
     customer = relationship("Customer", back_populates="plants")
-    lines = relationship("Line", back_populates="plant")
-    tank_groups = relationship("TankGroup", back_populates="plant")
-    tanks = relationship("Tank", back_populates="plant")
+    # Child rows are removed by ON DELETE CASCADE in the database
+    lines = relationship("Line", back_populates="plant", passive_deletes=True)
+    tank_groups = relationship("TankGroup", back_populates="plant", passive_deletes=True)
+    tanks = relationship("Tank", back_populates="plant", passive_deletes=True)
     
     # Self-referencing relationship for revision hierarchy
     base_revision = relationship("Plant", remote_side=[id], backref="derived_revisions")
@@ -0,0 +1,25 @@
+"""
+Plant Active Revision Database Model
+
+Denormalized pointer from a plant identity (customer_id + name) to its
+active revision. Kept in sync with plant.is_active_revision in the same
+transaction by plant creation, revision activation and plant renames, so
+resolving the active revision is a primary key lookup.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.models.customer import Base
+
+
+class PlantActiveRevision(Base):
+    """Active revision pointer for one plant (customer + name)"""
+    __tablename__ = "plant_active_revision"
+
+    customer_id = Column(Integer, ForeignKey("customer.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
+    plant_id = Column(Integer, ForeignKey("plant.id", ondelete="CASCADE"), nullable=False, unique=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<PlantActiveRevision(customer_id={self.customer_id}, name='{self.name}', plant_id={self.plant_id})>"
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import plant_tag, read_cache
+from app.database import get_async_db, get_async_read_db
+from app.schemas.batch import BatchRequest, BatchResult, DeleteCheckRequest, DeleteCheckResult
+from app.services.batch import BatchService
+from app.services.deletability import DeletabilityService
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+@router.post("/", response_model=BatchResult)
+async def apply_batch(batch: BatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Apply create, update and delete operations on tanks and tank groups in one transaction.
+
+    Tanks can refer to tank groups created in the same batch with
+    tank_group_temp_id. Number uniqueness is checked on the result of the
+    whole batch. Either every operation is applied or none is.
+    """
+    service = BatchService(db)
+    try:
+        result = await service.apply(batch.operations)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch violates database constraints (check plant, line and tank group IDs)"
+        )
+
+    read_cache.invalidate(*[plant_tag(plant_id) for plant_id in service.plant_ids])
+    return result
+
+@router.post("/can-delete", response_model=DeleteCheckResult)
+async def can_delete_batch(request: DeleteCheckRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Check whether many customers, plants, lines, tank groups and tanks can be deleted.
+
+    Uses the rules of the single-row can-delete endpoints and reports child
+    counts. Costs one query per entity type that has ids; unknown ids are
+    reported with exists=false.
+    """
+    return await DeletabilityService(db).check(
+        request.customer_ids, request.plant_ids, request.line_ids, request.tank_group_ids, request.tank_ids
+    )
@@ -1,39 +1,63 @@
 """Customer API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ..database import get_db
+from ..core.cache import CUSTOMERS_TAG, PLANTS_TAG, cached_read, customer_tag, plant_tag, read_cache
+from ..database import get_async_db, get_async_read_db
 from ..models.customer import Customer
+from ..models.plant import Plant
 from ..schemas.customer import CustomerCreate, CustomerUpdate, CustomerOut
+from ..services.search import SearchService
+from ..utils.etag import conditional_get
+from ..utils.pagination import finish_page, keyset_paginate
 
 router = APIRouter()
 
 
 @router.get("/customers", response_model=List[CustomerOut])
-def get_customers(
-    skip: int = 0,
-    limit: int = 100,
+async def get_customers(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     search: Optional[str] = Query(None, description="Search customers by name, town, or country"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get all customers with pagination and optional search."""
-    query = db.query(Customer)
-    
+    """
+    Get customers ordered by name with cursor pagination.
+
+    With `search`, returns up to `limit` customers ranked by fuzzy name match
+    (typo tolerant) instead of a paginated list.
+    """
+    query = select(Customer)
+
     if search:
-        search_term = f"%{search}%"
+        not_modified = await conditional_get(db, request, response, (Customer,))
+        if not_modified:
+            return not_modified
         # Search only in customer name for more intuitive results
-        query = query.filter(Customer.name.ilike(search_term))
-    
-    customers = query.offset(skip).limit(limit).all()
-    return customers
+        rows = await SearchService(db).search(query, Customer.name, search, limit)
+        return [row[0] for row in rows]
+
+    async def load():
+        page = keyset_paginate(query, [Customer.name, Customer.id], cursor, limit)
+        customers = (await db.execute(page)).scalars().all()
+        customers = finish_page(customers, limit, lambda c: (c.name, c.id), response)
+        return [CustomerOut.model_validate(customer) for customer in customers], [CUSTOMERS_TAG]
+
+    return await cached_read(
+        ("customers", cursor, limit), request, response,
+        lambda: conditional_get(db, request, response, (Customer,)),
+        load
+    )
 
 
 @router.post("/customers", response_model=CustomerOut)
-def create_customer(
+async def create_customer(
     customer: CustomerCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new customer."""
     new_customer = Customer(
@@ -42,31 +66,41 @@ def create_customer(
         country=customer.country
     )
     db.add(new_customer)
-    db.commit()
-    db.refresh(new_customer)
+    await db.commit()
+    read_cache.invalidate(CUSTOMERS_TAG)
+    await db.refresh(new_customer)
     return new_customer
 
 
 @router.get("/customers/{customer_id}", response_model=CustomerOut)
-def get_customer(customer_id: int, db: Session = Depends(get_db)):
+async def get_customer(
+    customer_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Get a customer by ID."""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    not_modified = await conditional_get(db, request, response, (Customer, Customer.id == customer_id))
+    if not_modified:
+        return not_modified
+
+    customer = await db.get(Customer, customer_id)
     if customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
 
 
 @router.put("/customers/{customer_id}", response_model=CustomerOut)
-def update_customer(
+async def update_customer(
     customer_id: int,
     customer_update: CustomerUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing customer."""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    
+
     # Update only provided fields
     if customer_update.name is not None:
         customer.name = customer_update.name
@@ -74,22 +108,29 @@ def update_customer(
         customer.town = customer_update.town
     if customer_update.country is not None:
         customer.country = customer_update.country
-    
-    db.commit()
-    db.refresh(customer)
+
+    await db.commit()
+    read_cache.invalidate(CUSTOMERS_TAG)
+    await db.refresh(customer)
     return customer
 
 
 @router.delete("/customers/{customer_id}")
-def delete_customer(
+async def delete_customer(
     customer_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a customer."""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    
-    db.delete(customer)
-    db.commit()
+
+    # Plants (and their lines, tank groups and tanks) are deleted with the customer
+    plant_ids = (await db.execute(select(Plant.id).where(Plant.customer_id == customer_id))).scalars().all()
+
+    await db.delete(customer)
+    await db.commit()
+    read_cache.invalidate(
+        CUSTOMERS_TAG, PLANTS_TAG, customer_tag(customer_id), *[plant_tag(plant_id) for plant_id in plant_ids]
+    )
     return {"message": "Customer deleted successfully"}
@@ -1,147 +1,205 @@
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
-from typing import List
+from typing import List, Optional
 from typing import List as _List
-from ..database import get_db
+from ..core.cache import cached_read, plant_tag, read_cache
+from ..database import get_async_db, get_async_read_db
 from ..models.line import Line
 from ..models.tank import Tank
-from ..schemas.line import LineCreate, LineUpdate, LineOut
+from ..models.tank_group import TankGroup
+from ..schemas.line import (
+    LineCreate, LineUpdate, LineOut, LineWithTanks, LineNumberingRequest, LineNumbering,
+    LineLayoutRequest, LineLayout
+)
 from ..schemas.tank import TankResponse
+from ..services.layout import LayoutService
+from ..services.line_tanks import LineTanksService
+from ..services.numbering import NumberingService
+from ..utils.etag import conditional_get
+from ..utils.pagination import finish_page, keyset_paginate
 
 router = APIRouter()
 
 @router.get("/plants/{plant_id}/lines", response_model=List[LineOut])
-def get_plant_lines(plant_id: int, db: Session = Depends(get_db)):
-    """Get all lines for a specific plant."""
-    lines = db.query(Line).filter(Line.plant_id == plant_id).order_by(Line.number).all()
-    return lines
+async def get_plant_lines(
+    plant_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(1000, ge=1, le=1000, description="Maximum number of records to return"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get lines of a specific plant ordered by line number, with cursor pagination."""
+    async def load():
+        query = keyset_paginate(select(Line).where(Line.plant_id == plant_id), [Line.number, Line.id], cursor, limit)
+        lines = (await db.execute(query)).scalars().all()
+        page = finish_page(lines, limit, lambda line: (line.number, line.id), response)
+        return [LineOut.model_validate(line) for line in page], [plant_tag(plant_id)]
+
+    return await cached_read(
+        ("plant_lines", plant_id, cursor, limit), request, response,
+        lambda: conditional_get(db, request, response, (Line, Line.plant_id == plant_id)),
+        load
+    )
 
 @router.get("/lines/{line_id}/tanks", response_model=_List[TankResponse])
-def get_line_tanks(line_id: int, db: Session = Depends(get_db)):
-    """Get all tanks for a specific line."""
-    from ..models.tank_group import TankGroup
-    from ..models.line import Line
-    # Hae linjan tank_groupit
-    tank_groups = db.query(TankGroup).filter(TankGroup.line_id == line_id).all()
-    tank_group_ids = [tg.id for tg in tank_groups]
-    # Hae linjan plant_id
-    line = db.query(Line).filter(Line.id == line_id).first()
-    if not line:
-        return []
-    # Palauta tankit, jotka kuuluvat linjan tank_groupiin TAI joilla ei ole tank_groupia mutta plant_id täsmää
-    tanks = db.query(Tank).filter(
-        (Tank.tank_group_id.in_(tank_group_ids)) |
-        ((Tank.tank_group_id == None) & (Tank.plant_id == line.plant_id))
-    ).order_by(Tank.number).all()
-    return tanks
+async def get_line_tanks(
+    line_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get all tanks for a specific line: the tanks of its tank groups and the
+    plant's ungrouped tanks, ordered by number. Served from cache between writes.
+    """
+    line_plant_id = select(Line.plant_id).where(Line.id == line_id).scalar_subquery()
+
+    async def load():
+        tanks, plant_id = await LineTanksService(db).get_tanks(line_id)
+        return tanks, None if plant_id is None else [plant_tag(plant_id)]
+
+    return await cached_read(
+        ("line_tanks", line_id), request, response,
+        lambda: conditional_get(
+            db, request, response,
+            (Line, Line.id == line_id),
+            (TankGroup, TankGroup.plant_id == line_plant_id),
+            (Tank, Tank.plant_id == line_plant_id)
+        ),
+        load
+    )
 """Line API endpoints."""
 
 
-@router.post("/lines", response_model=LineOut)
-def create_line(
+@router.post("/lines", response_model=LineWithTanks)
+async def create_line(
     line: LineCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Create a new line."""
+    """Create a new line and its tanks; returns the line with the created tanks."""
     # Validate line_number is multiple of 100
     if line.number <= 0 or line.number % 100 != 0:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Line number must be a positive multiple of 100 (e.g., 100, 200, 300)"
         )
-    
+
     # Check if line number already exists for this plant
-    existing_line = db.query(Line).filter(
+    existing_line = (await db.execute(select(Line).where(
         Line.plant_id == line.plant_id,
         Line.number == line.number
-    ).first()
-    
+    ).limit(1))).scalars().first()
+
     if existing_line:
         raise HTTPException(
             status_code=400,
             detail=f"Line {line.number} already exists for this plant"
         )
-    
+
+    # Without given y bounds the line's y band is the row of tanks created
+    # here, so numbering and reflow know which ungrouped tanks are its own.
+    min_y, max_y = line.min_y, line.max_y
+    if min_y is None and max_y is None and line.count:
+        min_y, max_y = line.y_position, line.y_position + line.length
+
     new_line = Line(
         plant_id=line.plant_id,
         number=line.number,
         min_x=line.min_x,
         max_x=line.max_x,
-        min_y=line.min_y,
-        max_y=line.max_y
+        min_y=min_y,
+        max_y=max_y
     )
     db.add(new_line)
-    db.commit()
-    db.refresh(new_line)
-
-    # Do not create tank group or assign number to tank/tank_group
-    x_pos = line.x_position
-    for i in range(line.count):
-        tank = Tank(
-            name="no name",
-            number=None,
-            tank_group_id=None,
-            plant_id=line.plant_id,
-            width=line.width,
-            length=line.length,
-            depth=line.depth,
-            x_position=x_pos,
-            y_position=line.y_position,
-            z_position=line.z_position,
-            space=line.gap
+    await db.flush()
+
+    # Do not create tank group or assign number to tank/tank_group.
+    # All tanks are inserted with one batched INSERT in the same transaction.
+    step = line.width + line.gap
+    tank_rows = [
+        {
+            "name": "no name",
+            "number": None,
+            "tank_group_id": None,
+            "plant_id": line.plant_id,
+            "width": line.width,
+            "length": line.length,
+            "depth": line.depth,
+            "x_position": line.x_position + i * step,
+            "y_position": line.y_position,
+            "z_position": line.z_position,
+            "space": line.gap
+        }
+        for i in range(line.count)
+    ]
+    tanks = []
+    if tank_rows:
+        tanks = sorted(
+            (await db.execute(insert(Tank).returning(Tank), tank_rows)).scalars().all(),
+            key=lambda tank: tank.x_position
         )
-        db.add(tank)
-        x_pos += line.width + line.gap
-    db.commit()
-    return new_line
+
+    await db.commit()
+    read_cache.invalidate(plant_tag(new_line.plant_id))
+    return LineWithTanks(
+        **LineOut.model_validate(new_line).model_dump(),
+        tanks=[TankResponse.model_validate(tank) for tank in tanks]
+    )
 
 
 @router.get("/lines/{line_id}", response_model=LineOut)
-def get_line(
+async def get_line(
     line_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get a specific line by ID."""
-    line = db.query(Line).filter(Line.id == line_id).first()
+    not_modified = await conditional_get(db, request, response, (Line, Line.id == line_id))
+    if not_modified:
+        return not_modified
+
+    line = await db.get(Line, line_id)
     if not line:
         raise HTTPException(status_code=404, detail="Line not found")
     return line
 
 
 @router.put("/lines/{line_id}", response_model=LineOut)
-def update_line(
+async def update_line(
     line_id: int,
     line_update: LineUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing line."""
-    line = db.query(Line).filter(Line.id == line_id).first()
+    line = await db.get(Line, line_id)
     if not line:
         raise HTTPException(status_code=404, detail="Line not found")
-    
+
     # Validate line_number is multiple of 100
     if line_update.number <= 0 or line_update.number % 100 != 0:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Line number must be a positive multiple of 100 (e.g., 100, 200, 300)"
         )
-    
+
     # Check if new line number conflicts with existing lines (excluding current line)
     if line_update.number != line.number:
-        existing_line = db.query(Line).filter(
+        existing_line = (await db.execute(select(Line).where(
             Line.plant_id == line.plant_id,
             Line.number == line_update.number,
             Line.id != line_id
-        ).first()
-        
+        ).limit(1))).scalars().first()
+
         if existing_line:
             raise HTTPException(
                 status_code=400,
                 detail=f"Line {line_update.number} already exists for this plant"
             )
-    
+
     # Update fields
     line.number = line_update.number
     line.min_x = line_update.min_x
@@ -149,40 +207,103 @@ def update_line(
     line.min_y = line_update.min_y
     line.max_y = line_update.max_y
     line.updated_at = func.now()
-    
-    db.commit()
-    db.refresh(line)
+
+    await db.commit()
+    read_cache.invalidate(plant_tag(line.plant_id))
+    await db.refresh(line)
     return line
 
 
 @router.delete("/lines/{line_id}")
-def delete_line(
+async def delete_line(
     line_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a line."""
-    line = db.query(Line).filter(Line.id == line_id).first()
+    line = await db.get(Line, line_id)
     if not line:
         raise HTTPException(status_code=404, detail="Line not found")
-    
-    db.delete(line)
-    db.commit()
+
+    await db.delete(line)
+    await db.commit()
+    read_cache.invalidate(plant_tag(line.plant_id))
     return {"message": f"Line {line.number} deleted successfully"}
 
 
+@router.post("/lines/{line_id}/numbering", response_model=LineNumbering)
+async def number_line(
+    line_id: int,
+    request: LineNumberingRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Number the tanks of a line from a start number (default: line number + 1)
+    in x_position order. Each tank group gets the number and name of its
+    lowest-numbered tank. With dry_run, returns the changes without saving.
+    """
+    line = await db.get(Line, line_id)
+    if not line:
+        raise HTTPException(status_code=404, detail="Line not found")
+
+    service = NumberingService(db)
+    plan = await service.plan(line, request.start_number)
+    if not request.dry_run:
+        await service.apply(plan)
+        await db.commit()
+        read_cache.invalidate(plant_tag(line.plant_id))
+
+    return LineNumbering(**plan, dry_run=request.dry_run)
+
+
+@router.post("/lines/{line_id}/layout", response_model=LineLayout)
+async def reflow_line(
+    line_id: int,
+    request: LineLayoutRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Pack the tanks of a line along x: each tank starts where the previous one
+    ends plus its space. Tank groups stay together and anchored tanks keep
+    their x. Recomputes the line bounds. With dry_run, returns the changes
+    without saving.
+    """
+    line = await db.get(Line, line_id)
+    if not line:
+        raise HTTPException(status_code=404, detail="Line not found")
+
+    service = LayoutService(db)
+    plan = await service.plan_reflow(line, request.start_x, request.anchor_tank_ids)
+    if plan["unknown_anchor_ids"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Anchor tanks are not on this line: {', '.join(map(str, plan['unknown_anchor_ids']))}"
+        )
+    if plan["overlapping_anchor_ids"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Packed tanks overlap anchored tanks: {', '.join(map(str, plan['overlapping_anchor_ids']))}"
+        )
+
+    if not request.dry_run:
+        await service.apply_reflow(line, plan)
+        await db.commit()
+        read_cache.invalidate(plant_tag(line.plant_id))
+
+    return LineLayout(**plan, dry_run=request.dry_run)
+
+
 @router.get("/plants/{plant_id}/lines/next-number")
-def get_next_line_number(
+async def get_next_line_number(
     plant_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get the next available line number for a plant."""
     # Get all existing line numbers for this plant
-    existing_numbers = db.query(Line.number).filter(Line.plant_id == plant_id).all()
-    existing_numbers = [num[0] for num in existing_numbers]
-    
+    existing_numbers = (await db.execute(select(Line.number).where(Line.plant_id == plant_id))).scalars().all()
+
     # Find next available number starting from 100
     next_number = 100
     while next_number in existing_numbers:
         next_number += 100
-    
+
     return {"next_number": next_number}
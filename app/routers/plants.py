@@ -6,100 +6,161 @@ Sisältää CRUD-operaatiot asiakkaiden laitoksille.
 Sisältää revisionhallinnan laitoskonfiguraatioille.
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
-
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, desc, func, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import CUSTOMERS_TAG, PLANTS_TAG, cached_read, customer_tag, plant_tag, read_cache
+from app.database import get_async_db, get_async_read_db
+from app.models.line import Line
 from app.models.plant import Plant
+from app.models.plant_active_revision import PlantActiveRevision
+from app.models.tank import Tank
+from app.models.tank_group import TankGroup
 from app.models.customer import Customer
 from app.schemas.plant import (
     PlantCreate, PlantUpdate, PlantOut, PlantWithCustomer,
-    RevisionCreate, RevisionActivate, PlantRevisionSummary
+    RevisionCreate, RevisionActivate, PlantRevisionSummary, RevisionDiff, PlantTree
 )
+from app.schemas.tank import LayoutValidation
+from app.schemas.tank_group import TankGroupWithTanks
+from app.services.active_revision import ActiveRevisionService
+from app.services.layout import LayoutService
+from app.services.plant_snapshot import PlantSnapshotService, stream_snapshot
+from app.services.plant_tree import MAX_DEPTH as TREE_MAX_DEPTH, PlantTreeService
+from app.services.revision_activation import RevisionActivationService
+from app.services.revision_copy import RevisionCopyService
+from app.services.revision_diff import RevisionDiffService
+from app.services.search import SearchService
+from app.utils.etag import conditional_get
+from app.utils.pagination import finish_page, keyset_paginate
+from app.utils.snapshot import MEDIA_TYPE as SNAPSHOT_MEDIA_TYPE, SnapshotReader, compression_available
 
 router = APIRouter()
 
 
+def invalidate_plant_lists(customer_id: int, *tags: str) -> None:
+    """
+    Tyhjennä asiakkaan laitoslistat ja aktiivisten revisioiden osoittimet
+    (sekä muut annetut tagit) lukuvälimuistista commitin jälkeen
+    """
+    read_cache.invalidate(PLANTS_TAG, customer_tag(customer_id), *tags)
+
+
 @router.get("/plants", response_model=List[PlantWithCustomer])
-def get_plants(
+async def get_plants(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Edellisen sivun X-Next-Cursor-otsakkeen arvo"),
+    limit: int = Query(1000, ge=1, le=1000, description="Palautettavien rivien enimmäismäärä"),
     customer_id: Optional[int] = Query(None, description="Suodata asiakas-ID:n mukaan"),
     search: Optional[str] = Query(None, description="Hae laitoksia nimen perusteella"),
     active_only: bool = Query(True, description="Näytä vain aktiiviset revisiot"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Hae kaikki laitokset tai suodata asiakas-ID:n tai hakutermin perusteella"""
-    query = db.query(Plant, Customer.name.label("customer_name")).join(Customer)
-    
+    """Hae laitokset nimen mukaan järjestettynä (kursorisivutus), suodatus asiakas-ID:n tai hakutermin perusteella"""
+    # Aktiivisen revision vaihto päivittää myös laitosrivien updated_at-arvot
     if customer_id:
-        query = query.filter(Plant.customer_id == customer_id)
-    
-    if search:
-        query = query.filter(Plant.name.ilike(f"%{search}%"))
-    
-    # Suodata vain aktiiviset revisiot, jos pyydetty
+        scopes = [(Plant, Plant.customer_id == customer_id), (Customer, Customer.id == customer_id)]
+    else:
+        scopes = [(Plant,), (Customer,)]
+
+    query = select(Plant, Customer.name.label("customer_name")).join(Customer)
+
+    if customer_id:
+        query = query.where(Plant.customer_id == customer_id)
+
+    # Suodata vain aktiiviset revisiot, jos pyydetty (aktiivisen revision osoitintaulun kautta)
     if active_only:
-        query = query.filter(Plant.is_active_revision == True)
-    
-    results = query.all()
-    
-    laitokset = []
-    for plant, customer_name in results:
-        laitos_dict = {
-            "id": plant.id,
-            "customer_id": plant.customer_id,
-            "name": plant.name,
-            "town": plant.town,
-            "country": plant.country,
-            "created_at": plant.created_at,
-            "updated_at": plant.updated_at,
-            "customer_name": customer_name
-        }
-        laitokset.append(PlantWithCustomer(**laitos_dict))
-    
-    return laitokset
+        query = query.join(PlantActiveRevision, PlantActiveRevision.plant_id == Plant.id)
+
+    def to_schema(results):
+        laitokset = []
+        for plant, customer_name in results:
+            # Revisiokentät mukaan, jotta PlantWithCustomer-validointi onnistuu
+            laitos_dict = PlantOut.model_validate(plant).model_dump()
+            laitos_dict["customer_name"] = customer_name
+            laitokset.append(PlantWithCustomer(**laitos_dict))
+        return laitokset
+
+    if search:
+        not_modified = await conditional_get(db, request, response, *scopes)
+        if not_modified:
+            return not_modified
+        # Hakutulokset osuvuusjärjestyksessä (sumea haku), ei sivutusta eikä välimuistia
+        return to_schema(await SearchService(db).search(query, Plant.name, search, limit))
+
+    async def load():
+        page = keyset_paginate(query, [Plant.name, Plant.id], cursor, limit)
+        results = finish_page((await db.execute(page)).all(), limit, lambda row: (row[0].name, row[0].id), response)
+        # Asiakkaan nimi on osa riviä, joten asiakasmuutokset tyhjentävät myös laitoslistat
+        return to_schema(results), [PLANTS_TAG, CUSTOMERS_TAG]
+
+    return await cached_read(
+        ("plants", customer_id, active_only, cursor, limit), request, response,
+        lambda: conditional_get(db, request, response, *scopes),
+        load
+    )
 
 
 @router.get("/plants/{plant_id}", response_model=PlantOut)
-def get_plant(plant_id: int, db: Session = Depends(get_db)):
+async def get_plant(
+    plant_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Hae tietty laitos ID:llä"""
-    plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    not_modified = await conditional_get(db, request, response, (Plant, Plant.id == plant_id))
+    if not_modified:
+        return not_modified
+
+    plant = await db.get(Plant, plant_id)
     if not plant:
         raise HTTPException(status_code=404, detail="Plant not found")
     return plant
 
 
 @router.post("/plants", response_model=PlantOut)
-def create_plant(plant: PlantCreate, db: Session = Depends(get_db)):
+async def create_plant(plant: PlantCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Luo uusi laitos (luo automaattisesti ensimmäisen revision).
 
     HUOM! Vain yksi laitosrevisio voi olla kerrallaan tilassa 'ACTIVE' per asiakas.
     Kaikki saman asiakkaan (customer_id) kaikkien laitosten (name) kaikkien revisioiden (revision) rivit,
     jotka ovat tilassa 'ACTIVE', muutetaan 'DRAFT'-tilaan ennen uuden luontia. Vain uusi jää 'ACTIVE'-tilaan.
+    Saman asiakkaan samanaikaiset luonnit odottavat toisiaan asiakasrivin lukossa.
     """
     try:
-        # Varmista, että asiakas on olemassa
-        customer = db.query(Customer).filter(Customer.id == plant.customer_id).first()
+        # Varmista, että asiakas on olemassa. Asiakasrivi lukitaan (FOR UPDATE),
+        # jotta saman asiakkaan samanaikaiset luonnit sarjallistuvat: seuraava
+        # revision-numero (max + 1) luetaan vasta, kun edellinen luonti on valmis.
+        customer = await db.get(Customer, plant.customer_id, with_for_update=True)
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
 
         # Päivitä kaikki asiakkaan kaikkien laitosten kaikki revisiot, jotka ovat tilassa 'ACTIVE', DRAFT-tilaan
-        muut_laitokset = db.query(Plant).filter(
-            Plant.customer_id == plant.customer_id,
-            Plant.revision_status == "ACTIVE"
-        ).all()
-        for op in muut_laitokset:
-            op.is_active_revision = False
-            op.revision_status = "DRAFT"
-        db.commit()
+        # (yksi joukkopäivitys, sama transaktio kuin uuden revision lisäys)
+        await db.execute(
+            update(Plant).where(
+                Plant.customer_id == plant.customer_id,
+                Plant.revision_status == "ACTIVE"
+            ).values(is_active_revision=False, revision_status="DRAFT", updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(delete(PlantActiveRevision).where(PlantActiveRevision.customer_id == plant.customer_id))
 
         # Selvitä seuraava revision-numero
-        max_revision = db.query(Plant.revision).filter(
-            Plant.customer_id == plant.customer_id,
-            Plant.name == plant.name
-        ).order_by(Plant.revision.desc()).first()
-        seuraava_revision = (max_revision[0] + 1) if max_revision else 1
+        max_revision = (await db.execute(
+            select(func.max(Plant.revision)).where(
+                Plant.customer_id == plant.customer_id,
+                Plant.name == plant.name
+            )
+        )).scalar()
+        seuraava_revision = (max_revision or 0) + 1
 
         # Luo uusi ACTIVE-revisio
         plant_data = plant.dict()
@@ -113,16 +174,18 @@ def create_plant(plant: PlantCreate, db: Session = Depends(get_db)):
 
         db_laitos = Plant(**plant_data)
         db.add(db_laitos)
-        db.commit()
-        db.refresh(db_laitos)
+        await db.flush()
+        db.add(PlantActiveRevision(customer_id=db_laitos.customer_id, name=db_laitos.name, plant_id=db_laitos.id))
 
         # Päivitä asiakkaan updated_at aikaleima
-        customer.updated_at = db_laitos.created_at
-        db.commit()
+        customer.updated_at = func.now()
+        await db.commit()
+        invalidate_plant_lists(plant.customer_id)
+        await db.refresh(db_laitos)
 
         return db_laitos
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         from sqlalchemy.exc import IntegrityError
         import logging
         logger = logging.getLogger("uvicorn.error")
@@ -134,93 +197,119 @@ def create_plant(plant: PlantCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/plants/{plant_id}", response_model=PlantOut)
-def update_plant(plant_id: int, plant: PlantUpdate, db: Session = Depends(get_db)):
+async def update_plant(plant_id: int, plant: PlantUpdate, db: AsyncSession = Depends(get_async_db)):
     """Päivitä olemassa oleva laitos"""
-    db_plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    db_plant = await db.get(Plant, plant_id)
     if not db_plant:
         raise HTTPException(status_code=404, detail="Plant not found")
-    
-    # If customer_id is being changed, verify new customer exists
-    if plant.customer_id and plant.customer_id != db_plant.customer_id:
-        customer = db.query(Customer).filter(Customer.id == plant.customer_id).first()
-        if not customer:
-            raise HTTPException(status_code=404, detail="Customer not found")
-    
+
     # Check for duplicate plant name within customer
     if plant.name and plant.name != db_plant.name:
-        customer_id = plant.customer_id or db_plant.customer_id
-        existing_plant = db.query(Plant).filter(
-            and_(
-                Plant.customer_id == customer_id,
-                Plant.name == plant.name,
-                Plant.id != plant_id
-            )
-        ).first()
+        existing_plant = (await db.execute(
+            select(Plant).where(
+                and_(
+                    Plant.customer_id == db_plant.customer_id,
+                    Plant.name == plant.name,
+                    Plant.id != plant_id
+                )
+            ).limit(1)
+        )).scalars().first()
         if existing_plant:
             raise HTTPException(
                 status_code=400,
                 detail=f"Plant '{plant.name}' already exists for this customer"
             )
-    
+
     # Update plant fields
+    old_name = db_plant.name
     update_data = plant.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_plant, field, value)
-    
-    db.commit()
-    db.refresh(db_plant)
-    
+
+    # Aktiivisen revision osoitin seuraa nimen muutosta
+    if db_plant.name != old_name and db_plant.is_active_revision:
+        await db.execute(
+            update(PlantActiveRevision).where(PlantActiveRevision.plant_id == plant_id)
+            .values(name=db_plant.name, updated_at=func.now())
+        )
+
+    await db.commit()
+    invalidate_plant_lists(db_plant.customer_id)
+    await db.refresh(db_plant)
+
     # Update customer's updated_at timestamp
-    customer = db.query(Customer).filter(Customer.id == db_plant.customer_id).first()
+    customer = await db.get(Customer, db_plant.customer_id)
     if customer:
         customer.updated_at = db_plant.updated_at
-        db.commit()
-    
+        await db.commit()
+
     return db_plant
 
 
 @router.delete("/plants/{plant_id}")
-def delete_plant(plant_id: int, db: Session = Depends(get_db)):
+async def delete_plant(plant_id: int, db: AsyncSession = Depends(get_async_db)):
     """Poista laitos"""
-    db_plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    db_plant = await db.get(Plant, plant_id)
     if not db_plant:
         raise HTTPException(status_code=404, detail="Plant not found")
-    
+
     customer_id = db_plant.customer_id
-    db.delete(db_plant)
-    db.commit()
-    
+    await db.delete(db_plant)
+    await db.commit()
+    invalidate_plant_lists(customer_id, plant_tag(plant_id))
+
     # Update customer's updated_at timestamp
-    from sqlalchemy import func
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if customer:
         customer.updated_at = func.now()
-        db.commit()
-    
+        await db.commit()
+
     return {"message": f"Plant '{db_plant.name}' deleted successfully"}
 
 
 @router.get("/customers/{customer_id}/plants", response_model=List[PlantOut])
-def get_customer_plants(customer_id: int, db: Session = Depends(get_db)):
-    """Hae kaikki laitokset tietylle asiakkaalle"""
-    # Verify customer exists
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
-    
-    plants = db.query(Plant).filter(Plant.customer_id == customer_id).all()
-    return plants
+async def get_customer_plants(
+    customer_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Edellisen sivun X-Next-Cursor-otsakkeen arvo"),
+    limit: int = Query(1000, ge=1, le=1000, description="Palautettavien rivien enimmäismäärä"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Hae asiakkaan laitokset nimen mukaan järjestettynä (kursorisivutus)"""
+    async def load():
+        # Verify customer exists
+        customer = await db.get(Customer, customer_id)
+        if not customer:
+            raise HTTPException(status_code=404, detail="Customer not found")
+
+        query = keyset_paginate(
+            select(Plant).where(Plant.customer_id == customer_id), [Plant.name, Plant.id], cursor, limit
+        )
+        plants = (await db.execute(query)).scalars().all()
+        page = finish_page(plants, limit, lambda p: (p.name, p.id), response)
+        return [PlantOut.model_validate(plant) for plant in page], [customer_tag(customer_id)]
+
+    return await cached_read(
+        ("customer_plants", customer_id, cursor, limit), request, response,
+        lambda: conditional_get(
+            db, request, response, (Plant, Plant.customer_id == customer_id), (Customer, Customer.id == customer_id)
+        ),
+        load
+    )
 
 
 @router.get("/customers/{customer_id}/can-delete")
-def check_customer_can_delete(customer_id: int, db: Session = Depends(get_db)):
+async def check_customer_can_delete(customer_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Tarkista voiko asiakkaan poistaa (ei laitoksia)"""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    
-    plant_count = db.query(Plant).filter(Plant.customer_id == customer_id).count()
-    
+
+    plant_count = await db.scalar(
+        select(func.count()).select_from(Plant).where(Plant.customer_id == customer_id)
+    )
+
     return {
         "can_delete": plant_count == 0,
         "plant_count": plant_count,
@@ -231,46 +320,86 @@ def check_customer_can_delete(customer_id: int, db: Session = Depends(get_db)):
 # === REVISION CONTROL ENDPOINTS ===
 
 @router.get("/plants/{plant_id}/revisions", response_model=List[PlantRevisionSummary])
-def get_plant_revisions(plant_id: int, db: Session = Depends(get_db)):
+async def get_plant_revisions(plant_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Hae kaikki laitoksen revisiot"""
     # Find the base plant or any revision to get the plant identity
-    base_plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    base_plant = await db.get(Plant, plant_id)
     if not base_plant:
         raise HTTPException(status_code=404, detail="Plant not found")
-    
+
     # Get all revisions for this plant (same customer + name combination)
-    revisions = db.query(Plant).filter(
+    revision_ids = select(Plant.id).where(
         and_(
             Plant.customer_id == base_plant.customer_id,
             Plant.name == base_plant.name
         )
-    ).order_by(desc(Plant.revision)).all()
-    
-    return [PlantRevisionSummary.from_orm(rev) for rev in revisions]
+    )
+
+    # Linjojen ja altaiden määrät kaikille revisioille samassa kyselyssä
+    line_counts = select(Line.plant_id, func.count().label("line_count")).where(
+        Line.plant_id.in_(revision_ids)
+    ).group_by(Line.plant_id).subquery()
+    tank_counts = select(Tank.plant_id, func.count().label("tank_count")).where(
+        Tank.plant_id.in_(revision_ids)
+    ).group_by(Tank.plant_id).subquery()
+
+    rows = (await db.execute(
+        select(
+            Plant,
+            func.coalesce(line_counts.c.line_count, 0),
+            func.coalesce(tank_counts.c.tank_count, 0)
+        )
+        .outerjoin(line_counts, line_counts.c.plant_id == Plant.id)
+        .outerjoin(tank_counts, tank_counts.c.plant_id == Plant.id)
+        .where(Plant.id.in_(revision_ids))
+        .order_by(desc(Plant.revision))
+    )).all()
+
+    return [
+        PlantRevisionSummary.model_validate(rev).model_copy(
+            update={"line_count": line_count, "tank_count": tank_count}
+        )
+        for rev, line_count, tank_count in rows
+    ]
 
 
 @router.post("/plants/{plant_id}/revisions", response_model=PlantOut)
-def create_plant_revision(
-    plant_id: int, 
-    revision_data: RevisionCreate, 
-    db: Session = Depends(get_db)
+async def create_plant_revision(
+    plant_id: int,
+    revision_data: RevisionCreate,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Luo uusi laitoksen revisio"""
+    """
+    Luo uusi laitoksen revisio.
+
+    Uusi revisio saa oman kopion lähderevision linjoista, allasryhmistä ja
+    altaista. Lähteenä on copy_from_revision_id, jos annettu, muuten plant_id.
+    Koko kopio tehdään yhdessä transaktiossa.
+    """
     # Get the source plant
-    source_plant = db.query(Plant).filter(Plant.id == plant_id).first()
+    source_plant = await db.get(Plant, revision_data.copy_from_revision_id or plant_id)
     if not source_plant:
         raise HTTPException(status_code=404, detail="Plant not found")
-    
+
+    if revision_data.copy_from_revision_id and revision_data.copy_from_revision_id != plant_id:
+        plant = await db.get(Plant, plant_id)
+        if not plant:
+            raise HTTPException(status_code=404, detail="Plant not found")
+        if (plant.customer_id, plant.name) != (source_plant.customer_id, source_plant.name):
+            raise HTTPException(status_code=400, detail="Source revision belongs to a different plant")
+
     # Get the next revision number
-    max_revision = db.query(Plant).filter(
-        and_(
-            Plant.customer_id == source_plant.customer_id,
-            Plant.name == source_plant.name
-        )
-    ).order_by(desc(Plant.revision)).first()
-    
+    max_revision = (await db.execute(
+        select(Plant).where(
+            and_(
+                Plant.customer_id == source_plant.customer_id,
+                Plant.name == source_plant.name
+            )
+        ).order_by(desc(Plant.revision)).limit(1)
+    )).scalars().first()
+
     next_revision = (max_revision.revision + 1) if max_revision else 1
-    
+
     # Create new revision by copying source plant
     new_revision_data = {
         "customer_id": source_plant.customer_id,
@@ -285,98 +414,251 @@ def create_plant_revision(
         "revision_status": "DRAFT",
         "created_by": revision_data.created_by or "system"
     }
-    
+
     new_revision = Plant(**new_revision_data)
     db.add(new_revision)
-    db.commit()
-    db.refresh(new_revision)
-    
+    await db.flush()
+
+    # Kopioi linjat, allasryhmät ja altaat joukkopohjaisesti (ei rivi kerrallaan)
+    await RevisionCopyService(db).copy_hierarchy(source_plant.id, new_revision.id)
+
+    await db.commit()
+    invalidate_plant_lists(new_revision.customer_id)
+    await db.refresh(new_revision)
+
     return new_revision
 
 
 @router.put("/plants/{plant_id}/revisions/activate", response_model=PlantOut)
-def activate_plant_revision(
-    plant_id: int, 
-    activation_data: RevisionActivate, 
-    db: Session = Depends(get_db)
+async def activate_plant_revision(
+    plant_id: int,
+    activation_data: RevisionActivate,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Aktivoi laitoksen revisio (aseta aktiiviseksi versioksi)"""
-    # Get the revision to activate
-    revision_to_activate = db.query(Plant).filter(Plant.id == plant_id).first()
-    if not revision_to_activate:
-        raise HTTPException(status_code=404, detail="Plant revision not found")
-    
-    if revision_to_activate.revision_status == "ACTIVE":
-        raise HTTPException(status_code=400, detail="Revision is already active")
-    
-    if revision_to_activate.revision_status == "ARCHIVED":
-        raise HTTPException(status_code=400, detail="Cannot activate archived revision")
-    
-    # Deactivate current active revision
-    current_active = db.query(Plant).filter(
-        and_(
-            Plant.customer_id == revision_to_activate.customer_id,
-            Plant.name == revision_to_activate.name,
-            Plant.is_active_revision == True
-        )
-    ).first()
-    
-    if current_active:
-        current_active.is_active_revision = False
-        current_active.revision_status = "ARCHIVED"
-    
-    # Activate the new revision
-    revision_to_activate.is_active_revision = True
-    revision_to_activate.revision_status = "ACTIVE"
-    
-    if activation_data.activation_notes:
-        # Could store activation notes in a separate table or field
-        pass
-    
-    db.commit()
-    db.refresh(revision_to_activate)
-    
-    return revision_to_activate
+    """
+    Aktivoi laitoksen revisio (aseta aktiiviseksi versioksi).
+
+    Edellinen aktiivinen revisio arkistoidaan samassa transaktiossa.
+    Jos samanaikainen aktivointi ehtii ensin, yritetään kerran uudelleen.
+    """
+    for attempt in range(2):
+        try:
+            result = await RevisionActivationService(db).activate(plant_id)
+            if result is None:
+                raise HTTPException(status_code=404, detail="Plant revision not found")
+            previous_status, activated = result
+            if previous_status == "ACTIVE":
+                raise HTTPException(status_code=400, detail="Revision is already active")
+            if previous_status == "ARCHIVED":
+                raise HTTPException(status_code=400, detail="Cannot activate archived revision")
+            if activated is None:
+                # Vain DRAFT-revision voidaan aktivoida (myös NULL-tila hylätään)
+                raise HTTPException(status_code=400, detail=f"Cannot activate revision with status {previous_status}")
+            await db.commit()
+            invalidate_plant_lists(activated.customer_id)
+            return activated
+        except IntegrityError:
+            # Toinen aktivointi sai saman laitoksen aktiiviseksi ensin
+            await db.rollback()
+
+    raise HTTPException(status_code=409, detail="Revision activation conflicted with a concurrent activation")
 
 
 @router.get("/plants/{plant_id}/active", response_model=PlantOut)
-def get_active_plant_revision(plant_id: int, db: Session = Depends(get_db)):
+async def get_active_plant_revision(plant_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Hae laitoksen nykyinen aktiivinen revisio"""
     # Get any revision of the plant to find the plant identity
-    any_revision = db.query(Plant).filter(Plant.id == plant_id).first()
+    any_revision = await db.get(Plant, plant_id)
     if not any_revision:
         raise HTTPException(status_code=404, detail="Plant not found")
-    
-    # Find the active revision
-    active_revision = db.query(Plant).filter(
-        and_(
-            Plant.customer_id == any_revision.customer_id,
-            Plant.name == any_revision.name,
-            Plant.is_active_revision == True
-        )
-    ).first()
-    
+
+    # Find the active revision (cached pointer lookup)
+    active_id = await ActiveRevisionService(db).resolve(any_revision.customer_id, any_revision.name)
+    active_revision = await db.get(Plant, active_id) if active_id is not None else None
+
     if not active_revision:
         raise HTTPException(status_code=404, detail="No active revision found")
-    
+
     return active_revision
 
 
+@router.get("/plants/{plant_id}/revisions/compare/{other_revision_id}", response_model=RevisionDiff)
+async def compare_plant_revisions(
+    plant_id: int,
+    other_revision_id: int,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Vertaile kahta laitoksen revisiota.
+
+    Palauttaa linjojen, allasryhmien ja altaiden rakenteelliset muutokset
+    revisiosta plant_id revisioon other_revision_id: lisätyt, poistetut,
+    siirretyt, mitoitukseltaan muuttuneet ja uudelleennumeroidut.
+    """
+    source = await db.get(Plant, plant_id)
+    target = await db.get(Plant, other_revision_id)
+    if not source or not target:
+        raise HTTPException(status_code=404, detail="Plant revision not found")
+
+    if (source.customer_id, source.name) != (target.customer_id, target.name):
+        raise HTTPException(status_code=400, detail="Revisions belong to different plants")
+
+    return await RevisionDiffService(db).compare(source.id, target.id)
+
+
+@router.get("/plants/{plant_id}/tree", response_model=PlantTree)
+async def get_plant_tree(
+    plant_id: int,
+    request: Request,
+    response: Response,
+    depth: int = Query(
+        TREE_MAX_DEPTH, ge=0, le=TREE_MAX_DEPTH,
+        description="Syvyys: 0 = laitos, 1 = + linjat, 2 = + allasryhmät, 3 = + altaat"
+    ),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Hae laitosrevisio koko hierarkioineen (laitos → linjat → allasryhmät → altaat).
+
+    Jokainen taso haetaan yhdellä kyselyllä, joten laitoksen piirtäminen
+    vaatii yhden pyynnön.
+    """
+    not_modified = await conditional_get(
+        db, request, response,
+        (Plant, Plant.id == plant_id),
+        (Line, Line.plant_id == plant_id),
+        (TankGroup, TankGroup.plant_id == plant_id),
+        (Tank, Tank.plant_id == plant_id)
+    )
+    if not_modified:
+        return not_modified
+
+    tree = await PlantTreeService(db).get_tree(plant_id, depth)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Plant not found")
+    return tree
+
+
+@router.get("/plants/{plant_id}/tank-groups", response_model=List[TankGroupWithTanks])
+async def get_plant_tank_groups(
+    plant_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Hae laitoksen kaikki allasryhmät altaineen.
+
+    Altaat ladataan yhdellä selectinload-kyselyllä, joten kyselyjä on kaksi
+    allasryhmien määrästä riippumatta.
+    """
+    not_modified = await conditional_get(
+        db, request, response, (TankGroup, TankGroup.plant_id == plant_id), (Tank, Tank.plant_id == plant_id)
+    )
+    if not_modified:
+        return not_modified
+
+    plant = await db.get(Plant, plant_id)
+    if not plant:
+        raise HTTPException(status_code=404, detail="Plant not found")
+
+    return (await db.execute(
+        select(TankGroup)
+        .where(TankGroup.plant_id == plant_id)
+        .options(selectinload(TankGroup.tanks))
+        .order_by(TankGroup.line_id, TankGroup.number, TankGroup.id)
+    )).scalars().all()
+
+
+@router.get("/plants/{plant_id}/layout/validation", response_model=LayoutValidation)
+async def validate_plant_layout(plant_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Tarkista laitosrevision allasasettelu.
+
+    Palauttaa päällekkäiset altaat sekä altaat, jotka ulottuvat linjansa
+    min_x/max_x/min_y/max_y-rajojen ulkopuolelle.
+    """
+    plant = await db.get(Plant, plant_id)
+    if not plant:
+        raise HTTPException(status_code=404, detail="Plant not found")
+
+    return await LayoutService(db).validate_plant(plant.id)
+
+
+@router.get("/plants/{plant_id}/snapshot")
+async def export_plant_snapshot(
+    plant_id: int,
+    compress: bool = Query(False, description="Pakkaa tilannevedos zstd:llä"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Vie laitosrevision tilannevedos (laitos, linjat, allasryhmät, altaat).
+
+    Vastaus on binäärinen, versioitu tilannevedos (ks. app/utils/snapshot.py),
+    joka striimataan suoraan tietokannasta.
+    """
+    plant = await db.get(Plant, plant_id)
+    if not plant:
+        raise HTTPException(status_code=404, detail="Plant not found")
+    if compress and not compression_available():
+        raise HTTPException(status_code=400, detail="Compression is not available (zstandard not installed)")
+
+    filename = f"plant-{plant.id}-rev{plant.revision}.csdsnap"
+    return StreamingResponse(
+        stream_snapshot(plant.id, compress),
+        media_type=SNAPSHOT_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/customers/{customer_id}/plants/snapshot", response_model=PlantOut, status_code=201)
+async def import_plant_snapshot(
+    customer_id: int,
+    request: Request,
+    revision_name: Optional[str] = Query(None, max_length=255, description="Uuden revision nimi"),
+    created_by: Optional[str] = Query(None, max_length=255, description="Revision luoja"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Tuo laitosrevision tilannevedos asiakkaalle uutena DRAFT-revisiona.
+
+    Pyynnön runko on GET /plants/{plant_id}/snapshot -rajapinnan tuottama
+    tilannevedos. Rivit lisätään uusilla ID:illä yhdessä transaktiossa.
+    """
+    customer = await db.get(Customer, customer_id)
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    try:
+        new_revision = await PlantSnapshotService(db).import_snapshot(
+            customer_id, SnapshotReader(request.stream()), revision_name, created_by
+        )
+        await db.commit()
+    except (IntegrityError, DataError):
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Invalid snapshot: rows violate database constraints")
+
+    invalidate_plant_lists(customer_id)
+    await db.refresh(new_revision)
+    return new_revision
+
+
 @router.delete("/plants/{plant_id}/revisions")
-def delete_plant_revision(plant_id: int, db: Session = Depends(get_db)):
+async def delete_plant_revision(plant_id: int, db: AsyncSession = Depends(get_async_db)):
     """Poista laitoksen revisio (vain DRAFT-revisiot voidaan poistaa)"""
-    revision = db.query(Plant).filter(Plant.id == plant_id).first()
+    revision = await db.get(Plant, plant_id)
     if not revision:
         raise HTTPException(status_code=404, detail="Plant revision not found")
-    
+
     if revision.revision_status != "DRAFT":
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Only DRAFT revisions can be deleted"
         )
-    
+
     revision_name = f"{revision.name} (Rev {revision.revision})"
-    db.delete(revision)
-    db.commit()
-    
+    await db.delete(revision)
+    await db.commit()
+    invalidate_plant_lists(revision.customer_id, plant_tag(plant_id))
+
     return {"message": f"Plant revision '{revision_name}' deleted successfully"}
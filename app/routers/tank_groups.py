@@ -1,40 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from app.database import get_db
+from app.core.cache import plant_tag, read_cache
+from app.database import get_async_db, get_async_read_db
+from app.models.tank import Tank
 from app.models.tank_group import TankGroup
 from app.schemas.tank_group import TankGroupCreate, TankGroupUpdate, TankGroupResponse, TankGroupWithTanks
+from app.services.search import SearchService
+from app.utils.etag import conditional_get
+from app.utils.pagination import finish_page, keyset_paginate
 
 router = APIRouter(prefix="/tank-groups", tags=["tank-groups"])
 
 @router.get("/", response_model=List[TankGroupResponse])
 async def get_tank_groups(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     plant_id: Optional[int] = Query(None, gt=0, description="Filter by plant ID"),
     line_id: Optional[int] = Query(None, gt=0, description="Filter by line ID"),
-    search: Optional[str] = Query(None, description="Search by name"),
-    db: Session = Depends(get_db)
+    search: Optional[str] = Query(None, description="Fuzzy search by name (ranked results, no pagination)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get all tank groups with optional filtering."""
-    query = db.query(TankGroup)
+    """Get tank groups in creation (id) order with cursor pagination and optional filtering."""
+    query = select(TankGroup)
+    criteria = []
     
     if plant_id:
-        query = query.filter(TankGroup.plant_id == plant_id)
+        criteria.append(TankGroup.plant_id == plant_id)
     
     if line_id:
-        query = query.filter(TankGroup.line_id == line_id)
+        criteria.append(TankGroup.line_id == line_id)
+    
+    not_modified = await conditional_get(db, request, response, (TankGroup, *criteria))
+    if not_modified:
+        return not_modified
+    query = query.where(*criteria)
     
     if search:
-        query = query.filter(TankGroup.name.ilike(f"%{search}%"))
+        rows = await SearchService(db).search(query, TankGroup.name, search, limit)
+        return [row[0] for row in rows]
     
-    tank_groups = query.offset(skip).limit(limit).all()
-    return tank_groups
+    query = keyset_paginate(query, [TankGroup.id], cursor, limit)
+    tank_groups = (await db.execute(query)).scalars().all()
+    return finish_page(tank_groups, limit, lambda tg: (tg.id,), response)
 
 @router.get("/{tank_group_id}", response_model=TankGroupWithTanks)
-async def get_tank_group(tank_group_id: int, db: Session = Depends(get_db)):
+async def get_tank_group(
+    tank_group_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Get a specific tank group with its tanks."""
-    tank_group = db.query(TankGroup).filter(TankGroup.id == tank_group_id).first()
+    not_modified = await conditional_get(
+        db, request, response,
+        (TankGroup, TankGroup.id == tank_group_id), (Tank, Tank.tank_group_id == tank_group_id)
+    )
+    if not_modified:
+        return not_modified
+    
+    tank_group = await db.get(TankGroup, tank_group_id, options=[selectinload(TankGroup.tanks)])
     if not tank_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,15 +72,15 @@ async def get_tank_group(tank_group_id: int, db: Session = Depends(get_db)):
     return tank_group
 
 @router.post("/", response_model=TankGroupResponse, status_code=status.HTTP_201_CREATED)
-async def create_tank_group(tank_group: TankGroupCreate, db: Session = Depends(get_db)):
+async def create_tank_group(tank_group: TankGroupCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new tank group."""
     # Check if number already exists for the same plant and line (if number is provided)
     if tank_group.number:
-        existing = db.query(TankGroup).filter(
+        existing = (await db.execute(select(TankGroup).where(
             TankGroup.number == tank_group.number,
             TankGroup.plant_id == tank_group.plant_id,
             TankGroup.line_id == tank_group.line_id
-        ).first()
+        ).limit(1))).scalars().first()
         
         if existing:
             raise HTTPException(
@@ -61,18 +90,19 @@ async def create_tank_group(tank_group: TankGroupCreate, db: Session = Depends(g
     
     db_tank_group = TankGroup(**tank_group.model_dump())
     db.add(db_tank_group)
-    db.commit()
-    db.refresh(db_tank_group)
+    await db.commit()
+    read_cache.invalidate(plant_tag(db_tank_group.plant_id))
+    await db.refresh(db_tank_group)
     return db_tank_group
 
 @router.put("/{tank_group_id}", response_model=TankGroupResponse)
 async def update_tank_group(
     tank_group_id: int,
     tank_group: TankGroupUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a tank group."""
-    db_tank_group = db.query(TankGroup).filter(TankGroup.id == tank_group_id).first()
+    db_tank_group = await db.get(TankGroup, tank_group_id)
     if not db_tank_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -84,12 +114,12 @@ async def update_tank_group(
         plant_id = tank_group.plant_id if tank_group.plant_id else db_tank_group.plant_id
         line_id = tank_group.line_id if tank_group.line_id else db_tank_group.line_id
         
-        existing = db.query(TankGroup).filter(
+        existing = (await db.execute(select(TankGroup).where(
             TankGroup.number == tank_group.number,
             TankGroup.plant_id == plant_id,
             TankGroup.line_id == line_id,
             TankGroup.id != tank_group_id
-        ).first()
+        ).limit(1))).scalars().first()
         
         if existing:
             raise HTTPException(
@@ -98,38 +128,44 @@ async def update_tank_group(
             )
     
     # Update fields
+    old_plant_id = db_tank_group.plant_id
     update_data = tank_group.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_tank_group, field, value)
     
-    db.commit()
-    db.refresh(db_tank_group)
+    await db.commit()
+    read_cache.invalidate(plant_tag(old_plant_id), plant_tag(db_tank_group.plant_id))
+    await db.refresh(db_tank_group)
     return db_tank_group
 
 @router.delete("/{tank_group_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_tank_group(tank_group_id: int, db: Session = Depends(get_db)):
+async def delete_tank_group(tank_group_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a tank group."""
-    db_tank_group = db.query(TankGroup).filter(TankGroup.id == tank_group_id).first()
+    db_tank_group = await db.get(TankGroup, tank_group_id)
     if not db_tank_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Tank group with id {tank_group_id} not found"
         )
     
-    db.delete(db_tank_group)
-    db.commit()
+    await db.delete(db_tank_group)
+    await db.commit()
+    read_cache.invalidate(plant_tag(db_tank_group.plant_id))
 
 @router.get("/{tank_group_id}/can-delete", response_model=dict)
-async def can_delete_tank_group(tank_group_id: int, db: Session = Depends(get_db)):
-    """Check if a tank group can be deleted."""
-    db_tank_group = db.query(TankGroup).filter(TankGroup.id == tank_group_id).first()
-    if not db_tank_group:
+async def can_delete_tank_group(tank_group_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Check if a tank group can be deleted (counts its tanks without loading them)."""
+    tank_count = (await db.execute(
+        select(
+            select(func.count(Tank.id)).where(Tank.tank_group_id == TankGroup.id).scalar_subquery()
+        ).where(TankGroup.id == tank_group_id)
+    )).scalar()
+    if tank_count is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Tank group with id {tank_group_id} not found"
         )
     
-    tank_count = len(db_tank_group.tanks)
     can_delete = tank_count == 0
     
     return {
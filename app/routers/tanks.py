@@ -1,40 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database import get_db
+from app.core.cache import plant_tag, read_cache
+from app.database import get_async_db, get_async_read_db
 from app.models.tank import Tank
-from app.schemas.tank import TankCreate, TankUpdate, TankResponse
+from app.schemas.tank import TankCreate, TankUpdate, TankResponse, TankPositionsUpdate
+from app.services.layout import LayoutService
+from app.services.search import SearchService
+from app.services.tank_numbers import number_taken
+from app.utils.etag import conditional_get
+from app.utils.pagination import finish_page, keyset_paginate
 
 router = APIRouter(prefix="/tanks", tags=["tanks"])
 
+async def set_layout_headers(db: AsyncSession, tank: Tank, response: Response) -> None:
+    """Report layout conflicts of a written tank in X-Layout-Collisions / X-Layout-Out-Of-Bounds."""
+    conflicts = await LayoutService(db).check_tank(tank)
+    if conflicts["collisions"]:
+        response.headers["X-Layout-Collisions"] = ",".join(str(i) for i in conflicts["collisions"])
+    if conflicts["out_of_bounds"]:
+        response.headers["X-Layout-Out-Of-Bounds"] = ",".join(conflicts["out_of_bounds"])
+
+async def set_positions_layout_headers(db: AsyncSession, tanks: List[Tank], response: Response) -> None:
+    """Report layout conflicts of several written tanks as <tank id>:<other tank id or axis> pairs."""
+    conflicts = await LayoutService(db).check_tanks(tanks)
+    collisions = [f"{tank_id}:{other}" for tank_id, found in conflicts.items() for other in found["collisions"]]
+    out_of_bounds = [f"{tank_id}:{axis}" for tank_id, found in conflicts.items() for axis in found["out_of_bounds"]]
+    if collisions:
+        response.headers["X-Layout-Collisions"] = ",".join(collisions)
+    if out_of_bounds:
+        response.headers["X-Layout-Out-Of-Bounds"] = ",".join(out_of_bounds)
+
 @router.get("/", response_model=List[TankResponse])
 async def get_tanks(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     plant_id: Optional[int] = Query(None, gt=0, description="Filter by plant ID"),
     tank_group_id: Optional[int] = Query(None, gt=0, description="Filter by tank group ID"),
-    search: Optional[str] = Query(None, description="Search by name"),
-    db: Session = Depends(get_db)
+    search: Optional[str] = Query(None, description="Fuzzy search by name (ranked results, no pagination)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get all tanks with optional filtering."""
-    query = db.query(Tank)
+    """Get tanks in creation (id) order with cursor pagination and optional filtering."""
+    query = select(Tank)
+    criteria = []
     
     if plant_id:
-        query = query.filter(Tank.plant_id == plant_id)
+        criteria.append(Tank.plant_id == plant_id)
     
     if tank_group_id:
-        query = query.filter(Tank.tank_group_id == tank_group_id)
+        criteria.append(Tank.tank_group_id == tank_group_id)
+    
+    not_modified = await conditional_get(db, request, response, (Tank, *criteria))
+    if not_modified:
+        return not_modified
+    query = query.where(*criteria)
     
     if search:
-        query = query.filter(Tank.name.ilike(f"%{search}%"))
+        rows = await SearchService(db).search(query, Tank.name, search, limit)
+        return [row[0] for row in rows]
     
-    tanks = query.offset(skip).limit(limit).all()
+    query = keyset_paginate(query, [Tank.id], cursor, limit)
+    tanks = (await db.execute(query)).scalars().all()
+    return finish_page(tanks, limit, lambda t: (t.id,), response)
+
+@router.put("/positions", response_model=List[TankResponse])
+async def update_tank_positions(
+    changes: TankPositionsUpdate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Move and resize several tanks at once (e.g. a drag in the layout editor).
+
+    All changes are validated together and written with one UPDATE in one
+    transaction; either every tank moves or none does. Layout conflicts of
+    the moved tanks are then checked together and reported in the
+    X-Layout-Collisions (<tank id>:<other tank id>) and
+    X-Layout-Out-Of-Bounds (<tank id>:<axis>) headers.
+    """
+    ids = [change.id for change in changes.tanks]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each tank can appear only once"
+        )
+
+    plant_ids = dict((await db.execute(select(Tank.id, Tank.plant_id).where(Tank.id.in_(ids)))).all())
+    missing = [tank_id for tank_id in ids if tank_id not in plant_ids]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tanks not found: {', '.join(str(tank_id) for tank_id in missing)}"
+        )
+
+    tanks = await LayoutService(db).move_tanks([change.model_dump() for change in changes.tanks])
+    await db.commit()
+    read_cache.invalidate(*[plant_tag(plant_id) for plant_id in set(plant_ids.values())])
+    await set_positions_layout_headers(db, tanks, response)
     return tanks
 
 @router.get("/{tank_id}", response_model=TankResponse)
-async def get_tank(tank_id: int, db: Session = Depends(get_db)):
+async def get_tank(
+    tank_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Get a specific tank."""
-    tank = db.query(Tank).filter(Tank.id == tank_id).first()
+    not_modified = await conditional_get(db, request, response, (Tank, Tank.id == tank_id))
+    if not_modified:
+        return not_modified
+    
+    tank = await db.get(Tank, tank_id)
     if not tank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,20 +123,15 @@ async def get_tank(tank_id: int, db: Session = Depends(get_db)):
     return tank
 
 @router.post("/", response_model=TankResponse, status_code=status.HTTP_201_CREATED)
-async def create_tank(tank: TankCreate, db: Session = Depends(get_db)):
-    """Create a new tank."""
-    # Check if number already exists for the same tank group (if number is provided)
-    if tank.number:
-        existing = db.query(Tank).filter(
-            Tank.number == tank.number,
-            Tank.tank_group_id == tank.tank_group_id
-        ).first()
-        
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Tank with number '{tank.number}' already exists in this tank group"
-            )
+async def create_tank(tank: TankCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Create a new tank. Layout conflicts of the new tank are reported in response headers."""
+    # Check if number already exists for the same tank group, or among the
+    # plant's ungrouped tanks (if number is provided)
+    if tank.number and await number_taken(db, tank.number, tank.tank_group_id, tank.plant_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tank with number '{tank.number}' already exists in this tank group"
+        )
     new_tank = Tank(
         name=tank.name,
         number=tank.number,
@@ -71,70 +146,66 @@ async def create_tank(tank: TankCreate, db: Session = Depends(get_db)):
         space=tank.space
     )
     db.add(new_tank)
-    db.commit()
-    db.refresh(new_tank)
+    await db.commit()
+    read_cache.invalidate(plant_tag(new_tank.plant_id))
+    await db.refresh(new_tank)
+    await set_layout_headers(db, new_tank, response)
     return new_tank
-    db.add(db_tank)
-    db.commit()
-    db.refresh(db_tank)
-    return db_tank
 
 @router.put("/{tank_id}", response_model=TankResponse)
 async def update_tank(
     tank_id: int,
     tank: TankUpdate,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Update a tank."""
-    db_tank = db.query(Tank).filter(Tank.id == tank_id).first()
+    """Update a tank. Layout conflicts of the tank are reported in response headers."""
+    db_tank = await db.get(Tank, tank_id)
     if not db_tank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Tank with id {tank_id} not found"
         )
     
-    # Check for number conflicts if number is being updated
-    if tank.number and tank.number != db_tank.number:
-        tank_group_id = tank.tank_group_id if tank.tank_group_id else db_tank.tank_group_id
-        
-        existing = db.query(Tank).filter(
-            Tank.number == tank.number,
-            Tank.tank_group_id == tank_group_id,
-            Tank.id != tank_id
-        ).first()
-        
-        if existing:
+    # Check for number conflicts if the number, tank group or plant changes
+    update_data = tank.model_dump(exclude_unset=True)
+    merged = {field: update_data.get(field, getattr(db_tank, field)) for field in ("number", "tank_group_id", "plant_id")}
+    if merged["number"] and any(merged[field] != getattr(db_tank, field) for field in merged):
+        if await number_taken(db, merged["number"], merged["tank_group_id"], merged["plant_id"], exclude_tank_id=tank_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Tank with number '{tank.number}' already exists in this tank group"
+                detail=f"Tank with number '{merged['number']}' already exists in this tank group"
             )
     
     # Update fields
-    update_data = tank.model_dump(exclude_unset=True)
+    old_plant_id = db_tank.plant_id
     for field, value in update_data.items():
         setattr(db_tank, field, value)
     
-    db.commit()
-    db.refresh(db_tank)
+    await db.commit()
+    read_cache.invalidate(plant_tag(old_plant_id), plant_tag(db_tank.plant_id))
+    await db.refresh(db_tank)
+    await set_layout_headers(db, db_tank, response)
     return db_tank
 
 @router.delete("/{tank_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_tank(tank_id: int, db: Session = Depends(get_db)):
+async def delete_tank(tank_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a tank."""
-    db_tank = db.query(Tank).filter(Tank.id == tank_id).first()
+    db_tank = await db.get(Tank, tank_id)
     if not db_tank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Tank with id {tank_id} not found"
         )
     
-    db.delete(db_tank)
-    db.commit()
+    await db.delete(db_tank)
+    await db.commit()
+    read_cache.invalidate(plant_tag(db_tank.plant_id))
 
 @router.get("/{tank_id}/can-delete", response_model=dict)
-async def can_delete_tank(tank_id: int, db: Session = Depends(get_db)):
+async def can_delete_tank(tank_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Check if a tank can be deleted."""
-    db_tank = db.query(Tank).filter(Tank.id == tank_id).first()
+    db_tank = await db.get(Tank, tank_id)
     if not db_tank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+
+# Batch Schemas
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"] = Field(..., description="Operation")
+    entity: Literal["tank", "tank_group"] = Field(..., description="Target entity")
+    id: Optional[int] = Field(None, gt=0, description="ID of the row to update or delete")
+    temp_id: Optional[str] = Field(
+        None, min_length=1, max_length=64,
+        description="Client temporary ID of a created row (unique within the batch)"
+    )
+    tank_group_temp_id: Optional[str] = Field(
+        None, min_length=1, max_length=64,
+        description="Tank operations: temporary ID of a tank group created in the same batch"
+    )
+    data: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Fields as in the create/update endpoints of the entity"
+    )
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=5000)
+
+class BatchResult(BaseModel):
+    created: int
+    updated: int
+    deleted: int
+    ids: Dict[str, int] = Field(..., description="Temporary ID -> ID of each created row that had a temp_id")
+
+# Batch delete check Schemas
+class DeleteCheckRequest(BaseModel):
+    customer_ids: List[int] = Field(default_factory=list, max_length=1000)
+    plant_ids: List[int] = Field(default_factory=list, max_length=1000)
+    line_ids: List[int] = Field(default_factory=list, max_length=1000)
+    tank_group_ids: List[int] = Field(default_factory=list, max_length=1000)
+    tank_ids: List[int] = Field(default_factory=list, max_length=1000)
+
+class DeleteCheck(BaseModel):
+    exists: bool
+    can_delete: bool
+    reason: Optional[str] = None
+    counts: Dict[str, int] = Field(default_factory=dict, description="Number of child rows per child type")
+
+class DeleteCheckResult(BaseModel):
+    customers: Dict[int, DeleteCheck]
+    plants: Dict[int, DeleteCheck]
+    lines: Dict[int, DeleteCheck]
+    tank_groups: Dict[int, DeleteCheck]
+    tanks: Dict[int, DeleteCheck]
@@ -1,8 +1,10 @@
 """Pydantic schemas for Line model."""
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
+from .tank import TankResponse
+
 
 class LineBase(BaseModel):
     """Base schema for Line with common fields."""
@@ -16,7 +18,7 @@ class LineBase(BaseModel):
 class LineCreate(LineBase):
     """Schema for creating a new line."""
     plant_id: int = Field(..., description="ID of the plant this line belongs to")
-    count: int = Field(..., description="Kuinka monta tankkia luodaan")
+    count: int = Field(..., ge=0, description="Kuinka monta tankkia luodaan")
     width: int = Field(..., description="Tankin leveys (mm)")
     length: int = Field(..., description="Tankin pituus (mm)")
     depth: int = Field(..., description="Tankin syvyys (mm)")
@@ -40,3 +42,68 @@ class LineOut(LineBase):
     
     class Config:
         from_attributes = True
+
+
+class LineWithTanks(LineOut):
+    """Schema for a created line with the tanks generated for it."""
+    tanks: List[TankResponse] = []
+
+
+class LineNumberingRequest(BaseModel):
+    """Schema for numbering the tanks of a line."""
+    start_number: Optional[int] = Field(None, gt=0, description="Ensimmäisen altaan numero (oletus: linjanumero + 1)")
+    dry_run: bool = Field(False, description="Palauta numerointi tallentamatta")
+
+
+class TankNumberChange(BaseModel):
+    """Number change of one tank."""
+    id: int
+    name: str
+    old_number: Optional[int] = None
+    new_number: int
+
+
+class TankGroupNumberChange(BaseModel):
+    """Number and name change of one tank group."""
+    id: int
+    old_number: Optional[int] = None
+    new_number: int
+    old_name: str
+    new_name: str
+
+
+class LineNumbering(BaseModel):
+    """Numbering of a line; lists only tanks and tank groups that change."""
+    line_id: int
+    start_number: int
+    dry_run: bool
+    tank_count: int = Field(..., description="Number of tanks on the line")
+    tanks: List[TankNumberChange]
+    tank_groups: List[TankGroupNumberChange]
+
+
+class LineLayoutRequest(BaseModel):
+    """Schema for reflowing (packing) the tanks of a line."""
+    start_x: Optional[int] = Field(None, description="Ensimmäisen altaan x-koordinaatti (oletus: linjan min_x)")
+    anchor_tank_ids: List[int] = Field(default_factory=list, description="Altaat, joiden x-koordinaatti säilyy")
+    dry_run: bool = Field(False, description="Palauta asettelu tallentamatta")
+
+
+class TankPositionChange(BaseModel):
+    """X position change of one tank."""
+    id: int
+    old_x_position: int
+    new_x_position: int
+
+
+class LineLayout(BaseModel):
+    """Reflowed layout of a line; lists only tanks that move."""
+    line_id: int
+    start_x: Optional[int] = None
+    dry_run: bool
+    tank_count: int = Field(..., description="Number of tanks on the line")
+    min_x: Optional[int] = None
+    max_x: Optional[int] = None
+    min_y: Optional[int] = None
+    max_y: Optional[int] = None
+    tanks: List[TankPositionChange]
@@ -6,7 +6,11 @@ Includes revision control support for plant configuration management.
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
+
+from .line import LineOut
+from .tank import TankResponse
+from .tank_group import TankGroupResponse
 
 
 class PlantBase(BaseModel):
@@ -74,7 +78,7 @@ class PlantRevisionSummary(BaseModel):
     id: int
     revision: int
     revision_name: str
-    revision_status: Literal["DRAFT", "ACTIVE", "ARCHIVE"]
+    revision_status: Literal["DRAFT", "ACTIVE", "ARCHIVED"]
     is_active_revision: bool
     created_by: Optional[str] = None
     created_at: datetime
@@ -83,3 +87,44 @@ class PlantRevisionSummary(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class RevisionDiffChange(BaseModel):
+    """One changed line, tank group or tank between two revisions"""
+    kind: Literal["line", "tank_group", "tank"]
+    change_types: List[Literal["added", "removed", "moved", "resized", "renumbered", "modified"]]
+    from_id: Optional[int] = Field(None, description="Row ID in the source revision (None if added)")
+    to_id: Optional[int] = Field(None, description="Row ID in the target revision (None if removed)")
+    name: Optional[str] = None
+    number: Optional[int] = None
+    fields: Dict[str, List[Any]] = Field(
+        default_factory=dict,
+        description="Changed fields as [old, new]; 'parent' is the containing line/tank group ID"
+    )
+
+
+class RevisionDiff(BaseModel):
+    """Structural diff between two plant revisions"""
+    from_revision_id: int
+    to_revision_id: int
+    identical: bool
+    summary: Dict[str, int] = Field(..., description="Number of changes per change type")
+    changes: List[RevisionDiffChange]
+
+
+class TankGroupTree(TankGroupResponse):
+    """Tank group with its tanks (tanks is None below the requested depth)"""
+    tanks: Optional[List[TankResponse]] = None
+
+
+class LineTree(LineOut):
+    """Line with its tank groups (tank_groups is None below the requested depth)"""
+    tank_groups: Optional[List[TankGroupTree]] = None
+
+
+class PlantTree(PlantOut):
+    """Plant revision with its whole hierarchy"""
+    lines: Optional[List[LineTree]] = None
+    ungrouped_tanks: Optional[List[TankResponse]] = Field(
+        None, description="Tanks that belong to no tank group"
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # Tank Schemas
@@ -39,3 +39,33 @@ class TankResponse(TankBase):
     
     class Config:
         from_attributes = True
+
+class TankPosition(BaseModel):
+    id: int = Field(..., gt=0, description="Tank ID")
+    x_position: int = Field(..., description="X coordinate of tank position")
+    y_position: int = Field(..., description="Y coordinate of tank position")
+    z_position: int = Field(..., description="Z coordinate of tank position")
+    width: Optional[int] = Field(None, gt=0, description="Tank width (unchanged if omitted)")
+    length: Optional[int] = Field(None, gt=0, description="Tank length (unchanged if omitted)")
+    depth: Optional[int] = Field(None, gt=0, description="Tank depth (unchanged if omitted)")
+
+class TankPositionsUpdate(BaseModel):
+    tanks: List[TankPosition] = Field(..., min_length=1, max_length=1000, description="Moved or resized tanks")
+
+# Layout validation Schemas
+class TankCollision(BaseModel):
+    tank_id: int
+    other_tank_id: int
+
+class TankOutOfBounds(BaseModel):
+    tank_id: int
+    line_id: int
+    axes: List[Literal["x", "y"]] = Field(..., description="Axes on which the tank extends past its line bounds")
+
+class LayoutValidation(BaseModel):
+    plant_id: int
+    tank_count: int
+    valid: bool
+    collisions: List[TankCollision]
+    out_of_bounds: List[TankOutOfBounds]
+    skipped_tank_ids: List[int] = Field(..., description="Tanks without width or length (not checked)")
@@ -0,0 +1,48 @@
+"""
+Active plant revision resolver.
+
+Maps a plant identity (customer_id + name) to the id of its active
+revision. Lookups are answered from the read cache (app/core/cache.py),
+backed by the plant_active_revision pointer table (a primary key fetch on
+a miss).
+
+Entries are tagged with the customer's tag. The endpoints that change
+which revision is active (plant create, revision activate, plant/revision
+delete, rename) invalidate that tag after committing, and the read cache
+never stores a pointer read before such an invalidation. Entries also
+expire after settings.read_cache_ttl_seconds so other worker processes,
+whose caches are not invalidated, converge.
+"""
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import MISSING, customer_tag, read_cache
+from ..models.plant_active_revision import PlantActiveRevision
+
+
+class ActiveRevisionService:
+    """Service layer for resolving active plant revisions."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def resolve(self, customer_id: int, name: str) -> Optional[int]:
+        """Id of the active revision of a plant, or None if no revision is active"""
+        key = ("active_revision", customer_id, name)
+        plant_id = read_cache.get(key)
+        if plant_id is MISSING:
+            read_at = read_cache.watermark()
+            plant_id = (await self.db.execute(
+                select(PlantActiveRevision.plant_id).where(
+                    PlantActiveRevision.customer_id == customer_id,
+                    PlantActiveRevision.name == name
+                )
+            )).scalar()
+            read_cache.set(key, plant_id, [customer_tag(customer_id)], read_at)
+        return plant_id
+
+    async def set_pointer(self, customer_id: int, name: str, plant_id: int) -> None:
+        """Point a plant at its new active revision (in the caller's transaction)"""
+        await self.db.merge(PlantActiveRevision(customer_id=customer_id, name=name, plant_id=plant_id))
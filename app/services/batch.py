@@ -0,0 +1,316 @@
+"""
+Batch editing service for tanks and tank groups.
+
+Applies a list of create, update and delete operations (as sent by the line
+editor) in one transaction:
+
+1. Every operation is validated with the schemas of the single-row
+   endpoints before anything is written.
+2. Rows to update or delete are loaded with one query per table.
+3. Number uniqueness (tank group numbers per plant and line, tank numbers
+   per tank group and ungrouped tank numbers per plant) is checked on the state after the whole batch, so
+   swapping or shifting numbers inside a batch is allowed.
+4. Rows are written set-wise: one DELETE per table, one executemany INSERT
+   per table and one executemany UPDATE per table, in an order that lets
+   tanks refer to tank groups created in the same batch through their
+   client temporary IDs.
+
+The caller commits.
+"""
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+from ..schemas.batch import BatchOperation
+from ..schemas.tank import TankCreate, TankUpdate
+from ..schemas.tank_group import TankGroupCreate, TankGroupUpdate
+from .tank_numbers import in_number_scopes, number_scope
+
+# Entity -> (model, create schema, update schema)
+ENTITIES = {
+    "tank_group": (TankGroup, TankGroupCreate, TankGroupUpdate),
+    "tank": (Tank, TankCreate, TankUpdate),
+}
+
+# Tank position columns are NOT NULL with default 0
+POSITION_COLUMNS = ("x_position", "y_position", "z_position")
+
+
+class _Op(NamedTuple):
+    index: int
+    op: str
+    entity: str
+    id: Optional[int]
+    temp_id: Optional[str]
+    tank_group_temp_id: Optional[str]
+    fields: Dict[str, Any]
+
+
+def _error(index: int, detail: str, status_code: int = 400) -> HTTPException:
+    return HTTPException(status_code=status_code, detail=f"Operation {index}: {detail}")
+
+
+class BatchService:
+    """Service layer for transactional batches of tank and tank group edits."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.plant_ids: Set[int] = set()  # Plants touched by the batch (for cache invalidation)
+
+    async def apply(self, operations: List[BatchOperation]) -> Dict[str, Any]:
+        """
+        Validate and write a batch (does not commit).
+
+        Returns:
+            Dictionary matching the BatchResult schema
+        """
+        ops = self._parse(operations)
+        rows = await self._load(ops)
+        await self._check_group_numbers(ops, rows)
+        await self._check_tank_numbers(ops, rows)
+        return await self._write(ops, rows)
+
+    def _parse(self, operations: List[BatchOperation]) -> List[_Op]:
+        ops = []
+        temp_ids: Dict[str, str] = {}
+        targets: Set[Tuple[str, int]] = set()
+        for index, operation in enumerate(operations):
+            _, create_schema, update_schema = ENTITIES[operation.entity]
+            if operation.op == "create":
+                if operation.id is not None:
+                    raise _error(index, "create does not take an id")
+                if operation.temp_id is not None:
+                    if operation.temp_id in temp_ids:
+                        raise _error(index, f"Duplicate temp_id '{operation.temp_id}'")
+                    temp_ids[operation.temp_id] = operation.entity
+            else:
+                if operation.id is None:
+                    raise _error(index, f"{operation.op} requires an id")
+                if operation.temp_id is not None:
+                    raise _error(index, "temp_id is only allowed for create")
+                if (operation.entity, operation.id) in targets:
+                    raise _error(index, f"{operation.entity} {operation.id} appears in several operations")
+                targets.add((operation.entity, operation.id))
+
+            data = dict(operation.data)
+            if operation.tank_group_temp_id is not None:
+                if operation.entity != "tank" or operation.op == "delete":
+                    raise _error(index, "tank_group_temp_id is only allowed for tank create and update")
+                if temp_ids.get(operation.tank_group_temp_id) != "tank_group":
+                    raise _error(
+                        index,
+                        f"tank_group_temp_id '{operation.tank_group_temp_id}' is not a tank group created earlier in the batch"
+                    )
+                if data.get("tank_group_id") is not None:
+                    raise _error(index, "Give either tank_group_id or tank_group_temp_id")
+                data.pop("tank_group_id", None)
+
+            try:
+                if operation.op == "create":
+                    fields = create_schema.model_validate(data).model_dump()
+                elif operation.op == "update":
+                    fields = update_schema.model_validate(data).model_dump(exclude_unset=True)
+                else:
+                    fields = {}
+            except ValidationError as e:
+                raise _error(index, str(e), status_code=422)
+
+            ops.append(_Op(
+                index, operation.op, operation.entity, operation.id,
+                operation.temp_id, operation.tank_group_temp_id, fields
+            ))
+        return ops
+
+    async def _load(self, ops: List[_Op]) -> Dict[Tuple[str, int], Any]:
+        """Rows targeted by updates and deletes, keyed by (entity, id)"""
+        rows: Dict[Tuple[str, int], Any] = {}
+        for entity, (model, _, _) in ENTITIES.items():
+            ids = [op.id for op in ops if op.entity == entity and op.id is not None]
+            if not ids:
+                continue
+            for row in (await self.db.execute(select(model).where(model.id.in_(ids)))).scalars():
+                rows[(entity, row.id)] = row
+        for op in ops:
+            if op.id is not None and (op.entity, op.id) not in rows:
+                raise _error(op.index, f"{op.entity} {op.id} not found", status_code=404)
+        return rows
+
+    @staticmethod
+    def _find_duplicate(state: Dict[Hashable, Tuple[Hashable, Optional[int], Optional[int]]]) -> Optional[Tuple[int, int]]:
+        """
+        First number used twice within a key.
+
+        state maps row -> (uniqueness key, number, index of the batch operation
+        or None for untouched rows). Returns (operation index, number).
+        """
+        seen: Dict[Tuple[Hashable, int], Optional[int]] = {}
+        for key, number, index in state.values():
+            if number is None:
+                continue
+            if (key, number) in seen:
+                other = seen[(key, number)]
+                return (index if index is not None else other), number
+            seen[(key, number)] = index
+        return None
+
+    async def _check_group_numbers(self, ops: List[_Op], rows: Dict[Tuple[str, int], Any]) -> None:
+        state: Dict[Hashable, Tuple[Hashable, Optional[int], Optional[int]]] = {}
+        touched: Dict[Hashable, Tuple[Hashable, Optional[int], Optional[int]]] = {}
+        deleted = set()
+        for op in ops:
+            if op.entity != "tank_group":
+                continue
+            if op.op == "create":
+                touched[("new", op.index)] = ((op.fields["plant_id"], op.fields["line_id"]), op.fields["number"], op.index)
+            elif op.op == "update":
+                group = rows[("tank_group", op.id)]
+                merged = {"plant_id": group.plant_id, "line_id": group.line_id, "number": group.number, **op.fields}
+                touched[op.id] = ((merged["plant_id"], merged["line_id"]), merged["number"], op.index)
+            else:
+                deleted.add(op.id)
+
+        keys = {key for key, number, _ in touched.values() if number is not None}
+        if not keys:
+            return
+        existing = await self.db.execute(
+            select(TankGroup.id, TankGroup.plant_id, TankGroup.line_id, TankGroup.number).where(
+                tuple_(TankGroup.plant_id, TankGroup.line_id).in_(list(keys)),
+                TankGroup.number.isnot(None)
+            )
+        )
+        for row in existing:
+            state[row.id] = ((row.plant_id, row.line_id), row.number, None)
+        state.update(touched)
+        for group_id in deleted:
+            state.pop(group_id, None)
+
+        duplicate = self._find_duplicate(state)
+        if duplicate:
+            index, number = duplicate
+            raise _error(index, f"Tank group with number '{number}' already exists for this plant and line")
+
+    async def _check_tank_numbers(self, ops: List[_Op], rows: Dict[Tuple[str, int], Any]) -> None:
+        # Tank numbers are unique per tank group; ungrouped tanks per plant (see tank_numbers.py)
+        def key(tank_group_id, tank_group_temp_id, plant_id) -> Hashable:
+            if tank_group_temp_id is not None:
+                return ("new_group", tank_group_temp_id)
+            return number_scope(tank_group_id, plant_id)
+
+        deleted_groups = {op.id for op in ops if op.entity == "tank_group" and op.op == "delete"}
+        state: Dict[Hashable, Tuple[Hashable, Optional[int], Optional[int]]] = {}
+        touched: Dict[Hashable, Tuple[Hashable, Optional[int], Optional[int]]] = {}
+        deleted = set()
+        for op in ops:
+            if op.entity != "tank":
+                continue
+            if op.op == "create":
+                if op.fields["tank_group_id"] in deleted_groups:
+                    raise _error(op.index, f"tank_group {op.fields['tank_group_id']} is deleted in this batch")
+                touched[("new", op.index)] = (
+                    key(op.fields["tank_group_id"], op.tank_group_temp_id, op.fields["plant_id"]),
+                    op.fields["number"], op.index
+                )
+            elif op.op == "update":
+                tank = rows[("tank", op.id)]
+                merged = {"tank_group_id": tank.tank_group_id, "plant_id": tank.plant_id, "number": tank.number, **op.fields}
+                if tank.tank_group_id in deleted_groups or merged["tank_group_id"] in deleted_groups:
+                    raise _error(op.index, f"tank {op.id} or its tank group is deleted in this batch")
+                touched[op.id] = (
+                    key(merged["tank_group_id"], op.tank_group_temp_id, merged["plant_id"]),
+                    merged["number"], op.index
+                )
+            else:
+                deleted.add(op.id)
+
+        scopes = {k for k, number, _ in touched.values() if number is not None and k[0] != "new_group"}
+        if scopes:
+            existing = await self.db.execute(
+                select(Tank.id, Tank.tank_group_id, Tank.plant_id, Tank.number).where(
+                    Tank.number.isnot(None),
+                    in_number_scopes(scopes)
+                )
+            )
+            for row in existing:
+                if row.tank_group_id not in deleted_groups:  # Cascade-deleted with their group
+                    state[row.id] = (key(row.tank_group_id, None, row.plant_id), row.number, None)
+        state.update(touched)
+        for tank_id in deleted:
+            state.pop(tank_id, None)
+
+        duplicate = self._find_duplicate(state)
+        if duplicate:
+            index, number = duplicate
+            raise _error(index, f"Tank with number '{number}' already exists in this tank group")
+
+    async def _insert(self, model, ops: List[_Op], ids: Dict[str, int]) -> None:
+        """One executemany INSERT; records the new IDs of rows with a temp_id"""
+        if not ops:
+            return
+        values = []
+        for op in ops:
+            row = dict(op.fields)
+            if op.tank_group_temp_id is not None:
+                row["tank_group_id"] = ids[op.tank_group_temp_id]
+            if model is Tank:
+                for name in POSITION_COLUMNS:
+                    if row[name] is None:
+                        row[name] = 0
+            self.plant_ids.add(row["plant_id"])
+            values.append(row)
+
+        if any(op.temp_id is not None for op in ops):
+            new_ids = (await self.db.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True), values
+            )).scalars().all()
+            ids.update((op.temp_id, new_id) for op, new_id in zip(ops, new_ids) if op.temp_id is not None)
+        else:
+            await self.db.execute(insert(model), values)
+
+    async def _update(self, model, entity: str, ops: List[_Op], rows, ids: Dict[str, int]) -> None:
+        """ORM bulk UPDATE by primary key (one executemany per set of changed columns)"""
+        values = []
+        for op in ops:
+            row = dict(op.fields)
+            if op.tank_group_temp_id is not None:
+                row["tank_group_id"] = ids[op.tank_group_temp_id]
+            self.plant_ids.add(rows[(entity, op.id)].plant_id)
+            if row.get("plant_id") is not None:
+                self.plant_ids.add(row["plant_id"])
+            if row:
+                values.append({"id": op.id, **row})
+        if values:
+            await self.db.execute(update(model), values)
+
+    async def _write(self, ops: List[_Op], rows: Dict[Tuple[str, int], Any]) -> Dict[str, Any]:
+        ids: Dict[str, int] = {}
+        by_kind: Dict[Tuple[str, str], List[_Op]] = {}
+        for op in ops:
+            by_kind.setdefault((op.op, op.entity), []).append(op)
+
+        # Deletes first so that numbers they free can be reused by the batch
+        for entity in ("tank", "tank_group"):
+            model = ENTITIES[entity][0]
+            deletes = by_kind.get(("delete", entity), [])
+            if deletes:
+                self.plant_ids.update(rows[(entity, op.id)].plant_id for op in deletes)
+                await self.db.execute(
+                    delete(model).where(model.id.in_([op.id for op in deletes]))
+                    .execution_options(synchronize_session=False)
+                )
+
+        await self._insert(TankGroup, by_kind.get(("create", "tank_group"), []), ids)
+        await self._update(TankGroup, "tank_group", by_kind.get(("update", "tank_group"), []), rows, ids)
+        await self._update(Tank, "tank", by_kind.get(("update", "tank"), []), rows, ids)
+        await self._insert(Tank, by_kind.get(("create", "tank"), []), ids)
+
+        return {
+            "created": sum(len(by_kind.get(("create", entity), [])) for entity in ENTITIES),
+            "updated": sum(len(by_kind.get(("update", entity), [])) for entity in ENTITIES),
+            "deleted": sum(len(by_kind.get(("delete", entity), [])) for entity in ENTITIES),
+            "ids": ids,
+        }
@@ -0,0 +1,112 @@
+"""
+Batch delete check service.
+
+Answers "can this be deleted?" for many customers, plants, lines, tank
+groups and tanks at once, with the same rules as the single-row can-delete
+endpoints:
+
+- a customer can be deleted if it has no plants
+- a tank group can be deleted if it has no tanks
+- plants, lines and tanks can always be deleted (their children are
+  deleted with them); their child counts are reported so the UI can warn
+
+Each entity type costs one query: the requested rows outer-joined to one
+grouped COUNT subquery per child type.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.customer import Customer
+from ..models.line import Line
+from ..models.plant import Plant
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+
+
+def _grouped_count(parent_column, ids: Sequence[int], join=None):
+    """Subquery (parent_id, n): number of child rows per parent among ids"""
+    query = select(parent_column.label("parent_id"), func.count().label("n"))
+    if join is not None:
+        query = query.select_from(parent_column.table).join(*join)
+    return query.where(parent_column.in_(ids)).group_by(parent_column).subquery()
+
+
+def _customer_reason(counts: Dict[str, int]) -> Optional[str]:
+    return f"Customer has {counts['plants']} plants" if counts["plants"] else None
+
+
+def _tank_group_reason(counts: Dict[str, int]) -> Optional[str]:
+    return f"Tank group has {counts['tanks']} tanks" if counts["tanks"] else None
+
+
+def _always(counts: Dict[str, int]) -> Optional[str]:
+    return None
+
+
+class DeletabilityService:
+    """Service layer for checking whether rows can be deleted."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _check(
+        self,
+        model,
+        ids: Sequence[int],
+        children: List[Tuple[str, Any]],
+        reason: Callable[[Dict[str, int]], Optional[str]]
+    ) -> Dict[int, Dict[str, Any]]:
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+
+        query = select(model.id).where(model.id.in_(ids))
+        for _, subquery in children:
+            query = query.add_columns(func.coalesce(subquery.c.n, 0)).outerjoin(
+                subquery, subquery.c.parent_id == model.id
+            )
+
+        result = {
+            row_id: {"exists": False, "can_delete": False, "reason": "Not found", "counts": {}}
+            for row_id in ids
+        }
+        for row in await self.db.execute(query):
+            counts = {name: count for (name, _), count in zip(children, row[1:])}
+            message = reason(counts)
+            result[row[0]] = {"exists": True, "can_delete": message is None, "reason": message, "counts": counts}
+        return result
+
+    async def check(
+        self,
+        customer_ids: Sequence[int] = (),
+        plant_ids: Sequence[int] = (),
+        line_ids: Sequence[int] = (),
+        tank_group_ids: Sequence[int] = (),
+        tank_ids: Sequence[int] = ()
+    ) -> Dict[str, Dict[int, Dict[str, Any]]]:
+        """
+        Delete checks per entity type and id.
+
+        Returns:
+            Dictionary matching the DeleteCheckResult schema
+        """
+        return {
+            "customers": await self._check(Customer, customer_ids, [
+                ("plants", _grouped_count(Plant.customer_id, customer_ids)),
+            ], _customer_reason),
+            "plants": await self._check(Plant, plant_ids, [
+                ("lines", _grouped_count(Line.plant_id, plant_ids)),
+                ("tank_groups", _grouped_count(TankGroup.plant_id, plant_ids)),
+                ("tanks", _grouped_count(Tank.plant_id, plant_ids)),
+            ], _always),
+            "lines": await self._check(Line, line_ids, [
+                ("tank_groups", _grouped_count(TankGroup.line_id, line_ids)),
+                ("tanks", _grouped_count(TankGroup.line_id, line_ids, join=(Tank, Tank.tank_group_id == TankGroup.id))),
+            ], _always),
+            "tank_groups": await self._check(TankGroup, tank_group_ids, [
+                ("tanks", _grouped_count(Tank.tank_group_id, tank_group_ids)),
+            ], _tank_group_reason),
+            "tanks": await self._check(Tank, tank_ids, [], _always),
+        }
@@ -0,0 +1,381 @@
+"""
+Tank layout validation service.
+
+Tanks are axis-aligned boxes in millimeters: x_position..x_position+width,
+y_position..y_position+length and z_position..z_position+depth. Two tanks
+collide if their boxes overlap with positive volume (touching faces are
+allowed). A tank of a tank group must also stay inside its line's
+min_x/max_x/min_y/max_y (bounds that are not set are not checked);
+ungrouped tanks belong to no line and have no bounds.
+
+Tanks without width or length have no footprint and are skipped. A tank
+without depth is treated as extending over the whole z axis, so 2D layouts
+are checked on x and y only.
+
+Whole-plant validation loads the boxes into NumPy arrays and finds
+candidate pairs with sweep-and-prune on x: boxes are sorted by their x
+start, each box is paired with the following boxes that start before it
+ends (one np.searchsorted), and the y/z overlap of all candidate pairs is
+tested at once. After tank writes only their neighbourhoods are
+re-checked: the database returns the plant's tanks whose x range can reach
+a written tank (see sql/migrations/add_tank_layout_indexes.sql) and they
+are tested against it.
+
+Moves and resizes from the layout editor are written with one
+UPDATE ... FROM (VALUES ...) statement (one executemany on databases
+without UPDATE ... FROM VALUES support).
+
+Reflowing a line packs its tanks along x in one vectorized pass: each tank
+starts where the previous one ends plus the previous tank's space
+(x[i+1] = x[i] + width[i] + space[i], a cumulative sum). The tanks of a
+tank group stay together: blocks (a tank group or an ungrouped tank) are
+ordered by their leftmost x and tanks by x within a block. Anchored tanks
+keep their x and the tanks after them are packed from there.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Integer, cast, column, func, or_, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.line import Line
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+from .line_tanks import line_owns_tank
+
+# Upper bound for candidate pairs tested in one vectorized step
+MAX_PAIRS_PER_STEP = 1_000_000
+
+AXES = ("x", "y")
+
+POSITION_COLUMNS = ("x_position", "y_position", "z_position")
+SIZE_COLUMNS = ("width", "length", "depth")
+
+BOX_COLUMNS = (
+    Tank.id, Tank.x_position, Tank.y_position, Tank.z_position,
+    Tank.width, Tank.length, Tank.depth,
+    TankGroup.line_id, Line.min_x, Line.max_x, Line.min_y, Line.max_y,
+)
+
+
+class TankBoxes:
+    """Tank boxes as NumPy arrays, one row per tank (rows of BOX_COLUMNS)."""
+
+    def __init__(self, rows: Sequence[Sequence[Any]]):
+        data = np.array(rows, dtype=float).reshape(len(rows), len(BOX_COLUMNS))
+        size = data[:, 4:7]
+        placed = ~np.isnan(size[:, 0]) & ~np.isnan(size[:, 1])
+
+        self.skipped_ids = data[~placed, 0].astype(np.int64)
+        data = data[placed]
+        self.ids = data[:, 0].astype(np.int64)
+        self.lo = data[:, 1:4].copy()
+        self.hi = self.lo + data[:, 4:7]
+        no_depth = np.isnan(self.hi[:, 2])
+        self.lo[no_depth, 2] = -np.inf
+        self.hi[no_depth, 2] = np.inf
+        self.line_ids = data[:, 7]
+        # min_x, max_x, min_y, max_y; NaN (not set) never compares as a violation
+        self.bounds = data[:, 8:12]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def index_of(self, tank_id: int) -> int:
+        """Row of a tank, -1 if it is not in the boxes (or was skipped)"""
+        found = np.flatnonzero(self.ids == tank_id)
+        return int(found[0]) if found.size else -1
+
+    def collisions(self) -> List[List[int]]:
+        """Colliding tank id pairs (sweep-and-prune on x)"""
+        order = np.argsort(self.lo[:, 0], kind="stable")
+        ids, lo, hi = self.ids[order], self.lo[order], self.hi[order]
+
+        # Box i is a candidate with boxes i+1 .. end[i]-1, which start before it ends
+        start = np.arange(len(ids)) + 1
+        end = np.searchsorted(lo[:, 0], hi[:, 0], side="left")
+        counts = np.maximum(end - start, 0)
+
+        pairs: List[List[int]] = []
+        first_row = 0
+        while first_row < len(ids):
+            # Take as many boxes as fit in one step (always at least one)
+            totals = np.cumsum(counts[first_row:])
+            last_row = first_row + max(int(np.searchsorted(totals, MAX_PAIRS_PER_STEP, side="right")), 1)
+            step = counts[first_row:last_row]
+
+            first = np.repeat(np.arange(first_row, last_row), step)
+            offsets = np.arange(int(step.sum())) - np.repeat(np.cumsum(step) - step, step)
+            second = np.repeat(start[first_row:last_row], step) + offsets
+
+            overlap = np.all((lo[first] < hi[second]) & (lo[second] < hi[first]), axis=1)
+            pairs.extend(
+                sorted((int(a), int(b)))
+                for a, b in zip(ids[first[overlap]], ids[second[overlap]])
+            )
+            first_row = last_row
+        return sorted(pairs)
+
+    def collisions_of(self, row: int) -> List[int]:
+        """Ids of the tanks colliding with the tank on a row"""
+        overlap = np.all((self.lo < self.hi[row]) & (self.lo[row] < self.hi), axis=1)
+        overlap[row] = False
+        return sorted(int(tank_id) for tank_id in self.ids[overlap])
+
+    def out_of_bounds(self) -> np.ndarray:
+        """Boolean matrix (tank, axis in AXES): box outside its line bounds"""
+        return np.stack([
+            (self.lo[:, 0] < self.bounds[:, 0]) | (self.hi[:, 0] > self.bounds[:, 1]),
+            (self.lo[:, 1] < self.bounds[:, 2]) | (self.hi[:, 1] > self.bounds[:, 3]),
+        ], axis=1)
+
+
+class LayoutService:
+    """Service layer for validating and editing tank layouts."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _boxes_query(self, plant_id: int):
+        return (
+            select(*BOX_COLUMNS)
+            .select_from(Tank)
+            .outerjoin(TankGroup, TankGroup.id == Tank.tank_group_id)
+            .outerjoin(Line, Line.id == TankGroup.line_id)
+            .where(Tank.plant_id == plant_id)
+        )
+
+    async def validate_plant(self, plant_id: int) -> Dict[str, Any]:
+        """
+        Check every tank of a plant for collisions and line bound violations.
+
+        Returns:
+            Dictionary matching the LayoutValidation schema
+        """
+        rows = (await self.db.execute(self._boxes_query(plant_id))).all()
+        boxes = TankBoxes(rows)
+
+        collisions = [{"tank_id": a, "other_tank_id": b} for a, b in boxes.collisions()]
+        outside = boxes.out_of_bounds()
+        out_of_bounds = [
+            {
+                "tank_id": int(boxes.ids[row]),
+                "line_id": int(boxes.line_ids[row]),
+                "axes": [axis for axis, flag in zip(AXES, outside[row]) if flag],
+            }
+            for row in np.flatnonzero(outside.any(axis=1))
+        ]
+        return {
+            "plant_id": plant_id,
+            "tank_count": len(rows),
+            "valid": not collisions and not out_of_bounds,
+            "collisions": collisions,
+            "out_of_bounds": out_of_bounds,
+            "skipped_tank_ids": sorted(int(tank_id) for tank_id in boxes.skipped_ids),
+        }
+
+    async def check_tank(self, tank: Tank) -> Dict[str, List]:
+        """
+        Re-check the neighbourhood of one tank after it was written.
+
+        Returns:
+            {"collisions": colliding tank ids, "out_of_bounds": violated axes}
+        """
+        conflicts = await self.check_tanks([tank])
+        return conflicts.get(tank.id, {"collisions": [], "out_of_bounds": []})
+
+    async def check_tanks(self, tanks: Sequence[Tank]) -> Dict[int, Dict[str, List]]:
+        """
+        Re-check the neighbourhoods of written tanks.
+
+        Reads, per plant, only the tanks and the tanks whose x range can reach
+        one of them: a tank starting at x overlaps [x1, x2) on x only if
+        x1 - (widest tank of the plant) < x < x2. Overlapping [x1, x2) ranges
+        of the written tanks are merged into one.
+
+        Returns:
+            {tank id: {"collisions": colliding tank ids, "out_of_bounds": violated axes}}
+            for the written tanks that have a footprint
+        """
+        by_plant: Dict[int, List[Tank]] = {}
+        for tank in tanks:
+            if tank.width is not None and tank.length is not None:
+                by_plant.setdefault(tank.plant_id, []).append(tank)
+
+        result: Dict[int, Dict[str, List]] = {}
+        for plant_id, written in by_plant.items():
+            ranges: List[List[int]] = []
+            for x1, x2 in sorted((tank.x_position, tank.x_position + tank.width) for tank in written):
+                if ranges and x1 <= ranges[-1][1]:
+                    ranges[-1][1] = max(ranges[-1][1], x2)
+                else:
+                    ranges.append([x1, x2])
+            widest = func.coalesce(
+                select(func.max(Tank.width)).where(Tank.plant_id == plant_id).scalar_subquery(), 0
+            )
+            rows = (await self.db.execute(
+                self._boxes_query(plant_id).where(or_(
+                    Tank.id.in_([tank.id for tank in written]),
+                    *[(Tank.x_position < x2) & (Tank.x_position > x1 - widest) for x1, x2 in ranges]
+                ))
+            )).all()
+
+            boxes = TankBoxes(rows)
+            outside = boxes.out_of_bounds()
+            for tank in written:
+                row = boxes.index_of(tank.id)
+                if row >= 0:
+                    result[tank.id] = {
+                        "collisions": boxes.collisions_of(row),
+                        "out_of_bounds": [axis for axis, flag in zip(AXES, outside[row]) if flag],
+                    }
+        return result
+
+    async def plan_reflow(
+        self,
+        line: Line,
+        start_x: Optional[int] = None,
+        anchor_tank_ids: Iterable[int] = ()
+    ) -> Dict[str, Any]:
+        """
+        Compute packed x positions for the tanks of a line without changing anything.
+
+        Only the tanks the line owns are packed (see line_owns_tank()). The
+        first tank starts at start_x (default: the line's min_x, or the
+        leftmost tank if the line has no bounds).
+
+        Returns:
+            Dictionary matching the LineLayout schema (only moved tanks are
+            listed); "overlapping_anchor_ids" lists anchors that the packed
+            tanks before them run into, "unknown_anchor_ids" anchors that are
+            not tanks of the line
+        """
+        rows = (await self.db.execute(
+            select(
+                Tank.id, Tank.tank_group_id, Tank.x_position, Tank.y_position,
+                Tank.width, Tank.length, Tank.space
+            )
+            .select_from(Line)
+            .join(Tank, Tank.plant_id == Line.plant_id)
+            .outerjoin(TankGroup, TankGroup.id == Tank.tank_group_id)
+            .where(Line.id == line.id, line_owns_tank())
+        )).all()
+        anchors = set(anchor_tank_ids)
+        plan: Dict[str, Any] = {
+            "line_id": line.id,
+            "start_x": start_x,
+            "tank_count": len(rows),
+            "min_x": line.min_x,
+            "max_x": line.max_x,
+            "min_y": line.min_y,
+            "max_y": line.max_y,
+            "tanks": [],
+            "overlapping_anchor_ids": [],
+            "unknown_anchor_ids": sorted(anchors - {row.id for row in rows}),
+        }
+        if not rows:
+            return plan
+
+        data = np.array(rows, dtype=float)
+        ids = data[:, 0].astype(np.int64)
+        group = data[:, 1]
+        x = data[:, 2]
+        width = np.nan_to_num(data[:, 4])
+        step = width + np.nan_to_num(data[:, 6])
+
+        # Blocks: a tank group or an ungrouped tank, placed at its leftmost x
+        grouped = ~np.isnan(group)
+        block_x = x.copy()
+        block_id = np.where(grouped, group, -ids)
+        if grouped.any():
+            groups, inverse = np.unique(group[grouped], return_inverse=True)
+            group_x = np.full(len(groups), np.inf)
+            np.minimum.at(group_x, inverse, x[grouped])
+            block_x[grouped] = group_x[inverse]
+        order = np.lexsort((ids, x, block_id, block_x))
+        ids, x, width, step = ids[order], x[order], width[order], step[order]
+
+        if start_x is None:
+            start_x = line.min_x if line.min_x is not None else int(x.min())
+
+        # Segments start at the first tank and at every anchor
+        anchored = np.isin(ids, list(anchors))
+        segment = np.cumsum(anchored)
+        segment_start = np.concatenate(([0], np.flatnonzero(anchored)))
+        segment_x = np.concatenate(([start_x], x[anchored]))
+        offset = np.concatenate(([0], np.cumsum(step)[:-1]))
+        new_x = segment_x[segment] + offset - offset[segment_start[segment]]
+
+        after = np.flatnonzero(anchored[1:]) + 1
+        overlapping = after[new_x[after - 1] + width[after - 1] > new_x[after]]
+
+        y = data[:, 3]
+        y_end = y + np.nan_to_num(data[:, 5])
+        moved = np.flatnonzero(new_x != x)
+        plan.update({
+            "start_x": int(start_x),
+            "min_x": int(new_x.min()),
+            "max_x": int((new_x + width).max()),
+            "min_y": int(y.min()),
+            "max_y": int(y_end.max()),
+            "tanks": [
+                {"id": int(ids[i]), "old_x_position": int(x[i]), "new_x_position": int(new_x[i])}
+                for i in moved
+            ],
+            "overlapping_anchor_ids": [int(tank_id) for tank_id in ids[overlapping]],
+        })
+        return plan
+
+    async def apply_reflow(self, line: Line, plan: Dict[str, Any]) -> None:
+        """Write a computed reflow and the new line bounds (does not commit)"""
+        rows = [(tank["id"], tank["new_x_position"]) for tank in plan["tanks"]]
+        if rows:
+            if self.db.bind.dialect.name == "postgresql":
+                v = values(column("id", Integer), column("x_position", Integer), name="v").data(rows)
+                await self.db.execute(
+                    update(Tank).where(Tank.id == v.c.id).values(x_position=v.c.x_position)
+                    .execution_options(synchronize_session=False)
+                )
+            else:
+                await self.db.execute(update(Tank), [{"id": i, "x_position": x} for i, x in rows])
+
+        for bound in ("min_x", "max_x", "min_y", "max_y"):
+            setattr(line, bound, plan[bound])
+
+    async def move_tanks(self, changes: List[Dict[str, Any]]) -> List[Tank]:
+        """
+        Write new positions (and optionally sizes) of several tanks (does not commit).
+
+        Each change has the tank id, x/y/z_position and width/length/depth;
+        a size of None leaves it unchanged. The ids must exist.
+
+        Returns:
+            The updated tanks in the order of the changes
+        """
+        ids = [change["id"] for change in changes]
+
+        if self.db.bind.dialect.name == "postgresql":
+            names = ("id",) + POSITION_COLUMNS + SIZE_COLUMNS
+            v = values(*[column(name, Integer) for name in names], name="v").data(
+                [tuple(change[name] for name in names) for change in changes]
+            )
+            # A size column that is NULL on every row would be typed text: cast it back
+            sizes = {name: func.coalesce(cast(v.c[name], Integer), Tank.__table__.c[name]) for name in SIZE_COLUMNS}
+            tanks = (await self.db.execute(
+                update(Tank).where(Tank.id == v.c.id)
+                .values(**{name: v.c[name] for name in POSITION_COLUMNS}, **sizes)
+                .returning(Tank)
+                .execution_options(populate_existing=True, synchronize_session=False)
+            )).scalars().all()
+        else:
+            # ORM bulk UPDATE by primary key: one executemany per set of changed columns
+            await self.db.execute(update(Tank), [
+                {name: value for name, value in change.items() if value is not None}
+                for change in changes
+            ])
+            tanks = (await self.db.execute(
+                select(Tank).where(Tank.id.in_(ids)).execution_options(populate_existing=True)
+            )).scalars().all()
+
+        by_id = {tank.id: tank for tank in tanks}
+        return [by_id[tank_id] for tank_id in ids]
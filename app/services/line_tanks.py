@@ -0,0 +1,66 @@
+"""
+Line tank listing service.
+
+A line's tanks are the tanks of its tank groups plus the plant's ungrouped
+tanks. They are read with one joined query (tank rows located through the
+(plant_id, tank_group_id) index). GET /lines/{line_id}/tanks keeps them
+in the read cache (app/core/cache.py) per line, tagged with the line's
+plant, because the tank layout renderer asks for them on every redraw.
+Every tank, tank group or line write invalidates the tag of the plant it
+belongs to.
+
+The listing shows every ungrouped tank of the plant on each line. Services
+that rewrite a line's tanks (numbering, reflow) use the narrower
+line_owns_tank(): the tanks of the line's tank groups plus the ungrouped
+tanks inside the line's y band (min_y..max_y), so they never touch the
+tanks of the plant's other lines.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.line import Line
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+from ..schemas.tank import TankResponse
+
+
+def line_owns_tank():
+    """
+    Condition for the tanks a line owns, over Line, Tank and the tank's
+    TankGroup (outer joined). A line without a y band owns only the tanks
+    of its tank groups.
+    """
+    return or_(
+        TankGroup.line_id == Line.id,
+        and_(
+            Tank.tank_group_id.is_(None),
+            Tank.y_position >= Line.min_y,
+            Tank.y_position + func.coalesce(Tank.length, 0) <= Line.max_y,
+        ),
+    )
+
+
+class LineTanksService:
+    """Service layer for listing the tanks of a line."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_tanks(self, line_id: int) -> Tuple[List[TankResponse], Optional[int]]:
+        """Tanks of a line ordered by number, and the line's plant ID (None if the line does not exist)"""
+        rows = (await self.db.execute(
+            select(Line.plant_id, Tank)
+            .select_from(Line)
+            .outerjoin(Tank, Tank.plant_id == Line.plant_id)
+            .outerjoin(TankGroup, TankGroup.id == Tank.tank_group_id)
+            .where(
+                Line.id == line_id,
+                or_(Tank.id.is_(None), Tank.tank_group_id.is_(None), TankGroup.line_id == Line.id)
+            )
+            .order_by(Tank.number)
+        )).all()
+        if not rows:
+            return [], None
+        return [TankResponse.model_validate(tank) for _, tank in rows if tank is not None], rows[0][0]
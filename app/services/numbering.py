@@ -0,0 +1,123 @@
+"""
+Line numbering service.
+
+Numbers the tanks a line owns (the tanks of its tank groups and the
+ungrouped tanks inside its y band, see line_tanks.line_owns_tank()) as
+described in documentation/CSD_PLANT_STRUCTURE.md ("Numerointilogiikan
+tarkennus"):
+
+- Tanks are numbered consecutively from the start number (default: line
+  number + 1) in x_position order.
+- A tank group's number is the lowest number of its tanks and its name is
+  the name of that tank.
+
+The numbering is computed by the database with window functions in one
+query. Applying it updates each table with one
+UPDATE ... FROM (VALUES ...) statement (one executemany on databases
+without UPDATE ... FROM VALUES support) in the caller's transaction.
+"""
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Integer, String, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.line import Line
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+from .line_tanks import line_owns_tank
+
+
+class NumberingService:
+    """Service layer for numbering the tanks and tank groups of a line."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def plan(self, line: Line, start_number: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Compute the numbering of a line without changing anything.
+
+        Returns:
+            Dictionary matching the LineNumbering schema (only tanks and tank
+            groups whose number or name changes are listed)
+        """
+        start = start_number if start_number is not None else line.number + 1
+
+        numbered = (
+            select(
+                Tank.id,
+                Tank.name,
+                Tank.number,
+                Tank.tank_group_id,
+                TankGroup.number.label("group_number"),
+                TankGroup.name.label("group_name"),
+                (start - 1 + func.row_number().over(order_by=(Tank.x_position, Tank.id))).label("new_number"),
+            )
+            .select_from(Line)
+            .join(Tank, Tank.plant_id == Line.plant_id)
+            .outerjoin(TankGroup, TankGroup.id == Tank.tank_group_id)
+            .where(Line.id == line.id, line_owns_tank())
+            .subquery("numbered")
+        )
+        rows = (await self.db.execute(
+            select(
+                numbered,
+                func.min(numbered.c.new_number).over(partition_by=numbered.c.tank_group_id).label("new_group_number"),
+                func.first_value(numbered.c.name).over(
+                    partition_by=numbered.c.tank_group_id, order_by=numbered.c.new_number
+                ).label("new_group_name"),
+            ).order_by(numbered.c.new_number)
+        )).all()
+
+        tanks = [
+            {"id": row.id, "name": row.name, "old_number": row.number, "new_number": row.new_number}
+            for row in rows if row.number != row.new_number
+        ]
+        groups: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            if row.tank_group_id is None or row.tank_group_id in groups:
+                continue
+            if (row.group_number, row.group_name) != (row.new_group_number, row.new_group_name):
+                groups[row.tank_group_id] = {
+                    "id": row.tank_group_id,
+                    "old_number": row.group_number,
+                    "new_number": row.new_group_number,
+                    "old_name": row.group_name,
+                    "new_name": row.new_group_name,
+                }
+            else:
+                groups[row.tank_group_id] = None
+
+        return {
+            "line_id": line.id,
+            "start_number": start,
+            "tank_count": len(rows),
+            "tanks": tanks,
+            "tank_groups": [group for group in groups.values() if group is not None],
+        }
+
+    async def apply(self, plan: Dict[str, Any]) -> None:
+        """Write a computed numbering (does not commit)"""
+        tank_rows = [(tank["id"], tank["new_number"]) for tank in plan["tanks"]]
+        group_rows = [(group["id"], group["new_number"], group["new_name"]) for group in plan["tank_groups"]]
+
+        if self.db.bind.dialect.name == "postgresql":
+            if tank_rows:
+                v = values(column("id", Integer), column("number", Integer), name="v").data(tank_rows)
+                await self.db.execute(
+                    update(Tank).where(Tank.id == v.c.id).values(number=v.c.number)
+                    .execution_options(synchronize_session=False)
+                )
+            if group_rows:
+                v = values(column("id", Integer), column("number", Integer), column("name", String), name="v").data(group_rows)
+                await self.db.execute(
+                    update(TankGroup).where(TankGroup.id == v.c.id).values(number=v.c.number, name=v.c.name)
+                    .execution_options(synchronize_session=False)
+                )
+            return
+
+        # ORM bulk UPDATE by primary key: one executemany per table
+        if tank_rows:
+            await self.db.execute(update(Tank), [{"id": i, "number": n} for i, n in tank_rows])
+        if group_rows:
+            await self.db.execute(update(TankGroup), [{"id": i, "number": n, "name": name} for i, n, name in group_rows])
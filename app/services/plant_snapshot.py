@@ -0,0 +1,225 @@
+"""
+Plant snapshot export/import service.
+
+Exports a plant revision (plant row, lines, tank groups, tanks) in the
+binary format of app/utils/snapshot.py and imports such a snapshot as a
+new DRAFT revision.
+
+Export streams rows straight from database cursors into frames of
+FRAME_ROWS rows; import reads the request body frame by frame, inserts
+each frame with one executemany INSERT and keeps only the old id -> new id
+maps of lines and tank groups in memory.
+
+Imported frames are checked before anything is inserted: column names
+must be exported columns of the table and every value must match its
+column's type, length and nullability, so a malformed snapshot is
+rejected with 400 instead of failing in the database driver.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Column, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import AsyncSessionLocal
+from ..models.line import Line
+from ..models.plant import Plant
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+from ..utils.snapshot import SnapshotReader, SnapshotWriter
+
+FRAME_ROWS = 2000
+INTEGER_RANGE = range(-2**31, 2**31)  # INTEGER columns are 32-bit on PostgreSQL
+
+PLANT_COLUMNS = ["name", "town", "country", "revision", "revision_name", "created_by"]
+
+# Frame type -> (model, parent foreign key column or None)
+TABLES = {
+    "lines": (Line, None),
+    "tank_groups": (TankGroup, "line_id"),
+    "tanks": (Tank, "tank_group_id"),
+}
+
+
+def _snapshot_columns(model) -> List[str]:
+    """Exported columns of a child table: everything but plant_id and timestamps"""
+    return [
+        column.name for column in model.__table__.columns
+        if column.name not in ("plant_id", "created_at", "updated_at")
+    ]
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Invalid snapshot: {detail}")
+
+
+def _frame_columns(frame: Dict[str, Any], model, allowed: Sequence[str]) -> List[Column]:
+    """Columns of a frame; the names must be exported columns of the model, each listed once"""
+    names = frame.get("columns")
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise _invalid(f"{frame['type']} frame has no column list")
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise _invalid(f"unknown {frame['type']} columns: {', '.join(unknown)}")
+    if len(set(names)) != len(names):
+        raise _invalid(f"duplicate {frame['type']} columns")
+    return [model.__table__.c[name] for name in names]
+
+
+def _valid_value(column: Column, value: Any) -> bool:
+    if value is None:
+        return column.nullable
+    expected = column.type.python_type
+    if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+        return False
+    if expected is int:
+        return value in INTEGER_RANGE
+    length = getattr(column.type, "length", None)
+    return not (length and len(value) > length)
+
+
+def _check_row(frame_type: str, columns: List[Column], values: Any) -> None:
+    """Raise 400 unless the row has one value of the right type per column"""
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise _invalid(f"{frame_type} row does not match its columns")
+    for column, value in zip(columns, values):
+        if not _valid_value(column, value):
+            raise _invalid(f"invalid {frame_type}.{column.name} value {value!r:.50}")
+
+
+async def stream_snapshot(plant_id: int, compress: bool) -> AsyncIterator[bytes]:
+    """Snapshot bytes of a plant revision, read in its own session (outlives the request handler)"""
+    async with AsyncSessionLocal() as db:
+        async for chunk in PlantSnapshotService(db).export(plant_id, compress):
+            yield chunk
+
+
+class PlantSnapshotService:
+    """Service layer for plant snapshot export and import."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def export(self, plant_id: int, compress: bool = False) -> AsyncIterator[bytes]:
+        """
+        Yield a snapshot of a plant revision.
+
+        On PostgreSQL all tables are read in one REPEATABLE READ transaction
+        so the snapshot is consistent even while the plant is being edited.
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            await self.db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+        writer = SnapshotWriter(compress)
+        yield writer.header()
+
+        plant = (await self.db.execute(
+            select(*[Plant.__table__.c[name] for name in PLANT_COLUMNS]).where(Plant.id == plant_id)
+        )).first()
+        if plant is None:
+            return
+        yield writer.frame({"type": "plant", "columns": PLANT_COLUMNS, "row": list(plant)})
+
+        counts = {}
+        for frame_type, (model, _) in TABLES.items():
+            columns = _snapshot_columns(model)
+            result = await self.db.stream(
+                select(*[model.__table__.c[name] for name in columns])
+                .where(model.plant_id == plant_id)
+                .order_by(model.id)
+                .execution_options(yield_per=FRAME_ROWS)
+            )
+            counts[frame_type] = 0
+            async for rows in result.partitions(FRAME_ROWS):
+                counts[frame_type] += len(rows)
+                yield writer.frame({"type": frame_type, "columns": columns, "rows": [list(row) for row in rows]})
+
+        yield writer.frame({"type": "end", "counts": counts})
+        yield writer.finish()
+
+    async def import_snapshot(
+        self,
+        customer_id: int,
+        reader: SnapshotReader,
+        revision_name: Optional[str] = None,
+        created_by: Optional[str] = None
+    ) -> Plant:
+        """
+        Insert a snapshot as a new DRAFT revision of the customer's plant.
+
+        The revision number continues the plant's existing revisions (a plant
+        the customer does not have yet starts at 1). Does not commit.
+        """
+        frame = await reader.next_frame()
+        if frame is None or frame["type"] != "plant":
+            raise _invalid("plant frame missing")
+        columns = _frame_columns(frame, Plant, PLANT_COLUMNS)
+        _check_row("plant", columns, frame.get("row"))
+        source = dict(zip(frame["columns"], frame["row"]))
+        if not source.get("name"):
+            raise _invalid("plant name missing")
+
+        max_revision = (await self.db.execute(
+            select(func.max(Plant.revision)).where(Plant.customer_id == customer_id, Plant.name == source["name"])
+        )).scalar()
+
+        new_plant = Plant(
+            customer_id=customer_id,
+            name=source["name"],
+            town=source.get("town"),
+            country=source.get("country"),
+            revision=(max_revision or 0) + 1,
+            revision_name=revision_name or source.get("revision_name") or "Imported revision",
+            created_from_revision=source.get("revision"),
+            is_active_revision=False,
+            revision_status="DRAFT",
+            created_by=created_by or source.get("created_by") or "system"
+        )
+        self.db.add(new_plant)
+        await self.db.flush()
+
+        id_maps: Dict[str, Dict[int, int]] = {"lines": {}, "tank_groups": {}}
+        parent_maps = {"tank_groups": id_maps["lines"], "tanks": id_maps["tank_groups"]}
+        counts = {frame_type: 0 for frame_type in TABLES}
+
+        while True:
+            frame = await reader.next_frame()
+            if frame is None:
+                raise _invalid("end frame missing")
+            if frame["type"] == "end":
+                if frame.get("counts", counts) != counts:
+                    raise _invalid("row counts do not match")
+                break
+            if frame["type"] not in TABLES:
+                continue  # Unknown frame types from newer writers are skipped
+
+            model, parent_column = TABLES[frame["type"]]
+            columns = _frame_columns(frame, model, _snapshot_columns(model))
+            if not isinstance(frame.get("rows"), list):
+                raise _invalid(f"{frame['type']} frame has no rows")
+            rows = []
+            old_ids = []
+            for values in frame["rows"]:
+                _check_row(frame["type"], columns, values)
+                row = dict(zip(frame["columns"], values))
+                old_ids.append(row.pop("id", None))
+                if parent_column and row.get(parent_column) is not None:
+                    try:
+                        row[parent_column] = parent_maps[frame["type"]][row[parent_column]]
+                    except KeyError:
+                        raise _invalid(f"{frame['type']} row references unknown {parent_column}")
+                row["plant_id"] = new_plant.id
+                rows.append(row)
+            if not rows:
+                continue
+            counts[frame["type"]] += len(rows)
+
+            if frame["type"] in id_maps:
+                new_ids = (await self.db.execute(
+                    insert(model).returning(model.id, sort_by_parameter_order=True), rows
+                )).scalars().all()
+                id_maps[frame["type"]].update(zip(old_ids, new_ids))
+            else:
+                await self.db.execute(insert(model), rows)
+
+        return new_plant
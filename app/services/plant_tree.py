@@ -0,0 +1,69 @@
+"""
+Plant tree service.
+
+Reads a plant revision with its lines, tank groups and tanks for drawing
+the plant in one request. Each level is one query (plant, lines, tank
+groups, tanks: at most four queries however large the plant is); rows are
+read as plain mappings and the nested tree is assembled in one pass.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.line import Line
+from ..models.plant import Plant
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+
+# Depths: 0 = plant, 1 = + lines, 2 = + tank groups, 3 = + tanks
+MAX_DEPTH = 3
+
+
+class PlantTreeService:
+    """Service layer for reading a plant hierarchy."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _rows(self, model, where, *order_by) -> List[Dict[str, Any]]:
+        result = await self.db.execute(select(model.__table__).where(where).order_by(*order_by))
+        return [dict(row) for row in result.mappings()]
+
+    async def get_tree(self, plant_id: int, depth: int = MAX_DEPTH) -> Optional[Dict[str, Any]]:
+        """
+        Plant revision as a nested dictionary matching the PlantTree schema.
+
+        Levels below depth are left out (None). Returns None if the plant
+        does not exist.
+        """
+        plants = await self._rows(Plant, Plant.id == plant_id)
+        if not plants:
+            return None
+        tree = plants[0]
+        if depth < 1:
+            return tree
+
+        lines = await self._rows(Line, Line.plant_id == plant_id, Line.number, Line.id)
+        tree["lines"] = lines
+        if depth < 2:
+            return tree
+
+        groups = await self._rows(TankGroup, TankGroup.plant_id == plant_id, TankGroup.number, TankGroup.id)
+        groups_by_line = {line["id"]: [] for line in lines}
+        for group in groups:
+            groups_by_line.setdefault(group["line_id"], []).append(group)
+        for line in lines:
+            line["tank_groups"] = groups_by_line[line["id"]]
+        if depth < 3:
+            return tree
+
+        tanks = await self._rows(Tank, Tank.plant_id == plant_id, Tank.number, Tank.id)
+        tanks_by_group = {group["id"]: [] for group in groups}
+        tanks_by_group[None] = []
+        for tank in tanks:
+            tanks_by_group.setdefault(tank["tank_group_id"], []).append(tank)
+        for group in groups:
+            group["tanks"] = tanks_by_group[group["id"]]
+        tree["ungrouped_tanks"] = tanks_by_group[None]
+        return tree
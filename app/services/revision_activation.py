@@ -0,0 +1,134 @@
+"""
+Plant revision activation service.
+
+Only one revision of a plant (customer_id + name) may be active. Activation
+archives the current active revision and activates the target with
+set-based UPDATEs in one transaction; the partial unique index from
+sql/migrations/add_single_active_revision_index.sql enforces the rule when
+activations race.
+
+On PostgreSQL activation is a single statement:
+
+- `target` locks the revision being activated (FOR UPDATE) and reports its
+  status before the change.
+- `deactivated` archives the other active revision of the same plant.
+- `activated` activates the target. Its `(SELECT count(*) FROM
+  deactivated) >= 0` condition is always true but makes PostgreSQL finish
+  the deactivation before activating, so the unique index never sees two
+  active rows inside the statement.
+- `pointer` upserts the plant_active_revision row of the plant.
+
+Other databases (SQLite test runs) run the same steps as separate
+statements within one transaction.
+"""
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..models.plant import Plant
+from ..models.plant_active_revision import PlantActiveRevision
+from .active_revision import ActiveRevisionService
+
+ACTIVATABLE_STATUS = "DRAFT"
+
+
+class RevisionActivationService:
+    """Service layer for activating plant revisions."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def activate(self, plant_id: int) -> Optional[Tuple[Optional[str], Optional[Plant]]]:
+        """
+        Activate a DRAFT revision and archive the plant's current active revision.
+
+        Does not commit; an IntegrityError on flush or commit means a
+        concurrent activation of the same plant won.
+
+        Returns:
+            None if the revision does not exist, otherwise (status before
+            activation, activated revision). The revision is None if its
+            status was anything but DRAFT, including NULL.
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            return await self._activate_single_statement(plant_id)
+        return await self._activate_statements(plant_id)
+
+    async def _activate_single_statement(self, plant_id: int) -> Optional[Tuple[Optional[str], Optional[Plant]]]:
+        target = select(
+            Plant.id, Plant.customer_id, Plant.name, Plant.revision_status
+        ).where(Plant.id == plant_id).with_for_update().cte("target")
+
+        deactivated = update(Plant).where(
+            Plant.customer_id == target.c.customer_id,
+            Plant.name == target.c.name,
+            Plant.is_active_revision == True,
+            Plant.id != target.c.id,
+            target.c.revision_status == ACTIVATABLE_STATUS
+        ).values(
+            is_active_revision=False,
+            revision_status="ARCHIVED",
+            updated_at=func.now()
+        ).returning(Plant.id).cte("deactivated")
+
+        activated = update(Plant).where(
+            Plant.id == target.c.id,
+            target.c.revision_status == ACTIVATABLE_STATUS,
+            select(func.count()).select_from(deactivated).scalar_subquery() >= 0
+        ).values(
+            is_active_revision=True,
+            revision_status="ACTIVE",
+            updated_at=func.now()
+        ).returning(*Plant.__table__.c).cte("activated")
+
+        upsert = pg_insert(PlantActiveRevision).from_select(
+            ["customer_id", "name", "plant_id"],
+            select(activated.c.customer_id, activated.c.name, activated.c.id)
+        )
+        pointer = upsert.on_conflict_do_update(
+            index_elements=[PlantActiveRevision.customer_id, PlantActiveRevision.name],
+            set_={"plant_id": upsert.excluded.plant_id, "updated_at": func.now()}
+        ).cte("pointer")
+
+        activated_plant = aliased(Plant, activated)
+        row = (await self.db.execute(
+            select(target.c.revision_status, activated_plant)
+            .add_cte(pointer)
+            .select_from(target)
+            .outerjoin(activated, true())
+            .execution_options(populate_existing=True)
+        )).first()
+        if row is None:
+            return None
+        return row[0], row[1]
+
+    async def _activate_statements(self, plant_id: int) -> Optional[Tuple[Optional[str], Optional[Plant]]]:
+        target = (await self.db.execute(
+            select(Plant.customer_id, Plant.name, Plant.revision_status)
+            .where(Plant.id == plant_id).with_for_update()
+        )).first()
+        if target is None:
+            return None
+        if target.revision_status != ACTIVATABLE_STATUS:
+            return target.revision_status, None
+
+        await self.db.execute(
+            update(Plant).where(
+                Plant.customer_id == target.customer_id,
+                Plant.name == target.name,
+                Plant.is_active_revision == True,
+                Plant.id != plant_id
+            ).values(is_active_revision=False, revision_status="ARCHIVED", updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        activated = (await self.db.execute(
+            update(Plant).where(Plant.id == plant_id)
+            .values(is_active_revision=True, revision_status="ACTIVE", updated_at=func.now())
+            .returning(Plant)
+            .execution_options(populate_existing=True, synchronize_session=False)
+        )).scalars().first()
+        await ActiveRevisionService(self.db).set_pointer(target.customer_id, target.name, plant_id)
+        return target.revision_status, activated
@@ -0,0 +1,152 @@
+"""
+Plant revision copy service.
+
+A new revision gets its own copy of every line, tank group and tank of the
+source revision (see documentation/CSD_PLANT_STRUCTURE.md). Rows are copied
+set-wise with INSERT ... SELECT so the number of round trips does not
+depend on the size of the plant:
+
+- PostgreSQL: one statement. New ids are drawn from the table sequences in
+  "source" CTEs, which therefore hold the old id -> new id mapping, and
+  chained data-modifying CTEs insert lines, tank groups and tanks.
+- Other databases (SQLite test runs): new ids are the old ids shifted past
+  the current maximum id of each table, one INSERT ... SELECT per table.
+
+Both run inside the caller's transaction; the caller commits.
+"""
+from typing import Dict, List
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.line import Line
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+
+# Columns that are never copied: new ids and timestamps come from the database
+_SKIPPED_COLUMNS = {"id", "created_at", "updated_at"}
+
+
+def _copied_columns(model, remapped: List[str]) -> List[str]:
+    """Names of the columns copied as-is (everything but ids, timestamps and remapped foreign keys)"""
+    return [
+        column.name for column in model.__table__.columns
+        if column.name not in _SKIPPED_COLUMNS and column.name not in remapped
+    ]
+
+
+class RevisionCopyService:
+    """Service layer for copying a plant revision's hierarchy."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def copy_hierarchy(self, source_plant_id: int, target_plant_id: int) -> Dict[str, int]:
+        """
+        Copy all lines, tank groups and tanks of one plant revision to another.
+
+        Tank groups are re-pointed to the copied lines and tanks to the copied
+        tank groups; ungrouped tanks stay ungrouped.
+
+        Args:
+            source_plant_id: Plant revision to copy from
+            target_plant_id: Newly created (flushed) plant revision to copy into
+
+        Returns:
+            Number of copied rows per table
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            return await self._copy_with_ctes(source_plant_id, target_plant_id)
+        return await self._copy_with_offsets(source_plant_id, target_plant_id)
+
+    async def _copy_with_ctes(self, source_plant_id: int, target_plant_id: int) -> Dict[str, int]:
+        line_columns = _copied_columns(Line, ["plant_id"])
+        group_columns = _copied_columns(TankGroup, ["plant_id", "line_id"])
+        tank_columns = _copied_columns(Tank, ["plant_id", "tank_group_id"])
+
+        # Volatile nextval() forces the source CTEs to be materialized once,
+        # so every reference sees the same old id -> new id pairs
+        src_line = select(
+            Line.id.label("old_id"),
+            func.nextval(func.pg_get_serial_sequence("line", "id")).label("new_id"),
+            *[Line.__table__.c[name] for name in line_columns]
+        ).where(Line.plant_id == source_plant_id).cte("src_line")
+
+        ins_line = insert(Line).from_select(
+            ["id", "plant_id"] + line_columns,
+            select(src_line.c.new_id, literal(target_plant_id), *[src_line.c[name] for name in line_columns])
+        ).returning(Line.id).cte("ins_line")
+
+        src_group = select(
+            TankGroup.id.label("old_id"),
+            func.nextval(func.pg_get_serial_sequence("tank_group", "id")).label("new_id"),
+            src_line.c.new_id.label("new_line_id"),
+            *[TankGroup.__table__.c[name] for name in group_columns]
+        ).join(src_line, src_line.c.old_id == TankGroup.line_id).where(
+            TankGroup.plant_id == source_plant_id
+        ).cte("src_group")
+
+        ins_group = insert(TankGroup).from_select(
+            ["id", "plant_id", "line_id"] + group_columns,
+            select(
+                src_group.c.new_id, literal(target_plant_id), src_group.c.new_line_id,
+                *[src_group.c[name] for name in group_columns]
+            )
+        ).returning(TankGroup.id).cte("ins_group")
+
+        ins_tank = insert(Tank).from_select(
+            ["plant_id", "tank_group_id"] + tank_columns,
+            select(
+                literal(target_plant_id), src_group.c.new_id,
+                *[Tank.__table__.c[name] for name in tank_columns]
+            ).select_from(Tank).outerjoin(
+                src_group, src_group.c.old_id == Tank.tank_group_id
+            ).where(Tank.plant_id == source_plant_id)
+        ).returning(Tank.id).cte("ins_tank")
+
+        counts = (await self.db.execute(select(
+            select(func.count()).select_from(ins_line).scalar_subquery().label("lines"),
+            select(func.count()).select_from(ins_group).scalar_subquery().label("tank_groups"),
+            select(func.count()).select_from(ins_tank).scalar_subquery().label("tanks"),
+        ))).one()
+        return dict(counts._mapping)
+
+    async def _copy_with_offsets(self, source_plant_id: int, target_plant_id: int) -> Dict[str, int]:
+        line_columns = _copied_columns(Line, ["plant_id"])
+        group_columns = _copied_columns(TankGroup, ["plant_id", "line_id"])
+        tank_columns = _copied_columns(Tank, ["plant_id", "tank_group_id"])
+
+        offsets = (await self.db.execute(select(
+            select(func.coalesce(func.max(Line.id), 0)).scalar_subquery(),
+            select(func.coalesce(func.max(TankGroup.id), 0)).scalar_subquery(),
+        ))).one()
+        line_offset, group_offset = offsets
+
+        lines = await self.db.execute(insert(Line).from_select(
+            ["id", "plant_id"] + line_columns,
+            select(Line.id + line_offset, literal(target_plant_id), *[Line.__table__.c[name] for name in line_columns])
+            .where(Line.plant_id == source_plant_id)
+        ))
+        groups = await self.db.execute(insert(TankGroup).from_select(
+            ["id", "plant_id", "line_id"] + group_columns,
+            select(
+                TankGroup.id + group_offset, literal(target_plant_id), TankGroup.line_id + line_offset,
+                *[TankGroup.__table__.c[name] for name in group_columns]
+            ).join(Line, Line.id == TankGroup.line_id).where(
+                TankGroup.plant_id == source_plant_id,
+                Line.plant_id == source_plant_id
+            )
+        ))
+        # Tanks whose group was not copied end up ungrouped, as in the CTE version
+        copied_group = TankGroup.__table__.alias("copied_group")
+        tanks = await self.db.execute(insert(Tank).from_select(
+            ["plant_id", "tank_group_id"] + tank_columns,
+            select(
+                literal(target_plant_id), copied_group.c.id,
+                *[Tank.__table__.c[name] for name in tank_columns]
+            ).select_from(Tank).outerjoin(
+                copied_group,
+                (copied_group.c.id == Tank.tank_group_id + group_offset) & (copied_group.c.plant_id == target_plant_id)
+            ).where(Tank.plant_id == source_plant_id)
+        ))
+        return {"lines": lines.rowcount, "tank_groups": groups.rowcount, "tanks": tanks.rowcount}
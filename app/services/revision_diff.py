@@ -0,0 +1,262 @@
+"""
+Plant revision diff service.
+
+Compares the lines, tank groups and tanks of two plant revisions. Copied
+revisions have new ids, so rows are matched by content:
+
+1. Every revision is loaded with one query per table.
+2. Each tank gets a content hash, and each tank group and line a subtree
+   hash over its own fields and its children's hashes (a Merkle tree).
+   Subtrees whose hashes match on both sides are unchanged and are
+   skipped as a whole.
+3. The remaining rows are paired in stages: each stage buckets the
+   unmatched rows by a looser key (same number, same position, ...) and
+   pairs rows from equal buckets. Rows left over are added or removed.
+
+Every stage is a dictionary pass, so a diff runs in near-linear time in
+the size of the revisions.
+"""
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.line import Line
+from ..models.tank import Tank
+from ..models.tank_group import TankGroup
+
+LINE_FIELDS = ("number", "min_x", "max_x", "min_y", "max_y")
+GROUP_FIELDS = ("name", "number")
+TANK_FIELDS = ("name", "number", "width", "length", "depth", "x_position", "y_position", "z_position", "space")
+
+# Changed field -> reported change type; "parent" is the containing line or tank group
+CHANGE_TYPES = {
+    "number": "renumbered",
+    "parent": "moved",
+    "x_position": "moved",
+    "y_position": "moved",
+    "z_position": "moved",
+    "width": "resized",
+    "length": "resized",
+    "depth": "resized",
+    "min_x": "resized",
+    "max_x": "resized",
+    "min_y": "resized",
+    "max_y": "resized",
+}
+
+
+class _Node:
+    """One line, tank group or tank of a loaded revision."""
+
+    __slots__ = ("id", "parent_id", "values", "hash", "children")
+
+    def __init__(self, row, fields: Sequence[str], parent_id: Optional[int]):
+        self.id = row.id
+        self.parent_id = parent_id
+        self.values = tuple(getattr(row, field) for field in fields)
+        self.hash = hash(self.values)
+        self.children: List["_Node"] = []
+
+    def seal(self) -> None:
+        """Fold the children's hashes into this node's subtree hash"""
+        self.hash = hash((self.values, tuple(sorted(child.hash for child in self.children))))
+
+
+class _Revision:
+    """Revision hierarchy loaded in bulk."""
+
+    def __init__(self, lines, groups, tanks):
+        self.lines = {row.id: _Node(row, LINE_FIELDS, None) for row in lines}
+        self.groups = {row.id: _Node(row, GROUP_FIELDS, row.line_id) for row in groups}
+        self.tanks = {row.id: _Node(row, TANK_FIELDS, row.tank_group_id) for row in tanks}
+        for tank in self.tanks.values():
+            if tank.parent_id in self.groups:
+                self.groups[tank.parent_id].children.append(tank)
+        for group in self.groups.values():
+            group.seal()
+            if group.parent_id in self.lines:
+                self.lines[group.parent_id].children.append(group)
+        for line in self.lines.values():
+            line.seal()
+
+
+def _match(
+    old: Dict[int, _Node],
+    new: Dict[int, _Node],
+    stages: Sequence[Callable[[_Node, str], Any]],
+    pairs: Dict[int, int]
+) -> None:
+    """
+    Pair unmatched nodes stage by stage; pairs maps old id -> new id.
+
+    A stage key receives the node and its side ("old" or "new"). Nodes with
+    equal keys are paired in id order.
+    """
+    matched_new = set(pairs.values())
+    for key in stages:
+        buckets = defaultdict(deque)
+        for node_id in sorted(new):
+            if node_id not in matched_new:
+                buckets[key(new[node_id], "new")].append(node_id)
+        for node_id in sorted(old):
+            if node_id in pairs:
+                continue
+            bucket = buckets.get(key(old[node_id], "old"))
+            if bucket:
+                new_id = bucket.popleft()
+                pairs[node_id] = new_id
+                matched_new.add(new_id)
+
+
+def _mark_subtree(old: _Node, new: _Node, pairs: Dict[int, int]) -> None:
+    """Pair the children of two identical subtrees in order"""
+    for old_child, new_child in zip(
+        sorted(old.children, key=lambda n: (n.hash, n.id)),
+        sorted(new.children, key=lambda n: (n.hash, n.id))
+    ):
+        pairs[old_child.id] = new_child.id
+
+
+class RevisionDiffService:
+    """Service layer for structural comparison of plant revisions."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _load(self, plant_id: int) -> _Revision:
+        lines = (await self.db.execute(
+            select(Line.id, *[Line.__table__.c[f] for f in LINE_FIELDS]).where(Line.plant_id == plant_id)
+        )).all()
+        groups = (await self.db.execute(
+            select(TankGroup.id, TankGroup.line_id, *[TankGroup.__table__.c[f] for f in GROUP_FIELDS])
+            .where(TankGroup.plant_id == plant_id)
+        )).all()
+        tanks = (await self.db.execute(
+            select(Tank.id, Tank.tank_group_id, *[Tank.__table__.c[f] for f in TANK_FIELDS])
+            .where(Tank.plant_id == plant_id)
+        )).all()
+        return _Revision(lines, groups, tanks)
+
+    async def compare(self, from_plant_id: int, to_plant_id: int) -> Dict[str, Any]:
+        """
+        Structural diff between two plant revisions.
+
+        Returns:
+            Dictionary matching the RevisionDiff schema: a summary with the
+            number of changes per type and one entry per changed line, tank
+            group or tank
+        """
+        old = await self._load(from_plant_id)
+        new = await self._load(to_plant_id)
+
+        line_pairs: Dict[int, int] = {}
+        group_pairs: Dict[int, int] = {}
+        tank_pairs: Dict[int, int] = {}
+
+        # Lines: identical subtrees first, then by number, then by bounds
+        _match(old.lines, new.lines, [
+            lambda n, side: ("subtree", n.hash),
+            lambda n, side: n.values[0],
+            lambda n, side: n.values[1:],
+        ], line_pairs)
+        for old_id, new_id in line_pairs.items():
+            if old.lines[old_id].hash == new.lines[new_id].hash:
+                _mark_subtree(old.lines[old_id], new.lines[new_id], group_pairs)
+
+        def group_parent(node: _Node, side: str):
+            return line_pairs.get(node.parent_id, ("unmatched", node.parent_id)) if side == "old" else node.parent_id
+
+        _match(old.groups, new.groups, [
+            lambda n, side: (n.hash, group_parent(n, side)),
+            lambda n, side: ("subtree", n.hash),
+            lambda n, side: (n.values[0], group_parent(n, side)),
+            lambda n, side: (n.values[1], group_parent(n, side)) if n.values[1] is not None else ("none", side, n.id),
+            lambda n, side: ("number", n.values[1]) if n.values[1] is not None else ("none", side, n.id),
+            lambda n, side: ("name", n.values[0]),
+        ], group_pairs)
+        for old_id, new_id in group_pairs.items():
+            if old.groups[old_id].hash == new.groups[new_id].hash:
+                _mark_subtree(old.groups[old_id], new.groups[new_id], tank_pairs)
+
+        def tank_parent(node: _Node, side: str):
+            if node.parent_id is None:
+                return None
+            return group_pairs.get(node.parent_id, ("unmatched", node.parent_id)) if side == "old" else node.parent_id
+
+        def numbered(value, node: _Node, side: str):
+            # Unnumbered tanks (new lines) must not all pair up on number None
+            return value if node.values[1] is not None else ("none", side, node.id)
+
+        _match(old.tanks, new.tanks, [
+            lambda n, side: (n.values, tank_parent(n, side)),
+            lambda n, side: ("content", n.values),
+            lambda n, side: numbered((n.values[1], tank_parent(n, side)), n, side),
+            lambda n, side: numbered(("number", n.values[1]), n, side),
+            lambda n, side: ("shape+position", n.values[2:8]),
+            lambda n, side: ("position", n.values[5:8]),
+            lambda n, side: ("shape+parent", n.values[2:5], tank_parent(n, side)),
+        ], tank_pairs)
+
+        changes: List[Dict[str, Any]] = []
+        changes += self._changes("line", LINE_FIELDS, old.lines, new.lines, line_pairs, None)
+        changes += self._changes("tank_group", GROUP_FIELDS, old.groups, new.groups, group_pairs, line_pairs)
+        changes += self._changes("tank", TANK_FIELDS, old.tanks, new.tanks, tank_pairs, group_pairs)
+
+        summary: Dict[str, int] = defaultdict(int)
+        for change in changes:
+            for change_type in change["change_types"]:
+                summary[change_type] += 1
+
+        return {
+            "from_revision_id": from_plant_id,
+            "to_revision_id": to_plant_id,
+            "identical": not changes,
+            "summary": dict(summary),
+            "changes": changes,
+        }
+
+    @staticmethod
+    def _changes(
+        kind: str,
+        fields: Sequence[str],
+        old: Dict[int, _Node],
+        new: Dict[int, _Node],
+        pairs: Dict[int, int],
+        parent_pairs: Optional[Dict[int, int]]
+    ) -> List[Dict[str, Any]]:
+        """Change entries of one table, given the matched pairs"""
+        def entry(change_types, old_node, new_node, field_changes):
+            node = new_node or old_node
+            values = dict(zip(fields, node.values))
+            return {
+                "kind": kind,
+                "change_types": change_types,
+                "from_id": old_node.id if old_node else None,
+                "to_id": new_node.id if new_node else None,
+                "name": values.get("name"),
+                "number": values.get("number"),
+                "fields": field_changes,
+            }
+
+        result = []
+        for old_id, new_id in pairs.items():
+            old_node, new_node = old[old_id], new[new_id]
+            field_changes: Dict[str, Tuple[Any, Any]] = {
+                field: (a, b) for field, a, b in zip(fields, old_node.values, new_node.values) if a != b
+            }
+            if parent_pairs is not None:
+                expected_parent = (
+                    parent_pairs.get(old_node.parent_id, ("unmatched",)) if old_node.parent_id is not None else None
+                )
+                if expected_parent != new_node.parent_id:
+                    field_changes["parent"] = (old_node.parent_id, new_node.parent_id)
+            if field_changes:
+                change_types = sorted({CHANGE_TYPES.get(field, "modified") for field in field_changes})
+                result.append(entry(change_types, old_node, new_node, field_changes))
+
+        matched_new = set(pairs.values())
+        result += [entry(["removed"], node, None, {}) for node_id, node in old.items() if node_id not in pairs]
+        result += [entry(["added"], None, node, {}) for node_id, node in new.items() if node_id not in matched_new]
+        return result
@@ -0,0 +1,51 @@
+"""
+Tank number uniqueness.
+
+Tank numbers are unique within a tank group; numbers of ungrouped tanks are
+unique within their plant. The single-tank endpoints and the batch endpoint
+check numbers with these helpers, so a tank is accepted or rejected the
+same way on both paths.
+"""
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.tank import Tank
+
+NumberScope = Tuple[str, int]
+
+
+def number_scope(tank_group_id: Optional[int], plant_id: int) -> NumberScope:
+    """Scope in which a tank's number must be unique: its tank group, or its plant if ungrouped"""
+    if tank_group_id is not None:
+        return ("group", tank_group_id)
+    return ("plant", plant_id)
+
+
+def in_number_scopes(scopes: Iterable[NumberScope]):
+    """Condition matching the tanks of the given number scopes"""
+    scopes = set(scopes)
+    group_ids = sorted(scope_id for kind, scope_id in scopes if kind == "group")
+    plant_ids = sorted(scope_id for kind, scope_id in scopes if kind == "plant")
+    return or_(
+        Tank.tank_group_id.in_(group_ids),
+        and_(Tank.tank_group_id.is_(None), Tank.plant_id.in_(plant_ids)),
+    )
+
+
+async def number_taken(
+    db: AsyncSession,
+    number: int,
+    tank_group_id: Optional[int],
+    plant_id: int,
+    exclude_tank_id: Optional[int] = None
+) -> bool:
+    """True if another tank in the same number scope already has this number"""
+    query = select(Tank.id).where(
+        Tank.number == number,
+        in_number_scopes([number_scope(tank_group_id, plant_id)])
+    )
+    if exclude_tank_id is not None:
+        query = query.where(Tank.id != exclude_tank_id)
+    return (await db.execute(query.limit(1))).first() is not None
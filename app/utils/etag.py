@@ -0,0 +1,76 @@
+"""
+Conditional GET support (ETag / If-None-Match).
+
+The ETag of a read endpoint is derived from a watermark of the rows it
+returns instead of from the serialized body: for each table involved,
+max(coalesce(updated_at, created_at)), count(*) and max(id) over the rows
+in scope. Updates move the timestamp (microsecond precision on
+PostgreSQL), inserts and deletes change the count or the max id. All
+scopes are read in one aggregate query, so a matching If-None-Match is
+answered with 304 Not Modified before the endpoint's own queries run.
+
+The request path and query string are part of the tag because they select
+what the body contains (filters, limit, cursor).
+"""
+import hashlib
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _watermark_columns(model, criteria):
+    stamp = func.coalesce(model.updated_at, model.created_at)
+    return select(
+        func.max(stamp).label("stamp"),
+        func.count().label("rows"),
+        func.max(model.id).label("max_id")
+    ).select_from(model).where(*criteria).subquery()
+
+
+async def watermark_etag(db: AsyncSession, request: Request, *scopes: Tuple[Any, ...]) -> str:
+    """
+    Weak ETag for a request over the given scopes.
+
+    Each scope is (model, *where criteria), e.g. (Line, Line.plant_id == 5).
+    """
+    subqueries = [_watermark_columns(model, criteria) for model, *criteria in scopes]
+    query = select(*[column for subquery in subqueries for column in subquery.c]).select_from(subqueries[0])
+    for subquery in subqueries[1:]:
+        query = query.join(subquery, true())  # One aggregate row each
+    row = (await db.execute(query)).one()
+    digest = hashlib.sha1(
+        repr((request.url.path, request.url.query, tuple(row))).encode()
+    ).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches the ETag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+async def conditional_get(
+    db: AsyncSession,
+    request: Request,
+    response: Response,
+    *scopes: Tuple[Any, ...]
+) -> Optional[Response]:
+    """
+    Set the ETag header of a read endpoint.
+
+    Returns a 304 response to send instead of the body if the client's copy
+    is current, otherwise None (the endpoint continues as usual).
+    """
+    etag = await watermark_etag(db, request, *scopes)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
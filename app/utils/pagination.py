@@ -0,0 +1,73 @@
+"""
+Keyset (cursor) pagination helpers
+
+List endpoints order by (sort_key, id) and continue after the last row of
+the previous page instead of using OFFSET, so every page costs the same
+index range scan. The cursor is an opaque URL-safe token encoding the sort
+values of the last returned row and is sent back in the X-Next-Cursor
+response header.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+T = TypeVar("T")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort values into an opaque cursor token"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor token, raising 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_paginate(query: Select, columns: Sequence, cursor: Optional[str], limit: int) -> Select:
+    """
+    Apply keyset ordering, the cursor position and the page size to a query.
+
+    Args:
+        query: Select to paginate
+        columns: Sort columns; the last one must be unique (normally the primary key)
+        cursor: Cursor from the previous page's X-Next-Cursor header, if any
+        limit: Page size; one extra row is fetched to detect the next page
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        if len(columns) == 1:
+            query = query.where(columns[0] > values[0])
+        else:
+            query = query.where(tuple_(*columns) > tuple_(*values))
+    return query.order_by(*columns).limit(limit + 1)
+
+
+def finish_page(items: Sequence[T], limit: int, key: Callable[[T], Sequence[Any]], response: Response) -> List[T]:
+    """
+    Trim the look-ahead row and set X-Next-Cursor when another page exists.
+
+    Args:
+        items: Rows returned by a query built with keyset_paginate
+        limit: Page size passed to keyset_paginate
+        key: Returns the sort values of a row, in the same order as the sort columns
+        response: Response whose headers receive the next cursor
+    """
+    page = list(items[:limit])
+    if len(items) > limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(page[-1]))
+    return page
@@ -0,0 +1,124 @@
+"""
+Plant snapshot binary format
+
+A snapshot is a header followed by length-prefixed msgpack frames:
+
+    header:  MAGIC (6 bytes) | format version (1 byte) | flags (1 byte)
+    frame:   payload length (4 bytes, big-endian) | msgpack payload
+
+With FLAG_ZSTD set, everything after the header is one zstd stream.
+
+Frames are maps with a "type" key: one "plant" frame, then "lines",
+"tank_groups" and "tanks" frames (in that order, rows as lists in the
+order of the frame's "columns"), and a final "end" frame with row counts.
+Large tables are split over several frames so neither side has to hold a
+whole table in memory.
+"""
+import struct
+from typing import Any, AsyncIterator, Dict, Optional
+
+import msgpack
+from fastapi import HTTPException
+
+try:
+    import zstandard
+except ImportError:  # Optional: snapshots are written uncompressed without it
+    zstandard = None
+
+MAGIC = b"CSDSNP"
+FORMAT_VERSION = 1
+FLAG_ZSTD = 0x01
+HEADER = struct.Struct(">6sBB")
+FRAME_LENGTH = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+MEDIA_TYPE = "application/vnd.csd.plant-snapshot"
+
+
+def compression_available() -> bool:
+    """Whether zstd compression can be used"""
+    return zstandard is not None
+
+
+class SnapshotWriter:
+    """Encodes snapshot bytes: header() first, then frame() per frame, then finish()."""
+
+    def __init__(self, compress: bool = False):
+        if compress and zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        self.compress = compress
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj() if compress else None
+
+    def header(self) -> bytes:
+        return HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_ZSTD if self.compress else 0)
+
+    def frame(self, payload: Dict[str, Any]) -> bytes:
+        packed = msgpack.packb(payload, use_bin_type=True)
+        data = FRAME_LENGTH.pack(len(packed)) + packed
+        return self._compressor.compress(data) if self._compressor else data
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+
+class SnapshotReader:
+    """Decodes frames from an async stream of snapshot bytes (e.g. a request body)."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._buffer = bytearray()
+        self._decompressor = None
+        self._header_read = False
+
+    async def _fill(self, size: int) -> bool:
+        """Read until the buffer holds `size` bytes; False if the stream ended first"""
+        while len(self._buffer) < size:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return False
+            if self._decompressor is not None:
+                chunk = self._decompressor.decompress(chunk)
+            self._buffer += chunk
+        return True
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def _read_header(self) -> None:
+        if not await self._fill(HEADER.size):
+            raise HTTPException(status_code=400, detail="Invalid snapshot: missing header")
+        magic, version, flags = HEADER.unpack(self._take(HEADER.size))
+        if magic != MAGIC:
+            raise HTTPException(status_code=400, detail="Invalid snapshot: not a plant snapshot")
+        if version > FORMAT_VERSION:
+            raise HTTPException(status_code=400, detail=f"Unsupported snapshot format version {version}")
+        if flags & FLAG_ZSTD:
+            if zstandard is None:
+                raise HTTPException(status_code=400, detail="Snapshot is zstd-compressed but zstandard is not installed")
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+            self._buffer = bytearray(self._decompressor.decompress(bytes(self._buffer)))
+        self._header_read = True
+
+    async def next_frame(self) -> Optional[Dict[str, Any]]:
+        """Next decoded frame, or None at the end of the stream"""
+        if not self._header_read:
+            await self._read_header()
+        if not await self._fill(FRAME_LENGTH.size):
+            if self._buffer:
+                raise HTTPException(status_code=400, detail="Invalid snapshot: truncated frame")
+            return None
+        (length,) = FRAME_LENGTH.unpack(self._take(FRAME_LENGTH.size))
+        if length > MAX_FRAME_SIZE:
+            raise HTTPException(status_code=400, detail="Invalid snapshot: frame too large")
+        if not await self._fill(length):
+            raise HTTPException(status_code=400, detail="Invalid snapshot: truncated frame")
+        try:
+            frame = msgpack.unpackb(self._take(length), raw=False)
+        except (msgpack.UnpackException, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid snapshot: corrupt frame")
+        if not isinstance(frame, dict) or "type" not in frame:
+            raise HTTPException(status_code=400, detail="Invalid snapshot: corrupt frame")
+        return frame
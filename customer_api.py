@@ -18,7 +18,7 @@ def can_delete_customer(customer_id: int, db: Session = Depends(get_db)):
 
 from fastapi import FastAPI, HTTPException, Depends, Body
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, text, Boolean, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, text, Boolean, ForeignKey, insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from pydantic import BaseModel
@@ -448,38 +448,42 @@ def create_line(line: LineCreate, db: Session = Depends(get_db)):
         max_y=max_y
     )
     db.add(new_line)
-    db.commit()
-    db.refresh(new_line)
-
-    # Luo tank_groupit ja tankit
-    tank_group_number = 101
+    db.flush()
+
+    # Luo tank_groupit ja tankit joukkolisäyksinä samassa transaktiossa
+    groups = db.execute(
+        insert(TankGroup).returning(TankGroup.id, TankGroup.number),
+        [
+            {
+                "name": "Not named",
+                "line_id": new_line.id,
+                "number": 101 + group_idx,
+                "plant_id": new_line.plant_id
+            }
+            for group_idx in range(line.tank_group_count)
+        ]
+    ).all() if line.tank_group_count > 0 else []
+
+    tank_rows = []
     tank_number = 101
-    for group_idx in range(line.tank_group_count):
-        tank_group = TankGroup(
-            name="Not named",  # Korjattu group_name -> name
-            line_id=new_line.id,
-            number=tank_group_number,  # Korjattu tank_group_number -> number
-            plant_id=new_line.plant_id
-        )
-        db.add(tank_group)
-        db.commit()
-        db.refresh(tank_group)
-
+    for group_id, _ in sorted(groups, key=lambda group: group.number):
         for tank_idx in range(line.tanks_per_group):
-            tank = Tank(
-                tank_group_id=tank_group.id,
-                name="Not named",  # Korjattu tank_name -> name
-                number=tank_number,  # Korjattu tank_number -> number
-                width=line.tank_width,
-                length=line.tank_length,
-                depth=line.tank_depth,
-                space=line.tank_space,  # Lisätään space kenttä
-                plant_id=new_line.plant_id
-            )
-            db.add(tank)
+            tank_rows.append({
+                "tank_group_id": group_id,
+                "name": "Not named",
+                "number": tank_number,
+                "width": line.tank_width,
+                "length": line.tank_length,
+                "depth": line.tank_depth,
+                "space": line.tank_space,
+                "plant_id": new_line.plant_id
+            })
             tank_number += 1
-        tank_group_number += 1
+    if tank_rows:
+        db.execute(insert(Tank), tank_rows)
+
     db.commit()
+    db.refresh(new_line)
     return new_line
 
 @app.get("/devices", response_model=_List[DeviceOut])
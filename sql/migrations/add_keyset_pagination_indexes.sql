@@ -0,0 +1,28 @@
+-- ==================================================
+-- INDEXES FOR KEYSET (CURSOR) PAGINATION
+-- ==================================================
+--
+-- List endpoints order by (sort_key, id) and continue from the last row
+-- of the previous page: WHERE (name, id) > (:name, :id) ORDER BY name, id.
+-- These composite indexes let every page be a single index range scan.
+--
+-- CONCURRENTLY cannot run inside a transaction block: run each
+-- statement separately (autocommit) in DBeaver.
+--
+
+-- GET /customers
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_customer_name_id ON customer (name, id);
+
+-- GET /plants
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_plant_name_id ON plant (name, id);
+
+-- GET /customers/{customer_id}/plants
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_plant_customer_name_id ON plant (customer_id, name, id);
+
+-- GET /plants/{plant_id}/lines
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_line_plant_number_id ON line (plant_id, number, id);
+
+-- GET /tanks and GET /tank-groups order by id (primary key); the filters
+-- use these indexes and then walk ids in order
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_plant_id ON tank (plant_id, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_group_plant_id ON tank_group (plant_id, id);
@@ -0,0 +1,22 @@
+-- ==================================================
+-- INDEXES FOR LINE TANK LISTING
+-- ==================================================
+--
+-- GET /lines/{line_id}/tanks reads a line's tanks with one joined query:
+--
+--   FROM line
+--   LEFT JOIN tank ON tank.plant_id = line.plant_id
+--   LEFT JOIN tank_group ON tank_group.id = tank.tank_group_id
+--   WHERE line.id = :line_id
+--     AND (tank.tank_group_id IS NULL OR tank_group.line_id = line.id)
+--   ORDER BY tank.number
+--
+-- The composite index serves the plant lookup and covers the group test;
+-- tank_group rows are fetched by primary key.
+--
+-- CONCURRENTLY cannot run inside a transaction block: run each
+-- statement separately (autocommit) in DBeaver.
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_plant_group_number ON tank (plant_id, tank_group_id, number);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_group_line_id ON tank_group (line_id, id);
@@ -0,0 +1,26 @@
+-- ==================================================
+-- ONE ACTIVE REVISION PER PLANT
+-- ==================================================
+--
+-- Revision activation (PUT /plants/{plant_id}/revisions/activate) archives
+-- the current active revision and activates the new one in a single
+-- statement. This partial unique index guarantees that concurrent
+-- activations can never leave two active revisions of the same plant
+-- (customer_id + name); the losing transaction gets a unique violation
+-- and the API retries it once.
+--
+-- Check for existing duplicates before creating the index:
+--
+--   SELECT customer_id, name, count(*)
+--   FROM plant
+--   WHERE is_active_revision
+--   GROUP BY customer_id, name
+--   HAVING count(*) > 1;
+--
+-- CONCURRENTLY cannot run inside a transaction block: run the statement
+-- separately (autocommit) in DBeaver.
+--
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_plant_one_active_revision
+    ON plant (customer_id, name)
+    WHERE is_active_revision;
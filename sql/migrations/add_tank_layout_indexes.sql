@@ -0,0 +1,20 @@
+-- ==================================================
+-- INDEXES FOR TANK LAYOUT VALIDATION
+-- ==================================================
+--
+-- After a tank is created or updated, only its neighbourhood is checked
+-- for collisions (app/services/layout.py):
+--
+--   WHERE tank.plant_id = :plant_id
+--     AND tank.x_position < :x2
+--     AND tank.x_position > :x1 - (SELECT max(width) FROM tank WHERE plant_id = :plant_id)
+--
+-- idx_tank_plant_x_position serves the x range scan and
+-- idx_tank_plant_width answers the max(width) subquery from the index.
+--
+-- CONCURRENTLY cannot run inside a transaction block: run each
+-- statement separately (autocommit) in DBeaver.
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_plant_x_position ON tank (plant_id, x_position);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_plant_width ON tank (plant_id, width);
@@ -0,0 +1,26 @@
+-- ==================================================
+-- TRIGRAM INDEXES FOR FUZZY NAME SEARCH
+-- ==================================================
+--
+-- The search parameter of GET /customers, /plants, /tanks and
+-- /tank-groups matches names with pg_trgm (similarity % and
+-- word_similarity <%), so typos like "Acne" still find "Acme".
+-- GIN trigram indexes answer both operators and ILIKE '%term%'.
+--
+-- CONCURRENTLY cannot run inside a transaction block: run each
+-- statement separately (autocommit) in DBeaver.
+--
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- GET /customers?search=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_customer_name_trgm ON customer USING gin (name gin_trgm_ops);
+
+-- GET /plants?search=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_plant_name_trgm ON plant USING gin (name gin_trgm_ops);
+
+-- GET /tanks?search=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_name_trgm ON tank USING gin (name gin_trgm_ops);
+
+-- GET /tank-groups?search=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tank_group_name_trgm ON tank_group USING gin (name gin_trgm_ops);
@@ -0,0 +1,25 @@
+-- ==================================================
+-- ACTIVE REVISION POINTER TABLE
+-- ==================================================
+--
+-- plant_active_revision maps a plant (customer_id + name) to its active
+-- revision so the lookup is a primary key fetch. The API keeps it in sync
+-- with plant.is_active_revision in the same transaction (plant create,
+-- revision activation, rename); deleting a plant or customer removes the
+-- pointer through ON DELETE CASCADE.
+--
+
+CREATE TABLE IF NOT EXISTS plant_active_revision (
+    customer_id INTEGER NOT NULL REFERENCES customer(id) ON DELETE CASCADE,
+    name VARCHAR NOT NULL,
+    plant_id INTEGER NOT NULL UNIQUE REFERENCES plant(id) ON DELETE CASCADE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    PRIMARY KEY (customer_id, name)
+);
+
+-- Backfill from the current active revisions
+INSERT INTO plant_active_revision (customer_id, name, plant_id)
+SELECT customer_id, name, id
+FROM plant
+WHERE is_active_revision
+ON CONFLICT (customer_id, name) DO NOTHING;
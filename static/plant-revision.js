@@ -37,7 +37,7 @@ async function loadAndDisplayPlantRevisions(plantId) {
     const resp = await fetch(`${API_BASE}/plants/${plantId}/revisions`);
     if (!resp.ok) throw new Error('Failed to load revisions');
     let revisions = await resp.json();
-    revisions = revisions.filter(r => r.status === 'DRAFT');
+    revisions = revisions.filter(r => r.revision_status === 'DRAFT');
     if (revisions.length === 0) {
       list.innerHTML = '<div class="text-muted">Ei keskeneräisiä revisioita.</div>';
       return;
@@ -49,8 +49,9 @@ async function loadAndDisplayPlantRevisions(plantId) {
       item.type = 'button';
       item.innerHTML = `
         <i class="bi bi-file-earmark-text"></i>
-        <span style="flex:1;">Revisio ${rev.revision_number || ''}</span>
-        <span class="badge bg-secondary">${rev.status}</span>
+        <span style="flex:1;">Revisio ${rev.revision || ''} ${rev.revision_name || ''}</span>
+        <small class="text-muted">${rev.line_count ?? 0} linjaa, ${rev.tank_count ?? 0} allasta</small>
+        <span class="badge bg-secondary">${rev.revision_status}</span>
       `;
       item.onclick = () => selectPlantRevision(rev);
       list.appendChild(item);
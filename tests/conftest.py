@@ -0,0 +1,69 @@
+"""
+Shared fixtures for the API tests.
+
+The tests run the application against a temporary SQLite database (the
+async routers use aiosqlite). DATABASE_URL is set before the app is
+imported, since the engines are created at import time.
+"""
+import os
+import tempfile
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix="csd-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.core.cache import read_cache  # noqa: E402
+from app.database import Base, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import tank as tank_model, tank_group as tank_group_model  # noqa: E402,F401  (register the tables)
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+event.listen(engine, "connect", _enable_foreign_keys)
+event.listen(async_engine.sync_engine, "connect", _enable_foreign_keys)
+
+
+@pytest.fixture
+def client():
+    """Test client over an empty database and empty in-process caches"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    read_cache.clear()
+    read_cache.reset_stats()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def ok(response, status_code=200):
+    """Assert the status code and return the JSON body"""
+    assert response.status_code == status_code, (response.status_code, response.text)
+    return response.json() if response.content else None
+
+
+@pytest.fixture
+def customer(client):
+    return ok(client.post("/customers", json={"name": "Acme", "town": "Turku", "country": "Finland"}))
+
+
+@pytest.fixture
+def plant(client, customer):
+    return ok(client.post("/plants", json={"name": "Plant 1", "customer_id": customer["id"]}))
+
+
+@pytest.fixture
+def line(client, plant):
+    """Line with five 1000 mm wide tanks spaced 100 mm apart"""
+    return ok(client.post("/lines", json={
+        "plant_id": plant["id"], "number": 100, "count": 5,
+        "width": 1000, "length": 2000, "depth": 1500, "gap": 100,
+        "x_position": 0, "y_position": 0, "z_position": 0,
+    }))
@@ -0,0 +1,108 @@
+"""Batch edits and delete checks."""
+from tests.conftest import ok
+
+
+def test_batch_resolves_temp_ids(client, plant, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    result = ok(client.post("/batch/", json={"operations": [
+        {"op": "create", "entity": "tank_group", "temp_id": "g1",
+         "data": {"name": "BG", "number": 150, "plant_id": plant["id"], "line_id": line["id"]}},
+        {"op": "create", "entity": "tank", "temp_id": "t1", "tank_group_temp_id": "g1",
+         "data": {"name": "BT1", "number": 1, "plant_id": plant["id"]}},
+        {"op": "update", "entity": "tank", "id": tanks[-1]["id"], "tank_group_temp_id": "g1",
+         "data": {"number": 2, "name": "moved"}},
+        {"op": "delete", "entity": "tank", "id": tanks[-2]["id"]},
+    ]}))
+    assert (result["created"], result["updated"], result["deleted"]) == (2, 1, 1)
+    assert set(result["ids"]) == {"g1", "t1"}
+
+    group = ok(client.get(f"/tank-groups/{result['ids']['g1']}"))
+    assert sorted((t["name"], t["number"]) for t in group["tanks"]) == [("BT1", 1), ("moved", 2)]
+    assert client.get(f"/tanks/{tanks[-2]['id']}").status_code == 404
+
+
+def test_batch_is_all_or_nothing(client, plant):
+    response = client.post("/batch/", json={"operations": [
+        {"op": "create", "entity": "tank", "data": {"name": "kept?", "plant_id": plant["id"]}},
+        {"op": "update", "entity": "tank", "id": 999999, "data": {}},
+    ]})
+    assert response.status_code == 404
+    assert ok(client.get("/tanks/", params={"plant_id": plant["id"]})) == []
+
+
+def test_batch_rejects_unknown_temp_ids_and_duplicate_numbers(client, plant, line):
+    unknown = client.post("/batch/", json={"operations": [
+        {"op": "create", "entity": "tank", "tank_group_temp_id": "nope", "data": {"name": "x", "plant_id": plant["id"]}}
+    ]})
+    assert unknown.status_code == 400
+
+    result = ok(client.post("/batch/", json={"operations": [
+        {"op": "create", "entity": "tank_group", "temp_id": "g",
+         "data": {"name": "G", "number": 1, "plant_id": plant["id"], "line_id": line["id"]}},
+        {"op": "create", "entity": "tank", "temp_id": "a", "tank_group_temp_id": "g",
+         "data": {"name": "a", "number": 1, "plant_id": plant["id"]}},
+        {"op": "create", "entity": "tank", "temp_id": "b", "tank_group_temp_id": "g",
+         "data": {"name": "b", "number": 2, "plant_id": plant["id"]}},
+    ]}))
+    duplicate = client.post("/batch/", json={"operations": [
+        {"op": "create", "entity": "tank",
+         "data": {"name": "c", "number": 2, "tank_group_id": result["ids"]["g"], "plant_id": plant["id"]}}
+    ]})
+    assert duplicate.status_code == 400
+
+    # Swapping numbers inside one batch is allowed
+    ok(client.post("/batch/", json={"operations": [
+        {"op": "update", "entity": "tank", "id": result["ids"]["a"], "data": {"number": 2}},
+        {"op": "update", "entity": "tank", "id": result["ids"]["b"], "data": {"number": 1}},
+    ]}))
+
+
+def test_ungrouped_tank_numbers_are_unique_per_plant_on_both_paths(client, customer, plant):
+    other_plant = ok(client.post("/plants", json={"name": "Plant 2", "customer_id": customer["id"]}))
+    ok(client.post("/tanks/", json={"name": "a", "number": 5, "plant_id": plant["id"]}), 201)
+
+    def create_single(plant_id):
+        return client.post("/tanks/", json={"name": "b", "number": 5, "plant_id": plant_id})
+
+    def create_batch(plant_id):
+        return client.post("/batch/", json={"operations": [
+            {"op": "create", "entity": "tank", "data": {"name": "b", "number": 5, "plant_id": plant_id}}
+        ]})
+
+    # Same number in the same plant: rejected by both paths
+    assert create_single(plant["id"]).status_code == create_batch(plant["id"]).status_code == 400
+    # Same number in another plant: accepted by both paths
+    ok(create_single(other_plant["id"]), 201)
+    ok(client.delete(f"/tanks/{ok(client.get('/tanks/', params={'plant_id': other_plant['id']}))[0]['id']}"), 204)
+    ok(create_batch(other_plant["id"]))
+
+    # Moving a tank into a plant whose ungrouped tanks already use its number
+    moved = ok(client.get("/tanks/", params={"plant_id": other_plant["id"]}))[0]
+    assert client.put(f"/tanks/{moved['id']}", json={"plant_id": plant["id"]}).status_code == 400
+
+
+def test_can_delete_checks(client, customer, plant, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    group = ok(client.post("/tank-groups/", json={
+        "name": "G", "number": 1, "plant_id": plant["id"], "line_id": line["id"]
+    }), 201)
+    empty_group = ok(client.post("/tank-groups/", json={
+        "name": "E", "number": 2, "plant_id": plant["id"], "line_id": line["id"]
+    }), 201)
+    ok(client.put(f"/tanks/{tanks[0]['id']}", json={"tank_group_id": group["id"]}))
+
+    assert not ok(client.get(f"/tank-groups/{group['id']}/can-delete"))["can_delete"]
+    assert ok(client.get(f"/tank-groups/{empty_group['id']}/can-delete"))["can_delete"]
+    assert client.get("/tank-groups/99999/can-delete").status_code == 404
+
+    result = ok(client.post("/batch/can-delete", json={
+        "customer_ids": [customer["id"], 4242],
+        "plant_ids": [plant["id"]],
+        "line_ids": [line["id"]],
+        "tank_group_ids": [group["id"], empty_group["id"]],
+    }))
+    assert not result["customers"][str(customer["id"])]["can_delete"]
+    assert not result["customers"]["4242"]["exists"]
+    assert result["plants"][str(plant["id"])]["counts"] == {"lines": 1, "tank_groups": 2, "tanks": 5}
+    assert result["lines"][str(line["id"])]["counts"] == {"tank_groups": 2, "tanks": 1}
+    assert [result["tank_groups"][str(g["id"])]["can_delete"] for g in (group, empty_group)] == [False, True]
@@ -0,0 +1,47 @@
+"""Customer endpoints: CRUD, keyset cursors and search."""
+from tests.conftest import ok
+
+
+def test_create_get_update_delete(client):
+    created = ok(client.post("/customers", json={"name": "Acme", "town": "Turku"}))
+    assert ok(client.get(f"/customers/{created['id']}"))["name"] == "Acme"
+
+    updated = ok(client.put(f"/customers/{created['id']}", json={"country": "Finland"}))
+    assert updated["town"] == "Turku" and updated["country"] == "Finland"
+
+    ok(client.delete(f"/customers/{created['id']}"))
+    assert client.get(f"/customers/{created['id']}").status_code == 404
+
+
+def test_keyset_cursor_pages_cover_all_rows_in_order(client):
+    names = [f"Customer {i:02d}" for i in range(7)]
+    for name in reversed(names):
+        ok(client.post("/customers", json={"name": name}))
+
+    seen, cursor = [], None
+    while True:
+        response = client.get("/customers", params={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        seen += [c["name"] for c in ok(response)]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == names
+
+
+def test_cursor_skips_equal_names_by_id(client):
+    ids = [ok(client.post("/customers", json={"name": "Same"}))["id"] for _ in range(3)]
+    first = client.get("/customers", params={"limit": 2})
+    second = client.get("/customers", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [c["id"] for c in ok(first) + ok(second)] == ids
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/customers", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_search_tolerates_typos(client):
+    for name in ("Acme", "Fabrication Oy", "Zeta"):
+        ok(client.post("/customers", json={"name": name}))
+    assert [c["name"] for c in ok(client.get("/customers", params={"search": "Acmee"}))][0] == "Acme"
+    assert [c["name"] for c in ok(client.get("/customers", params={"search": "fabric"}))] == ["Fabrication Oy"]
@@ -0,0 +1,56 @@
+"""Async engine, pool metrics, per-request SQL statistics and the slow-query log."""
+from app.core.instrumentation import RequestQueryStats, statement_shape
+from app.core.slow_queries import SlowQueryLog, explain_prefix
+from app.database import get_async_database_url
+from tests.conftest import ok
+
+
+def test_async_database_url():
+    assert get_async_database_url("sqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    assert get_async_database_url("postgresql://u:p@h/db?sslmode=require") == \
+        "postgresql+psycopg://u:p@h/db?sslmode=require"
+
+
+def test_pool_metrics(client):
+    status = ok(client.get("/health/db-pool"))
+    assert status["async_engine"]["pool_class"] == "TimedAsyncAdaptedQueuePool"
+    assert {"size", "checked_out", "idle", "overflow", "wait"} <= set(status["async_engine"])
+    assert status["replica"]["configured"] is False
+
+
+def test_query_count_headers(client, line):
+    response = client.get(f"/lines/{line['id']}/tanks")
+    assert int(response.headers["X-DB-Queries"]) >= 1
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_repeated_statement_shapes():
+    stats = RequestQueryStats("GET /lines/1/tanks")
+    for tank_id in range(5):
+        stats.record(f"SELECT * FROM tank WHERE id = {tank_id}", 0.001)
+    stats.record("SELECT * FROM line WHERE id IN (1, 2, 3)", 0.001)
+    assert stats.count == 6
+    assert stats.repeated_shapes(5) == [("SELECT * FROM tank WHERE id = ?", 5)]
+    assert statement_shape("SELECT * FROM t WHERE id IN (:a, :b)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_slow_query_log_keeps_newest_entries():
+    log = SlowQueryLog(threshold_ms=0, max_entries=2, explain=False)
+    for n in range(3):
+        log.record(f"SELECT {n}", (n,), 0.5, False, "sqlite")
+    entries = log.entries()
+    assert [e["statement"] for e in entries] == ["SELECT 2", "SELECT 1"]
+    assert entries[0]["parameters"] == "(2,)" and entries[0]["plan"] is None
+
+
+def test_only_plain_selects_are_explained_with_analyze():
+    assert explain_prefix("  select id from tank where plant_id = %(p)s") == "EXPLAIN (ANALYZE, BUFFERS) "
+    for statement in (
+        "SELECT id FROM plant WHERE id = 1 FOR UPDATE",
+        "SELECT id FROM plant WHERE id = 1\nFOR NO KEY UPDATE OF plant",
+        "SELECT id FROM plant FOR SHARE SKIP LOCKED",
+        "SELECT * INTO plant_copy FROM plant",
+        "WITH moved AS (UPDATE tank SET x_position = 0 RETURNING id) SELECT * FROM moved",
+        "UPDATE tank SET number = 1",
+    ):
+        assert explain_prefix(statement) == "EXPLAIN ", statement
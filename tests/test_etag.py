@@ -0,0 +1,48 @@
+"""Conditional GET: ETag / If-None-Match on read endpoints."""
+import pytest
+
+from tests.conftest import ok
+
+
+@pytest.fixture
+def urls(client, customer, plant, line):
+    tank_id = line["tanks"][0]["id"]
+    return [
+        "/customers", f"/customers/{customer['id']}", "/plants", f"/plants/{plant['id']}",
+        f"/customers/{customer['id']}/plants", f"/plants/{plant['id']}/tree", f"/plants/{plant['id']}/tank-groups",
+        f"/plants/{plant['id']}/lines", f"/lines/{line['id']}", f"/lines/{line['id']}/tanks",
+        f"/tanks/?plant_id={plant['id']}", f"/tanks/{tank_id}", "/tank-groups/",
+    ]
+
+
+def test_matching_etag_returns_304(client, urls):
+    for url in urls:
+        response = client.get(url)
+        ok(response)
+        etag = response.headers["ETag"]
+        not_modified = client.get(url, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304, url
+        assert not_modified.content == b"" and not_modified.headers["ETag"] == etag
+
+
+def test_etag_changes_after_insert(client, plant, line):
+    url = f"/lines/{line['id']}/tanks"
+    etag = client.get(url).headers["ETag"]
+    ok(client.post("/tanks/", json={"name": "new", "plant_id": plant["id"]}), 201)
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    etag = client.get("/customers").headers["ETag"]
+    ok(client.post("/customers", json={"name": "Another"}))
+    response = client.get("/customers", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+
+def test_etag_depends_on_query_string(client, customer):
+    assert client.get("/customers?limit=1").headers["ETag"] != client.get("/customers?limit=2").headers["ETag"]
+
+
+def test_wildcard_and_list_if_none_match(client, customer):
+    etag = client.get("/customers").headers["ETag"]
+    assert client.get("/customers", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/customers", headers={"If-None-Match": f'W/"other", {etag}'}).status_code == 304
+    assert client.get("/customers", headers={"If-None-Match": 'W/"other"'}).status_code == 200
@@ -0,0 +1,73 @@
+"""Tank layout: collision and bounds checks, bulk position updates."""
+from tests.conftest import ok
+
+
+def test_layout_validation_finds_collisions(client, plant, line):
+    assert ok(client.get(f"/plants/{plant['id']}/layout/validation"))["valid"]
+
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    response = client.put(f"/tanks/{tanks[1]['id']}", json={"x_position": tanks[0]["x_position"] + 10})
+    ok(response)
+    assert str(tanks[0]["id"]) in response.headers["X-Layout-Collisions"]
+
+    validation = ok(client.get(f"/plants/{plant['id']}/layout/validation"))
+    assert not validation["valid"]
+    assert {frozenset((c["tank_id"], c["other_tank_id"])) for c in validation["collisions"]} == {
+        frozenset((tanks[0]["id"], tanks[1]["id"]))
+    }
+
+
+def test_update_without_collision_has_no_layout_headers(client, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    response = client.put(f"/tanks/{tanks[0]['id']}", json={"name": "renamed"})
+    ok(response)
+    assert "X-Layout-Collisions" not in response.headers
+
+
+def test_bulk_position_update(client, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    moved = ok(client.put("/tanks/positions", json={"tanks": [
+        {"id": tanks[0]["id"], "x_position": 50000, "y_position": 1, "z_position": 2, "width": 777},
+        {"id": tanks[1]["id"], "x_position": 70000, "y_position": 1, "z_position": 2},
+    ]}))
+    assert [(t["x_position"], t["width"]) for t in moved] == [(50000, 777), (70000, tanks[1]["width"])]
+    assert ok(client.get(f"/tanks/{tanks[0]['id']}"))["x_position"] == 50000
+
+
+def test_bulk_position_update_rejects_unknown_and_duplicate_ids(client, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    position = {"x_position": 0, "y_position": 0, "z_position": 0}
+    assert client.put("/tanks/positions", json={"tanks": [{"id": 999999, **position}]}).status_code == 404
+    assert client.put("/tanks/positions", json={"tanks": [{"id": tanks[0]["id"], **position}] * 2}).status_code == 400
+
+
+def test_bulk_position_update_reports_conflicts(client, plant, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    group = ok(client.post("/tank-groups/", json={
+        "name": "G", "number": 1, "plant_id": plant["id"], "line_id": line["id"]
+    }), 201)
+    ok(client.put(f"/tanks/{tanks[4]['id']}", json={"tank_group_id": group["id"]}))
+    ok(client.put(f"/lines/{line['id']}", json={"number": 100, "min_x": 0, "max_x": 6000}))
+
+    response = client.put("/tanks/positions", json={"tanks": [
+        # Onto the unmoved tanks[1]
+        {"id": tanks[0]["id"], "x_position": tanks[1]["x_position"] + 10, "y_position": 0, "z_position": 0},
+        # Past the line's max_x
+        {"id": tanks[4]["id"], "x_position": 5500, "y_position": 0, "z_position": 0},
+    ]})
+    ok(response)
+    assert set(response.headers["X-Layout-Collisions"].split(",")) == {f"{tanks[0]['id']}:{tanks[1]['id']}"}
+    assert response.headers["X-Layout-Out-Of-Bounds"] == f"{tanks[4]['id']}:x"
+
+
+def test_bulk_position_update_reports_collisions_between_moved_tanks(client, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    response = client.put("/tanks/positions", json={"tanks": [
+        {"id": tanks[0]["id"], "x_position": 90000, "y_position": 0, "z_position": 0},
+        {"id": tanks[1]["id"], "x_position": 90500, "y_position": 0, "z_position": 0},
+        {"id": tanks[2]["id"], "x_position": 200000, "y_position": 0, "z_position": 0},
+    ]})
+    ok(response)
+    a, b = tanks[0]["id"], tanks[1]["id"]
+    assert set(response.headers["X-Layout-Collisions"].split(",")) == {f"{a}:{b}", f"{b}:{a}"}
+    assert "X-Layout-Out-Of-Bounds" not in response.headers
@@ -0,0 +1,91 @@
+"""Line endpoints: batched tank creation, line tanks, numbering and reflow."""
+from tests.conftest import ok
+
+
+def test_create_line_creates_evenly_spaced_tanks(client, line):
+    assert len(line["tanks"]) == 5
+    xs = sorted(t["x_position"] for t in line["tanks"])
+    assert xs == [0, 1100, 2200, 3300, 4400]
+    assert [t["x_position"] for t in ok(client.get(f"/lines/{line['id']}/tanks"))] == xs
+
+
+def test_line_tanks_of_a_missing_line_is_empty(client):
+    assert ok(client.get("/lines/9999/tanks")) == []
+
+
+def test_numbering_preview_and_apply(client, plant, line):
+    group = ok(client.post("/tank-groups/", json={
+        "name": "G", "number": 1, "plant_id": plant["id"], "line_id": line["id"]
+    }), 201)
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    for tank in tanks[2:4]:
+        ok(client.put(f"/tanks/{tank['id']}", json={"tank_group_id": group["id"]}))
+
+    preview = ok(client.post(f"/lines/{line['id']}/numbering", json={"dry_run": True}))
+    assert preview["dry_run"] and preview["start_number"] == 101 and preview["tank_count"] == 5
+    assert [t["new_number"] for t in preview["tanks"]] == [101, 102, 103, 104, 105]
+    assert all(t["number"] is None for t in ok(client.get(f"/lines/{line['id']}/tanks")))
+
+    applied = ok(client.post(f"/lines/{line['id']}/numbering", json={"start_number": 110}))
+    assert [t["new_number"] for t in applied["tanks"]] == [110, 111, 112, 113, 114]
+    assert [t["number"] for t in ok(client.get(f"/lines/{line['id']}/tanks"))] == [110, 111, 112, 113, 114]
+    # The group takes the number of its lowest-numbered tank
+    assert ok(client.get(f"/tank-groups/{group['id']}"))["number"] == 112
+
+    # Numbering again changes nothing
+    again = ok(client.post(f"/lines/{line['id']}/numbering", json={"start_number": 110}))
+    assert again["tanks"] == [] and again["tank_groups"] == []
+
+
+def _second_line(client, plant):
+    """Line 200 with three ungrouped tanks in its own row at y=5000"""
+    return ok(client.post("/lines", json={
+        "plant_id": plant["id"], "number": 200, "count": 3,
+        "width": 1000, "length": 2000, "depth": 1500, "gap": 100,
+        "x_position": 0, "y_position": 5000, "z_position": 0,
+    }))
+
+
+def test_numbering_leaves_other_lines_alone(client, plant, line):
+    other = _second_line(client, plant)
+    ok(client.post(f"/lines/{other['id']}/numbering", json={}))
+
+    preview = ok(client.post(f"/lines/{line['id']}/numbering", json={"dry_run": True}))
+    assert preview["tank_count"] == 5
+    assert [t["new_number"] for t in preview["tanks"]] == [101, 102, 103, 104, 105]
+    ok(client.post(f"/lines/{line['id']}/numbering", json={}))
+    assert [ok(client.get(f"/tanks/{t['id']}"))["number"] for t in other["tanks"]] == [201, 202, 203]
+
+
+def test_reflow_packs_tanks(client, plant, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    ok(client.put(f"/tanks/{tanks[4]['id']}", json={"x_position": 20000}))
+
+    preview = ok(client.post(f"/lines/{line['id']}/layout", json={"start_x": 0, "dry_run": True}))
+    assert [(t["id"], t["new_x_position"]) for t in preview["tanks"]] == [(tanks[4]["id"], 4400)]
+    assert ok(client.get(f"/tanks/{tanks[4]['id']}"))["x_position"] == 20000
+
+    ok(client.post(f"/lines/{line['id']}/layout", json={"start_x": 0}))
+    assert ok(client.get(f"/tanks/{tanks[4]['id']}"))["x_position"] == 4400
+    assert ok(client.post(f"/lines/{line['id']}/layout", json={"start_x": 0}))["tanks"] == []
+
+
+def test_reflow_leaves_other_lines_alone(client, plant, line):
+    other = _second_line(client, plant)
+    assert (other["min_y"], other["max_y"]) == (5000, 7000)
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    ok(client.put(f"/tanks/{tanks[4]['id']}", json={"x_position": 20000}))
+
+    plan = ok(client.post(f"/lines/{line['id']}/layout", json={"start_x": 0}))
+    assert plan["tank_count"] == 5 and [t["id"] for t in plan["tanks"]] == [tanks[4]["id"]]
+    assert (plan["min_y"], plan["max_y"], plan["max_x"]) == (0, 2000, 5400)
+    assert [ok(client.get(f"/tanks/{t['id']}"))["x_position"] for t in other["tanks"]] == [0, 1100, 2200]
+    other = ok(client.get(f"/lines/{other['id']}"))
+    assert (other["min_y"], other["max_y"]) == (5000, 7000)
+
+
+def test_reflow_rejects_bad_anchors(client, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    response = client.post(f"/lines/{line['id']}/layout", json={"anchor_tank_ids": [tanks[1]["id"]], "start_x": 1000})
+    assert response.status_code == 409
+    assert client.post(f"/lines/{line['id']}/layout", json={"anchor_tank_ids": [424242]}).status_code == 400
@@ -0,0 +1,96 @@
+"""In-process read cache: hits, LRU/TTL eviction and invalidation after writes."""
+from app.core.cache import MISSING, ReadCache
+from tests.conftest import ok
+
+
+def test_lru_eviction_and_ttl():
+    cache = ReadCache(max_entries=2, ttl_seconds=60)
+    for key in ("a", "b"):
+        cache.set((key,), key, [], cache.watermark())
+    cache.get(("a",))
+    cache.set(("c",), "c", [], cache.watermark())
+    assert cache.get(("b",)) is MISSING
+    assert cache.get(("a",)) == "a" and cache.stats()["evictions"] == 1
+
+    expired = ReadCache(max_entries=2, ttl_seconds=-1)
+    expired.set(("a",), "a", [], expired.watermark())
+    assert expired.get(("a",)) is MISSING
+
+
+def test_read_racing_an_invalidation_is_not_cached():
+    cache = ReadCache(max_entries=10, ttl_seconds=60)
+    read_at = cache.watermark()
+    cache.invalidate("plant:1")  # A write commits while the read runs
+    cache.set(("line_tanks", 1), ["stale"], ["plant:1"], read_at)
+    assert cache.get(("line_tanks", 1)) is MISSING
+
+    cache.set(("line_tanks", 1), ["fresh"], ["plant:1"], cache.watermark())
+    assert cache.get(("line_tanks", 1)) == ["fresh"]
+    cache.invalidate("plant:2")
+    assert cache.get(("line_tanks", 1)) == ["fresh"]
+    cache.invalidate("plant:1")
+    assert cache.get(("line_tanks", 1)) is MISSING
+
+
+def test_repeated_reads_are_served_from_cache(client, plant, line):
+    for url in ("/customers", f"/plants/{plant['id']}/lines", f"/lines/{line['id']}/tanks"):
+        assert ok(client.get(url)) == ok(client.get(url))
+    by_name = ok(client.get("/health/read-cache"))["by_name"]
+    assert {name: counts["hits"] for name, counts in by_name.items()} == {
+        "customers": 1, "plant_lines": 1, "line_tanks": 1
+    }
+
+
+def test_writes_invalidate_cached_lists(client, customer, plant, line):
+    ok(client.get("/customers"))
+    ok(client.post("/customers", json={"name": "Beta"}))
+    assert [c["name"] for c in ok(client.get("/customers"))] == ["Acme", "Beta"]
+
+    ok(client.get(f"/plants/{plant['id']}/lines"))
+    ok(client.post("/lines", json={
+        "plant_id": plant["id"], "number": 200, "count": 1, "width": 100, "length": 100, "depth": 100,
+        "gap": 10, "x_position": 90000, "y_position": 0, "z_position": 0,
+    }))
+    assert [l["number"] for l in ok(client.get(f"/plants/{plant['id']}/lines"))] == [100, 200]
+
+    tank_id = ok(client.get(f"/lines/{line['id']}/tanks"))[0]["id"]
+    ok(client.put(f"/tanks/{tank_id}", json={"name": "renamed"}))
+    assert ok(client.get(f"/lines/{line['id']}/tanks"))[0]["name"] == "renamed"
+
+    ok(client.get(f"/customers/{customer['id']}/plants"))
+    ok(client.put(f"/plants/{plant['id']}", json={"town": "Pori"}))
+    assert ok(client.get(f"/customers/{customer['id']}/plants"))[0]["town"] == "Pori"
+
+    ok(client.get("/plants"))
+    ok(client.put(f"/customers/{customer['id']}", json={"name": "Renamed"}))
+    assert ok(client.get("/plants"))[0]["customer_name"] == "Renamed"
+
+
+def test_cache_hits_do_not_query_the_database(client, customer, plant, line):
+    for url in ("/customers", "/plants", f"/customers/{customer['id']}/plants",
+                f"/plants/{plant['id']}/lines", f"/lines/{line['id']}/tanks"):
+        first = client.get(url)
+        assert int(first.headers["X-DB-Queries"]) > 0
+
+        hit = client.get(url)
+        assert hit.headers["X-DB-Queries"] == "0", url
+        assert hit.headers["ETag"] == first.headers["ETag"] and hit.json() == first.json()
+
+        not_modified = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert not_modified.status_code == 304 and not_modified.headers["X-DB-Queries"] == "0", url
+
+
+def test_cached_page_keeps_its_cursor(client):
+    for name in ("A", "B", "C"):
+        ok(client.post("/customers", json={"name": name}))
+    first = client.get("/customers", params={"limit": 2})
+    hit = client.get("/customers", params={"limit": 2})
+    assert hit.headers["X-DB-Queries"] == "0"
+    assert hit.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+
+def test_missing_rows_are_not_cached(client):
+    assert client.get("/customers/9999/plants").status_code == 404
+    assert client.get("/customers/9999/plants").status_code == 404
+    ok(client.get("/lines/9999/tanks"))
+    assert int(client.get("/lines/9999/tanks").headers["X-DB-Queries"]) > 0
@@ -0,0 +1,61 @@
+"""Read-replica routing: falling back to the primary when the replica fails."""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.core.replica import ReplicaMonitor, RoutingSession
+from app.models.customer import Customer
+from tests.conftest import ok
+
+
+@pytest.fixture
+def dead_replica(tmp_path, monkeypatch):
+    """Route read-only sessions to a replica that cannot be opened"""
+    replica = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+    monitor = ReplicaMonitor(engine=None, max_lag=5, check_interval=60)
+    monitor.healthy = True
+
+    async def is_usable():
+        return monitor.healthy
+
+    # The periodic health check has not noticed the outage yet
+    monkeypatch.setattr(monitor, "is_usable", is_usable)
+    monkeypatch.setattr(RoutingSession, "replica_bind", replica)
+    monkeypatch.setattr(RoutingSession, "replica_monitor", monitor)
+    monkeypatch.setattr(database, "replica_monitor", monitor)
+    yield monitor
+    replica.dispose()
+
+
+def test_sync_read_falls_back_to_primary(client, customer, dead_replica):
+    with RoutingSession(bind=database.engine, info={"use_replica": True}) as session:
+        assert session.scalars(select(Customer.name)).all() == ["Acme"]
+        assert session.get(Customer, customer["id"]).name == "Acme"
+        assert session.info["use_replica"] is False
+    assert dead_replica.healthy is False
+    assert "unable to open database file" in dead_replica.last_error
+
+
+def test_async_reads_fall_back_to_primary(client, customer, dead_replica):
+    async def read():
+        primary = create_async_engine(database.async_database_url)
+        factory = async_sessionmaker(primary, class_=AsyncSession, sync_session_class=RoutingSession)
+        try:
+            async with factory(info={"use_replica": True}) as db:
+                names = (await db.scalars(select(Customer.name))).all()
+            async with factory(info={"use_replica": True}) as db:
+                found = await db.get(Customer, customer["id"])
+            return names, found.name
+        finally:
+            await primary.dispose()
+
+    assert asyncio.run(read()) == (["Acme"], "Acme")
+    assert dead_replica.healthy is False
+
+
+def test_read_endpoint_survives_dead_replica(client, customer, dead_replica):
+    assert [c["name"] for c in ok(client.get("/customers/", params={"search": "acme"}))] == ["Acme"]
+    assert dead_replica.healthy is False
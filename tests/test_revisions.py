@@ -0,0 +1,115 @@
+"""Plant revisions: deep copy, compare, counts, activation and the active pointer."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from app.core.cache import MISSING, customer_tag, read_cache
+from app.database import engine
+from app.models.plant import Plant
+from app.services.active_revision import ActiveRevisionService
+from tests.conftest import ok
+
+
+def _grouped_line(client, plant, line):
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    group = ok(client.post("/tank-groups/", json={
+        "name": "G1", "number": 101, "plant_id": plant["id"], "line_id": line["id"]
+    }), 201)
+    ok(client.put(f"/tanks/{tanks[0]['id']}", json={"tank_group_id": group["id"]}))
+    return tanks, group
+
+
+def test_new_revision_copies_lines_groups_and_tanks(client, plant, line):
+    _grouped_line(client, plant, line)
+    revision = ok(client.post(f"/plants/{plant['id']}/revisions", json={"revision_name": "R2"}))
+    assert revision["revision"] == 2 and revision["revision_status"] == "DRAFT"
+
+    lines = ok(client.get(f"/plants/{revision['id']}/lines"))
+    tanks = ok(client.get("/tanks/", params={"plant_id": revision["id"]}))
+    groups = ok(client.get("/tank-groups/", params={"plant_id": revision["id"]}))
+    assert [l["number"] for l in lines] == [100]
+    assert len(tanks) == 5 and len(groups) == 1
+    assert groups[0]["line_id"] == lines[0]["id"]
+    # The copied tank points at the copied group, not the original one
+    assert [t["tank_group_id"] for t in tanks if t["tank_group_id"]] == [groups[0]["id"]]
+
+    diff = ok(client.get(f"/plants/{plant['id']}/revisions/compare/{revision['id']}"))
+    assert diff["identical"] and diff["changes"] == []
+
+
+def test_compare_reports_moves_resizes_and_removals(client, plant, line):
+    revision = ok(client.post(f"/plants/{plant['id']}/revisions", json={"revision_name": "R2"}))
+    tanks = sorted(ok(client.get("/tanks/", params={"plant_id": revision["id"]})), key=lambda t: t["x_position"])
+    ok(client.put(f"/tanks/{tanks[0]['id']}", json={"x_position": 99999}))
+    ok(client.put(f"/tanks/{tanks[1]['id']}", json={"width": 5}))
+    ok(client.delete(f"/tanks/{tanks[2]['id']}"), 204)
+
+    diff = ok(client.get(f"/plants/{plant['id']}/revisions/compare/{revision['id']}"))
+    assert not diff["identical"]
+    assert diff["summary"]["moved"] == 1
+    assert diff["summary"]["resized"] == 1
+    assert diff["summary"]["removed"] == 1
+
+
+def test_revision_list_counts_lines_and_tanks(client, plant, line):
+    ok(client.post(f"/plants/{plant['id']}/revisions", json={"revision_name": "R2"}))
+    revisions = ok(client.get(f"/plants/{plant['id']}/revisions"))
+    assert sorted((r["revision"], r["line_count"], r["tank_count"]) for r in revisions) == [(1, 1, 5), (2, 1, 5)]
+
+
+def test_activation_archives_the_previous_revision(client, plant):
+    revision = ok(client.post(f"/plants/{plant['id']}/revisions", json={"revision_name": "R2"}))
+    assert ok(client.get(f"/plants/{plant['id']}/active"))["id"] == plant["id"]
+
+    activated = ok(client.put(f"/plants/{revision['id']}/revisions/activate", json={"plant_id": revision["id"]}))
+    assert activated["revision_status"] == "ACTIVE" and activated["is_active_revision"]
+
+    statuses = {r["id"]: r["revision_status"] for r in ok(client.get(f"/plants/{plant['id']}/revisions"))}
+    assert statuses == {plant["id"]: "ARCHIVED", revision["id"]: "ACTIVE"}
+    # The active pointer (and its cache) follow the activation
+    assert ok(client.get(f"/plants/{plant['id']}/active"))["id"] == revision["id"]
+    assert [p["id"] for p in ok(client.get("/plants"))] == [revision["id"]]
+
+
+def test_activating_the_active_revision_is_rejected(client, plant):
+    response = client.put(f"/plants/{plant['id']}/revisions/activate", json={"plant_id": plant["id"]})
+    assert response.status_code == 400
+    assert client.put("/plants/9999/revisions/activate", json={"plant_id": 9999}).status_code == 404
+
+
+@pytest.mark.parametrize("status", [None, "REVIEW"])
+def test_only_draft_revisions_can_be_activated(client, plant, status):
+    revision = ok(client.post(f"/plants/{plant['id']}/revisions", json={"revision_name": "R2"}))
+    with engine.begin() as conn:
+        conn.execute(update(Plant).where(Plant.id == revision["id"]).values(revision_status=status))
+
+    response = client.put(f"/plants/{revision['id']}/revisions/activate", json={"plant_id": revision["id"]})
+    assert response.status_code == 400, response.text
+    assert ok(client.get(f"/plants/{plant['id']}/active"))["id"] == plant["id"]
+
+
+def test_plant_tree(client, plant, line):
+    _grouped_line(client, plant, line)
+    tree = ok(client.get(f"/plants/{plant['id']}/tree"))
+    assert [len(g["tanks"]) for g in tree["lines"][0]["tank_groups"]] == [1]
+    assert len(tree["ungrouped_tanks"]) == 4
+    assert ok(client.get(f"/plants/{plant['id']}/tree", params={"depth": 0}))["lines"] is None
+    assert client.get("/plants/9999/tree").status_code == 404
+
+
+def test_active_pointer_read_racing_an_activation_is_not_cached(client):
+    class RacingSession:
+        async def execute(self, statement):
+            read_cache.invalidate(customer_tag(1))  # An activation commits while the pointer is read
+            return SimpleNamespace(scalar=lambda: 5)
+
+    assert asyncio.run(ActiveRevisionService(RacingSession()).resolve(1, "Plant 1")) == 5
+    assert read_cache.get(("active_revision", 1, "Plant 1")) is MISSING
+
+
+def test_rename_moves_the_active_pointer(client, plant):
+    assert ok(client.get(f"/plants/{plant['id']}/active"))["name"] == "Plant 1"
+    ok(client.put(f"/plants/{plant['id']}", json={"name": "Plant 1b"}))
+    assert ok(client.get(f"/plants/{plant['id']}/active"))["name"] == "Plant 1b"
@@ -0,0 +1,56 @@
+"""Fuzzy name search: shared ranking rules on PostgreSQL and in the fallback."""
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import operators
+
+from app.models.customer import Customer
+from app.services.search import SearchService, contains_pattern, match_score
+from tests.conftest import ok
+
+
+class _CapturingSession:
+    """Stand-in PostgreSQL session that records the executed statement"""
+
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    async def execute(self, statement):
+        self.statement = statement
+        return SimpleNamespace(all=lambda: [])
+
+
+def _postgres_statement(term):
+    session = _CapturingSession()
+    asyncio.run(SearchService(session).search(select(Customer), Customer.name, term, 10))
+    return session.statement
+
+
+def test_postgres_substring_hits_bypass_the_similarity_threshold():
+    statement = _postgres_statement("ab")
+    # WHERE substring OR (trigram match AND score >= threshold)
+    substring, fuzzy = statement.whereclause.clauses
+    assert substring.operator is operators.ilike_op
+    assert fuzzy.operator is operators.and_
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    # Substring hits rank first, as in match_score()
+    assert "ORDER BY CASE WHEN (customer.name ILIKE" in sql
+
+
+def test_like_wildcards_in_the_term_are_literal():
+    assert contains_pattern("50%_off") == "%50\\%\\_off%"
+    assert match_score("50%", "Sale 50% off") == 1.0
+
+
+def test_short_substring_terms_match(client):
+    for name in ("Fabrication Oy", "Zeta"):
+        ok(client.post("/customers", json={"name": name}))
+    assert [c["name"] for c in ok(client.get("/customers", params={"search": "ab"}))] == ["Fabrication Oy"]
+
+
+def test_substring_hits_rank_before_fuzzy_hits(client):
+    for name in ("Acme Works", "Acmee", "Bcme"):
+        ok(client.post("/customers", json={"name": name}))
+    names = [c["name"] for c in ok(client.get("/customers", params={"search": "acme"}))]
+    assert names[:2] == ["Acme Works", "Acmee"]
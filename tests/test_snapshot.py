@@ -0,0 +1,94 @@
+"""Plant snapshot export and import."""
+import pytest
+
+from app.utils.snapshot import SnapshotWriter, compression_available
+from tests.conftest import ok
+
+
+def _import(client, customer, body):
+    return client.post(f"/customers/{customer['id']}/plants/snapshot", content=body)
+
+
+def _snapshot(*frames):
+    writer = SnapshotWriter()
+    return writer.header() + b"".join(writer.frame(frame) for frame in frames) + writer.finish()
+
+
+PLANT_FRAME = {"type": "plant", "columns": ["name", "revision"], "row": ["Imported", 1]}
+LINE_COLUMNS = ["id", "number", "min_x", "max_x", "min_y", "max_y"]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(client, customer, plant, line, compress):
+    if compress and not compression_available():
+        pytest.skip("zstandard not installed")
+    tanks = ok(client.get(f"/lines/{line['id']}/tanks"))
+    group = ok(client.post("/tank-groups/", json={
+        "name": "G", "number": 1, "plant_id": plant["id"], "line_id": line["id"]
+    }), 201)
+    ok(client.put(f"/tanks/{tanks[0]['id']}", json={"tank_group_id": group["id"], "number": 101}))
+
+    exported = client.get(f"/plants/{plant['id']}/snapshot", params={"compress": compress})
+    assert exported.status_code == 200
+    imported = ok(_import(client, customer, exported.content), 201)
+    assert imported["revision"] == 2 and imported["revision_status"] == "DRAFT"
+
+    diff = ok(client.get(f"/plants/{plant['id']}/revisions/compare/{imported['id']}"))
+    assert diff["identical"], diff["changes"]
+    copied = ok(client.get("/tank-groups/", params={"plant_id": imported["id"]}))
+    assert [t["tank_group_id"] for t in ok(client.get("/tanks/", params={"plant_id": imported["id"]}))
+            if t["tank_group_id"]] == [copied[0]["id"]]
+
+
+def test_minimal_snapshot_imports(client, customer):
+    body = _snapshot(
+        PLANT_FRAME,
+        {"type": "lines", "columns": LINE_COLUMNS, "rows": [[7, 100, None, None, None, None]]},
+        {"type": "end", "counts": {"lines": 1, "tank_groups": 0, "tanks": 0}},
+    )
+    imported = ok(_import(client, customer, body), 201)
+    assert [l["number"] for l in ok(client.get(f"/plants/{imported['id']}/lines"))] == [100]
+
+
+@pytest.mark.parametrize("frames", [
+    pytest.param([{"type": "plant", "columns": ["name"]}], id="plant frame without row"),
+    pytest.param([{"type": "plant", "row": ["x"]}], id="plant frame without columns"),
+    pytest.param([{"type": "plant", "columns": ["name", "bogus"], "row": ["x", 1]}], id="unknown plant column"),
+    pytest.param([{"type": "plant", "columns": ["name"], "row": [["x"]]}], id="list plant name"),
+    pytest.param([{"type": "plant", "columns": ["name"], "row": ["x", "y"]}], id="row longer than columns"),
+    pytest.param([PLANT_FRAME, {"type": "lines", "columns": LINE_COLUMNS}], id="data frame without rows"),
+    pytest.param([PLANT_FRAME, {"type": "lines", "columns": ["id", "colour"], "rows": [[1, "red"]]}],
+                 id="unknown line column"),
+    pytest.param([PLANT_FRAME, {"type": "lines", "columns": ["id", "number"], "rows": [[1, [100]]]}],
+                 id="list value"),
+    pytest.param([PLANT_FRAME, {"type": "lines", "columns": ["id", "number"], "rows": [[1, "100"]]}],
+                 id="string in integer column"),
+    pytest.param([PLANT_FRAME, {"type": "lines", "columns": ["id", "number"], "rows": [[1, True]]}],
+                 id="boolean in integer column"),
+    pytest.param([PLANT_FRAME, {"type": "lines", "columns": ["id", "number"], "rows": [[1, 2**40]]}],
+                 id="integer out of range"),
+    pytest.param([PLANT_FRAME, {"type": "lines", "columns": ["id", "number"], "rows": [[1, None]]}],
+                 id="null in required column"),
+    pytest.param([PLANT_FRAME, {"type": "tanks", "columns": ["id", "name"], "rows": [[1, "x" * 256]]}],
+                 id="string too long"),
+    pytest.param([PLANT_FRAME, {"type": "tanks", "columns": ["id", "name", "tank_group_id"], "rows": [[1, "t", 99]]}],
+                 id="unknown parent"),
+    pytest.param([PLANT_FRAME], id="end frame missing"),
+    pytest.param([PLANT_FRAME, {"type": "end", "counts": {"lines": 3, "tank_groups": 0, "tanks": 0}}],
+                 id="counts do not match"),
+])
+def test_malformed_snapshot_is_rejected(client, customer, frames):
+    response = _import(client, customer, _snapshot(*frames))
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"].startswith("Invalid snapshot")
+    # Nothing was inserted
+    assert ok(client.get(f"/customers/{customer['id']}/plants")) == []
+
+
+@pytest.mark.parametrize("body", [b"", b"garbage", _snapshot(PLANT_FRAME)[:-3]])
+def test_corrupt_bytes_are_rejected(client, customer, body):
+    assert _import(client, customer, body).status_code == 400
+
+
+def test_import_for_missing_customer(client):
+    assert client.post("/customers/9999/plants/snapshot", content=_snapshot(PLANT_FRAME)).status_code == 404